@@ -1,7 +1,12 @@
 """
 Agents Package
 """
-from .base import LLMClient
+from .base import LLMClient, ChatCompletion
+from .usage import UsageLedger, UsageRecord, usage_scope
+from .latency import LatencyRecorder, latency_recorder
+from .serialization import serialize_records, register_serializer
+from .language_pack import LanguagePack, AgentSet, get_language_pack, get_agent_set, prewarm
+from .cassette import LLMCassette, CassetteMissError, llm_cassette
 from .intent_agent import IntentAgent
 from .planning_agent import PlanningAgent
 from .order_agent import OrderAgent
@@ -10,6 +15,22 @@ from .general_agent import GeneralAgent
 
 __all__ = [
     'LLMClient',
+    'ChatCompletion',
+    'UsageLedger',
+    'UsageRecord',
+    'usage_scope',
+    'LatencyRecorder',
+    'latency_recorder',
+    'serialize_records',
+    'register_serializer',
+    'LanguagePack',
+    'AgentSet',
+    'get_language_pack',
+    'get_agent_set',
+    'prewarm',
+    'LLMCassette',
+    'CassetteMissError',
+    'llm_cassette',
     'IntentAgent',
     'PlanningAgent',
     'OrderAgent',
@@ -1,29 +1,223 @@
 """
 Base LLM Client
 """
-from typing import List, Dict
+import time
+import contextvars
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
 from config import config
+from .cassette import llm_cassette
+from .usage import record_usage, record_failure
+from .deadline import DeadlineExceeded, Deadline, current_deadline
+from .hedging import hedger
+from .rate_limit import rate_limiter, estimate_tokens, is_retryable, is_rate_limited, retry_after_seconds, reported_limits
+from .latency import latency_recorder
+
+
+@dataclass
+class ChatCompletion:
+    """Provider-independent chat completion result"""
+    content: str
+    model: str
+    usage: Dict[str, int] = field(default_factory=dict)
+    latency_sec: float = 0.0
+
+    @classmethod
+    def from_openai(cls, response: Any, latency_sec: float) -> "ChatCompletion":
+        usage = {}
+        if getattr(response, "usage", None) is not None:
+            details = getattr(response.usage, "prompt_tokens_details", None)
+            usage = {
+                "prompt_tokens": response.usage.prompt_tokens or 0,
+                "completion_tokens": response.usage.completion_tokens or 0,
+                "total_tokens": response.usage.total_tokens or 0,
+                "cached_tokens": (getattr(details, "cached_tokens", 0) or 0) if details is not None else 0,
+            }
+        return cls(
+            content=response.choices[0].message.content or "",
+            model=getattr(response, "model", "") or "",
+            usage=usage,
+            latency_sec=latency_sec,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "content": self.content,
+            "model": self.model,
+            "usage": self.usage,
+            "latency_sec": round(self.latency_sec, 4),
+        }
 
 
 class LLMClient:
     """간단한 LLM 클라이언트"""
-    
-    def __init__(self, model: str = None):
-        import openai
-        self.client = openai.OpenAI(
-            api_key=config.OPENAI_API_KEY
-            # 표준 OpenAI API 사용 (base_url 제거)
-        )
+
+    def __init__(self, model: str = None, agent_name: str = None, hedge: bool = None):
         self.model = model if model else config.OPENAI_MINI_MODEL
-    
-    def chat(self, messages: List[Dict[str, str]], temperature: float = 0.7) -> str:
+        self.agent_name = agent_name or "unknown"
+        # Hedge slow calls with a duplicate request (default: HEDGE_ENABLED and agent in HEDGE_AGENTS)
+        self.hedge = (config.HEDGE_ENABLED and self.agent_name in config.HEDGE_AGENTS) if hedge is None else hedge
+        self._client = None
+
+    @property
+    def client(self):
+        """OpenAI client, created on first live call (replay mode never needs it)"""
+        if self._client is None:
+            import openai
+            self._client = openai.OpenAI(
+                api_key=config.OPENAI_API_KEY,
+                base_url=config.OPENAI_BASE_URL,  # None → standard OpenAI API
+                max_retries=0  # retries are handled by _retrying() together with the shared rate limiter
+            )
+        return self._client
+
+    def complete(self, messages: List[Dict[str, str]], temperature: float = 0.7, **kwargs) -> ChatCompletion:
+        """채팅 완성 요청 (예외를 그대로 전달하고 사용량 정보를 포함한 결과 반환)"""
+        request = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            **kwargs
+        }
+
+        if llm_cassette.mode == "replay":
+            dispatched_at = time.perf_counter()
+            try:
+                recorded = llm_cassette.replay(request)
+            except Exception as e:
+                latency_recorder.record_llm_call(self.model, None, time.perf_counter() - dispatched_at, error=type(e).__name__)
+                record_failure(self.agent_name, self.model, e)
+                raise
+            network = time.perf_counter() - dispatched_at
+            latency_recorder.record_llm_call(self.model, None, network)
+            completion = ChatCompletion(
+                content=recorded.get("content", ""),
+                model=recorded.get("model", self.model),
+                usage=recorded.get("usage", {}),
+                latency_sec=network,
+            )
+            record_usage(self.agent_name, self.model, completion.usage, completion.latency_sec)
+            return completion
+
+        client = self.client
+        estimated = estimate_tokens(messages, kwargs.get("max_tokens"))
+        deadline = current_deadline()
+        try:
+            for attempt in self._retrying(deadline):
+                with attempt:
+                    self._check_deadline(deadline)
+                    queued_at = time.perf_counter()
+                    if rate_limiter is not None:
+                        self._acquire(estimated, deadline)
+                        self._check_deadline(deadline)
+                    dispatched_at = time.perf_counter()
+                    # Queue wait is the rate-limiter wait; without a limiter nothing queues
+                    queue_wait = dispatched_at - queued_at if rate_limiter is not None else None
+                    try:
+                        response = self._create(client, request, estimated, deadline)
+                    except Exception as e:
+                        latency_recorder.record_llm_call(self.model, queue_wait, time.perf_counter() - dispatched_at,
+                                                         error=type(e).__name__)
+                        if rate_limiter is not None and is_rate_limited(e):
+                            rate_limiter.throttle(self.model, retry_after_seconds(e) or config.RETRY_DELAY, reported_limits(e))
+                        raise
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            if deadline is not None and deadline.expired:
+                raise DeadlineExceeded(f"{self.agent_name} ({self.model}) did not finish before the turn deadline: {e}") from e
+            record_failure(self.agent_name, self.model, e)
+            raise
+        network = time.perf_counter() - dispatched_at
+        if self.hedge:
+            hedger.latency.observe(self.model, network)
+        latency_recorder.record_llm_call(self.model, queue_wait, network)
+        completion = ChatCompletion.from_openai(response, network)
+        record_usage(self.agent_name, self.model, completion.usage, completion.latency_sec)
+        if rate_limiter is not None:
+            rate_limiter.reconcile(self.model, estimated, completion.usage.get("total_tokens", 0))
+
+        if llm_cassette.mode == "record":
+            llm_cassette.record(request, completion.to_dict())
+        return completion
+
+    def _acquire(self, estimated: int, deadline: Optional[Deadline]):
+        """Wait for rate-limit capacity; fail at once when the wait would outlast the turn deadline
+
+        Giving up early leaves the remaining time to the caller's fallback (template plan, refund rules).
+        """
+        max_wait = deadline.remaining() if deadline is not None else None
+        wait = rate_limiter.acquire(self.model, estimated, max_wait=max_wait)
+        if max_wait is not None and wait > max_wait:
+            raise DeadlineExceeded(f"{self.agent_name} ({self.model}) skipped: rate-limit wait {wait:.1f}s "
+                                   f"exceeds the {max_wait:.1f}s left")
+
+    def _check_deadline(self, deadline: Optional[Deadline]):
+        if deadline is not None and deadline.expired:
+            raise DeadlineExceeded(f"{self.agent_name} ({self.model}) skipped: turn deadline passed")
+
+    def _create(self, client, request: Dict[str, Any], estimated: int, deadline: Deadline = None):
+        """One chat-completions request (timeout = time left before the deadline), hedged when slow (agents/hedging.py)"""
+        def call():
+            # Passed outside `request` so cassette keys do not depend on the remaining time
+            timeout = {"timeout": max(0.1, deadline.remaining())} if deadline is not None else {}
+            return client.chat.completions.create(**request, **timeout)
+
+        if not self.hedge:
+            return call()
+        # The loser may finish after this call returns; charge it to the ledgers open here
+        caller_context = contextvars.copy_context()
+        return hedger.run(
+            self.model,
+            call,
+            before_hedge=(lambda: self._acquire(estimated, deadline)) if rate_limiter is not None else None,
+            tokens_of=lambda response: getattr(getattr(response, "usage", None), "total_tokens", 0) or 0,
+            on_discard=lambda response: caller_context.run(self._record_discarded, response, estimated)
+        )
+
+    def _record_discarded(self, response: Any, estimated: int):
+        """Usage of a losing hedged request (tagged `<agent>:hedge`), reconciled with the rate limiter"""
+        usage = ChatCompletion.from_openai(response, 0.0).usage
+        record_usage(f"{self.agent_name}:hedge", self.model, usage, 0.0)
+        if rate_limiter is not None:
+            rate_limiter.reconcile(self.model, estimated, usage.get("total_tokens", 0))
+
+    def _retrying(self, deadline: Deadline = None):
+        """tenacity retry loop: MAX_RETRIES retries of retryable errors with full-jitter backoff (≥ retry-after)
+
+        With a deadline, no retry is started whose backoff would outlast the remaining time.
+        """
+        from tenacity import Retrying, stop_after_attempt, retry_if_exception, wait_random_exponential
+
+        backoff = wait_random_exponential(multiplier=config.RETRY_DELAY, max=config.RETRY_MAX_DELAY)
+        attempts = stop_after_attempt(config.MAX_RETRIES + 1)
+
+        def wait(retry_state) -> float:
+            retry_after = retry_after_seconds(retry_state.outcome.exception()) or 0.0
+            return max(retry_after, backoff(retry_state))
+
+        def stop(retry_state) -> bool:
+            if attempts(retry_state):
+                return True
+            return deadline is not None and deadline.remaining() <= (getattr(retry_state, "upcoming_sleep", 0.0) or 0.0)
+
+        def before_sleep(retry_state):
+            print(f"⚠️  Warning: {self.agent_name} ({self.model}) call failed: {retry_state.outcome.exception()} "
+                  f"- retry {retry_state.attempt_number}/{config.MAX_RETRIES} in {retry_state.next_action.sleep:.1f}s")
+
+        return Retrying(
+            stop=stop,
+            wait=wait,
+            retry=retry_if_exception(is_retryable),
+            before_sleep=before_sleep,
+            reraise=True
+        )
+
+    def chat(self, messages: List[Dict[str, str]], temperature: float = 0.7, **kwargs) -> str:
         """채팅 완성 요청"""
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature
-            )
-            return response.choices[0].message.content
+            return self.complete(messages, temperature, **kwargs).content
+        except DeadlineExceeded:
+            raise  # handled by SimplifiedChatbot (degraded answer instead of an error string)
         except Exception as e:
-            return f"LLM 호출 오류: {str(e)}"
\ No newline at end of file
+            return f"LLM 호출 오류: {str(e)}"
@@ -0,0 +1,99 @@
+"""
+Micro-batching across sessions
+
+같은 키(모델, 언어, 시스템 프롬프트)로 들어온 요청을 짧은 시간(INTENT_BATCH_WINDOW_MS) 동안 모아
+한 번의 호출로 처리하고 결과를 각 세션에 돌려줍니다. 별도 스레드 없이 첫 요청(리더)이 창이 끝날 때까지
+기다렸다가 배치를 보내고, 나머지 요청(팔로워)은 결과를 기다립니다.
+배치가 실패하거나 특정 항목의 결과가 없으면 None을 받으며, 호출 쪽에서 단건 호출로 대체합니다.
+"""
+import threading
+from typing import Dict, List, Any, Callable, Hashable, Optional
+from config import config
+
+
+class _Batch:
+    """Items collected under one key, and their results once the leader has sent them"""
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.results: List[Any] = []
+        self.error: Optional[BaseException] = None
+        self.sealed = threading.Event()  # set when the batch reaches max_size
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """Collects submissions per key for `window` seconds (or up to `max_size`) and runs them as one batch"""
+
+    def __init__(self, window: float = None, max_size: int = None):
+        self.window = config.INTENT_BATCH_WINDOW_MS / 1000.0 if window is None else window
+        self.max_size = max(1, config.INTENT_BATCH_MAX if max_size is None else max_size)
+        self._open: Dict[Hashable, _Batch] = {}
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "batches": 0, "batched_items": 0, "largest_batch": 0,
+                         "failed_batches": 0, "follower_timeouts": 0}
+
+    def submit(self, key: Hashable, item: Any, run_batch: Callable[[List[Any]], List[Any]],
+               timeout: float = None) -> Any:
+        """Result for `item` from run_batch(items), or None (failed batch, missing result or timeout)
+
+        The leader (first submission for the key) re-raises its own batch error, so a turn deadline hit
+        while sending the batch still reaches the leader's turn; followers fall back instead.
+        """
+        with self._lock:
+            self.counters["requests"] += 1
+            batch = self._open.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._open[key] = _Batch()
+            index = len(batch.items)
+            batch.items.append(item)
+            if len(batch.items) >= self.max_size:
+                del self._open[key]
+                batch.sealed.set()
+
+        if leader:
+            self._lead(key, batch, run_batch, timeout)
+            if batch.error is not None:
+                raise batch.error
+        elif not batch.done.wait(timeout):
+            self._count("follower_timeouts")
+            return None
+
+        if batch.error is not None or index >= len(batch.results):
+            return None
+        return batch.results[index]
+
+    def _lead(self, key: Hashable, batch: _Batch, run_batch: Callable[[List[Any]], List[Any]], timeout: float = None):
+        window = self.window if timeout is None else min(self.window, timeout)
+        batch.sealed.wait(window)
+        with self._lock:
+            if self._open.get(key) is batch:
+                del self._open[key]
+            size = len(batch.items)
+            if size > 1:
+                self.counters["batches"] += 1
+                self.counters["batched_items"] += size
+                self.counters["largest_batch"] = max(self.counters["largest_batch"], size)
+        try:
+            batch.results = list(run_batch(list(batch.items)) or [])
+        except BaseException as e:
+            batch.error = e
+            if size > 1:
+                self._count("failed_batches")
+        finally:
+            batch.done.set()
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.counters[key] += amount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+        counters["avg_batch_size"] = round(counters["batched_items"] / counters["batches"], 2) if counters["batches"] else 0.0
+        return counters
+
+
+# Shared by every IntentAgent when INTENT_BATCH_ENABLED=1
+intent_batcher = MicroBatcher()
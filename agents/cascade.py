@@ -0,0 +1,67 @@
+"""
+Model cascade (small model first, escalate on doubt)
+
+CASCADE_AGENTS에 포함된 에이전트는 먼저 작은 모델(CASCADE_MODEL)로 응답을 만들고,
+JSON이 유효하지 않거나, 자체 보고한 신뢰도가 낮거나, 결정론적 정책 판단과 충돌할 때만 기본 모델(예: gpt-4o)로 다시 호출합니다.
+에이전트별 호출 수와 승격(escalation) 사유를 집계합니다.
+"""
+import threading
+from typing import Dict, List, Any, Callable, Optional
+from .deadline import DeadlineExceeded
+
+
+class CascadeStats:
+    """Per-agent cascade calls and escalations by reason"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._agents: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, agent_name: str, reason: Optional[str]):
+        with self._lock:
+            entry = self._agents.setdefault(agent_name, {"calls": 0, "escalated": 0, "reasons": {}})
+            entry["calls"] += 1
+            if reason is not None:
+                entry["escalated"] += 1
+                entry["reasons"][reason] = entry["reasons"].get(reason, 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                agent_name: {
+                    "calls": entry["calls"],
+                    "escalated": entry["escalated"],
+                    "escalation_rate": round(entry["escalated"] / entry["calls"], 4) if entry["calls"] else 0.0,
+                    "reasons": dict(entry["reasons"]),
+                }
+                for agent_name, entry in sorted(self._agents.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._agents.clear()
+
+
+cascade_stats = CascadeStats()
+
+
+def run_cascade(agent_name: str, small_llm, large_llm, messages: List[Dict[str, str]],
+                parse: Callable[[str], Any], escalation_reason: Callable[[Any], Optional[str]], **chat_kwargs) -> Any:
+    """Parsed small-model answer, or the large model's when `escalation_reason` objects to it
+
+    Without a small model this is a plain call to the large one. If the escalated call runs out of
+    turn deadline, the small model's answer is kept.
+    """
+    if small_llm is None:
+        return parse(large_llm.chat(messages, **chat_kwargs))
+    result = parse(small_llm.chat(messages, **chat_kwargs))
+    reason = escalation_reason(result)
+    cascade_stats.record(agent_name, reason)
+    if reason is None:
+        return result
+    print(f"🔼 {agent_name}: escalating {small_llm.model} → {large_llm.model} ({reason})")
+    try:
+        return parse(large_llm.chat(messages, **chat_kwargs))
+    except DeadlineExceeded as e:
+        print(f"[WARNING] {agent_name}: keeping the {small_llm.model} answer ({e})")
+        return result
@@ -0,0 +1,134 @@
+"""
+Record/replay cassette for LLM traffic
+
+record 모드에서는 모든 chat-completions 요청/응답 쌍을 (정규화된 요청 해시 → 완성 결과, 사용량)으로
+카세트 파일에 기록하고, replay 모드에서는 네트워크 없이 기록된 응답을 반환합니다.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, List, Any, Optional
+from config import config
+
+
+class CassetteMissError(KeyError):
+    """Raised in replay mode when a request was never recorded"""
+
+
+class LLMCassette:
+    """JSONL cassette of normalized request hash → completion and usage"""
+
+    MODES = ("off", "record", "replay")
+
+    def __init__(self, mode: str = None, path: str = None, replay_latency: str = None):
+        """
+        Args:
+            mode: off | record | replay (default: config.LLM_CASSETTE_MODE)
+            path: Cassette file path (default: config.LLM_CASSETTE_PATH)
+            replay_latency: Seconds to sleep per replayed call, or "recorded" to reuse the recorded latency
+        """
+        self.mode = (mode or config.LLM_CASSETTE_MODE).lower()
+        if self.mode not in self.MODES:
+            print(f"⚠️  Warning: Unknown cassette mode '{self.mode}'. Using 'off'.")
+            self.mode = "off"
+        self.path = path or config.LLM_CASSETTE_PATH
+        self.replay_latency = replay_latency if replay_latency is not None else config.LLM_REPLAY_LATENCY
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @staticmethod
+    def normalize_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Drop incidental whitespace differences so equivalent prompts hash the same"""
+        normalized = []
+        for message in messages:
+            content = str(message.get("content", "")).replace("\r\n", "\n")
+            content = "\n".join(line.rstrip() for line in content.strip().split("\n"))
+            normalized.append({"role": message.get("role", "user"), "content": content})
+        return normalized
+
+    @classmethod
+    def request_key(cls, request: Dict[str, Any]) -> str:
+        """Stable hash of model, normalized messages and sampling parameters"""
+        payload = {key: value for key, value in request.items() if key not in ("messages", "timeout")}
+        payload["messages"] = cls.normalize_messages(request.get("messages", []))
+        encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        self._entries[entry["key"]] = entry
+            self._loaded = True
+
+    def record(self, request: Dict[str, Any], completion: Dict[str, Any]):
+        """Append a request/response pair to the cassette"""
+        self._load()
+        key = self.request_key(request)
+        entry = {
+            "key": key,
+            "model": request.get("model"),
+            "messages": self.normalize_messages(request.get("messages", [])),
+            "completion": completion,
+        }
+        with self._lock:
+            self._entries[key] = entry
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def replay(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the recorded completion for a request, sleeping for the simulated latency"""
+        self._load()
+        key = self.request_key(request)
+        entry = self._entries.get(key)
+        if entry is None:
+            raise CassetteMissError(f"No recorded response for request {key[:12]} (model={request.get('model')})")
+        completion = dict(entry["completion"])
+        delay = self._replay_delay(completion)
+        if delay > 0:
+            time.sleep(delay)
+        return completion
+
+    def _replay_delay(self, completion: Dict[str, Any]) -> float:
+        if str(self.replay_latency).lower() == "recorded":
+            return float(completion.get("latency_sec") or 0.0)
+        try:
+            return float(self.replay_latency)
+        except (TypeError, ValueError):
+            return 0.0
+
+    def lookup(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Recorded completion for a request without simulated latency, or None"""
+        self._load()
+        entry = self._entries.get(self.request_key(request))
+        return dict(entry["completion"]) if entry else None
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._entries)
+
+
+# Global cassette instance shared by LLMClient and the scorers
+llm_cassette = LLMCassette()
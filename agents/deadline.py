@@ -0,0 +1,51 @@
+"""
+Turn deadlines
+
+대화 턴 전체의 마감 시각을 contextvar로 전파합니다. 단계별로 더 짧은 마감을 중첩할 수 있고(바깥 마감을 넘지 않음),
+LLMClient는 남은 시간을 요청 타임아웃으로 사용하며 마감이 지나면 DeadlineExceeded를 발생시킵니다.
+"""
+import time
+import contextvars
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """The current turn (or stage) deadline passed before the LLM call could complete"""
+
+
+class Deadline:
+    """Absolute monotonic deadline, never later than its parent's"""
+
+    def __init__(self, seconds: float, parent: "Deadline" = None):
+        expires_at = time.monotonic() + seconds
+        self.expires_at = min(expires_at, parent.expires_at) if parent is not None else expires_at
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+
+# Innermost deadline of the current thread/task
+_current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("current_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[Optional[Deadline]]:
+    """Apply a deadline `seconds` from now inside the block (None/0 keeps the enclosing deadline)"""
+    if not seconds or seconds <= 0:
+        yield current_deadline()
+        return
+    deadline = Deadline(seconds, current_deadline())
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
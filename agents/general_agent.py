@@ -1,25 +1,27 @@
 """
 General Response Agent
 """
-import weave
 from typing import List, Dict, Any
 from .base import LLMClient
-from prompts.weave_prompts import prompt_manager
+from .tracing import weave_op
+from config import Settings, resolve_settings
+from .language_pack import get_language_pack
 
 
 class GeneralAgent:
     """General Response Agent"""
     
-    def __init__(self, llm_client: LLMClient, language: str = None):
+    def __init__(self, llm_client: LLMClient, language: str = None, settings: Settings = None):
         self.llm = llm_client
-        from config import config
-        from prompts.weave_prompts import WeavePromptManager
-        self.language = language or config.LANGUAGE
-        # Create dedicated prompt manager for this agent
-        self.prompt_manager = WeavePromptManager()
-        self.prompt_manager.set_language(self.language)
+        self.settings = resolve_settings(settings, language)
+        self.language = self.settings.language
     
-    @weave.op()
+    @property
+    def prompt_manager(self):
+        """Prompt manager from the shared per-language resource pack"""
+        return get_language_pack(self.language, self.settings).prompt_manager
+    
+    @weave_op()
     def handle(self, user_input: str, context: List[Dict[str, Any]]) -> str:
         """일반 문의 처리"""
         
@@ -44,35 +46,35 @@ class GeneralAgent:
         # Create localized user prompt
         if self.language == "ko":
             user_prompt = f"""
-## 현재 사용자 입력: {user_input}
+## 작업 지시
+아래 대화 맥락을 고려하여 응답해주세요.
 
 ## 대화 맥락
 {context_text if context_text.strip() else "(첫 대화)"}
 
-## 작업 지시
-위 대화 맥락을 고려하여 응답해주세요."""
+## 현재 사용자 입력: {user_input}"""
         elif self.language == "en":
             user_prompt = f"""
-## Current user input: {user_input}
+## Task Instructions
+Please respond considering the conversation context below.
+
+IMPORTANT: Your response must be in English only. Do not use Korean or any other language.
 
 ## Conversation Context
 {context_text if context_text.strip() else "(First conversation)"}
 
-## Task Instructions
-Please respond considering the above conversation context.
-
-IMPORTANT: Your response must be in English only. Do not use Korean or any other language."""
+## Current user input: {user_input}"""
         elif self.language == "jp":
             user_prompt = f"""
-## 現在のユーザー入力: {user_input}
+## 作業指示
+以下の会話コンテキストを考慮して応答してください。
+
+重要: あなたの応答は日本語でのみ行ってください。韓国語や他の言語を使用してはいけません。
 
 ## 会話コンテキスト
 {context_text if context_text.strip() else "(初回会話)"}
 
-## 作業指示
-上記の会話コンテキストを考慮して応答してください。
-
-重要: あなたの応答は日本語でのみ行ってください。韓国語や他の言語を使用してはいけません。"""
+## 現在のユーザー入力: {user_input}"""
 
         # Add language instruction to system prompt for better enforcement
         if self.language == "en":
@@ -87,7 +89,7 @@ IMPORTANT: Your response must be in English only. Do not use Korean or any other
         
         return self.llm.chat(messages)
     
-    @weave.op()
+    @weave_op()
     def handle_with_structured_context(self, user_input: str, structured_context: str) -> str:
         """Handle general inquiry with structured context"""
         
@@ -97,38 +99,38 @@ IMPORTANT: Your response must be in English only. Do not use Korean or any other
         # Create localized user prompt
         if self.language == "ko":
             user_prompt = f"""
-## 현재 사용자 입력: {user_input}
+## 작업 지시
+아래 구조화된 대화 맥락을 고려하여 친근하고 도움이 되는 응답을 해주세요.
+특히 이전 에이전트들의 결과를 종합하여 최종적으로 사용자에게 도움이 되는 응답을 제공해주세요.
 
 ## 구조화된 대화 맥락
 {structured_context if structured_context.strip() else "(첫 대화)"}
 
-## 작업 지시
-위 구조화된 대화 맥락을 고려하여 친근하고 도움이 되는 응답을 해주세요.
-특히 이전 에이전트들의 결과를 종합하여 최종적으로 사용자에게 도움이 되는 응답을 제공해주세요."""
+## 현재 사용자 입력: {user_input}"""
         elif self.language == "en":
             user_prompt = f"""
-## Current user input: {user_input}
+## Task Instructions
+Please provide a friendly and helpful response considering the structured conversation context below.
+Especially, synthesize the results from previous agents to provide a final response that is helpful to the user.
+
+IMPORTANT: Your response must be in English only. Do not use Korean or any other language.
 
 ## Structured conversation context
 {structured_context if structured_context.strip() else "(First conversation)"}
 
-## Task Instructions
-Please provide a friendly and helpful response considering the above structured conversation context.
-Especially, synthesize the results from previous agents to provide a final response that is helpful to the user.
-
-IMPORTANT: Your response must be in English only. Do not use Korean or any other language."""
+## Current user input: {user_input}"""
         elif self.language == "jp":
             user_prompt = f"""
-## 現在のユーザー入力: {user_input}
+## 作業指示
+以下の構造化された会話コンテキストを考慮して親しみやすく役立つ応答をしてください。
+特に、以前のエージェントの結果を総合して、最終的にユーザーに役立つ応答を提供してください。
+
+重要: あなたの応答は日本語でのみ行ってください。韓国語や他の言語を使用してはいけません。
 
 ## 構造化された会話コンテキスト
 {structured_context if structured_context.strip() else "(初回会話)"}
 
-## 作業指示
-上記の構造化された会話コンテキストを考慮して親しみやすく役立つ応答をしてください。
-特に、以前のエージェントの結果を総合して、最終的にユーザーに役立つ応答を提供してください。
-
-重要: あなたの応答は日本語でのみ行ってください。韓国語や他の言語を使用してはいけません。"""
+## 現在のユーザー入力: {user_input}"""
 
         # Add language instruction to system prompt for better enforcement
         if self.language == "en":
@@ -0,0 +1,137 @@
+"""
+Hedged LLM requests
+
+호출이 해당 모델의 최근 지연 시간 백분위수(HEDGE_PERCENTILE)를 넘도록 끝나지 않으면 같은 요청을 한 번 더 보내고
+먼저 끝난 응답을 사용합니다. 추가 요청 수는 전체 호출의 HEDGE_BUDGET 비율로 제한되며,
+헤지 발행 수, 헤지 승리 수(win rate), 버려진 응답의 토큰 수를 집계합니다.
+
+동기 OpenAI 클라이언트는 진행 중인 HTTP 요청을 중단할 수 없으므로, 진 쪽 요청은 취소(아직 시작 전) 또는
+백그라운드에서 끝나도록 버려지고 그 결과는 무시됩니다.
+"""
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Dict, Any, Callable, Deque, Optional
+from config import config
+
+
+class RecentLatency:
+    """Sliding window of the last `window` successful call latencies per model"""
+
+    def __init__(self, window: int = None):
+        self.window = window or config.HEDGE_WINDOW
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, model: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(model)
+            if samples is None:
+                samples = self._samples[model] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, model: str, q: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class Hedger:
+    """Issues at most one duplicate per call once the call outlives the model's recent latency percentile"""
+
+    def __init__(self, percentile: float = None, budget: float = None, min_delay: float = None):
+        self.percentile = config.HEDGE_PERCENTILE if percentile is None else percentile
+        self.budget = config.HEDGE_BUDGET if budget is None else budget
+        self.min_delay = config.HEDGE_MIN_DELAY if min_delay is None else min_delay
+        self.latency = RecentLatency()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.counters = {"calls": 0, "hedged": 0, "hedge_wins": 0, "primary_wins": 0,
+                         "skipped_budget": 0, "wasted_tokens": 0}
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=config.HEDGE_MAX_WORKERS,
+                                                        thread_name_prefix="llm-hedge")
+        return self._executor
+
+    def delay_for(self, model: str) -> Optional[float]:
+        """Seconds to wait before hedging (None until the model has HEDGE_MIN_SAMPLES latencies)"""
+        threshold = self.latency.percentile(model, self.percentile, config.HEDGE_MIN_SAMPLES)
+        return None if threshold is None else max(self.min_delay, threshold)
+
+    def _allow_hedge(self) -> bool:
+        with self._lock:
+            # One hedge of burst, then at most `budget` hedges per call
+            if self.counters["hedged"] + 1 > self.budget * self.counters["calls"] + 1:
+                self.counters["skipped_budget"] += 1
+                return False
+            self.counters["hedged"] += 1
+            return True
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.counters[key] += amount
+
+    def _discard(self, future: Future, tokens_of: Callable[[Any], int], on_discard: Callable[[Any], None] = None):
+        """Cancel the losing request, or count its tokens as waste (and hand it to `on_discard`) once it finishes"""
+        if future.cancel():
+            return
+
+        def on_done(done: Future):
+            if not done.cancelled() and done.exception() is None:
+                self._count("wasted_tokens", tokens_of(done.result()))
+                if on_discard is not None:
+                    on_discard(done.result())
+        future.add_done_callback(on_done)
+
+    def run(self, model: str, call: Callable[[], Any], before_hedge: Callable[[], None] = None,
+            tokens_of: Callable[[Any], int] = lambda result: 0, on_discard: Callable[[Any], None] = None) -> Any:
+        """Run `call()`, hedging it once after delay_for(model); returns the first successful result
+
+        The losing request still finishes (and is billed); `on_discard(result)` lets the caller account for it.
+        """
+        self._count("calls")
+        delay = self.delay_for(model)
+        if delay is None:
+            return call()
+
+        primary = self.executor.submit(call)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._allow_hedge():
+            return primary.result()
+
+        def hedged_call():
+            if before_hedge is not None:
+                before_hedge()
+            return call()
+
+        hedge = self.executor.submit(hedged_call)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self._count("hedge_wins" if future is hedge else "primary_wins")
+                    for other in pending:
+                        self._discard(other, tokens_of, on_discard)
+                    return future.result()
+                if future is primary or error is None:
+                    error = future.exception()
+        raise error
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+        counters["hedge_rate"] = round(counters["hedged"] / counters["calls"], 4) if counters["calls"] else 0.0
+        counters["win_rate"] = round(counters["hedge_wins"] / counters["hedged"], 4) if counters["hedged"] else 0.0
+        return counters
+
+
+hedger = Hedger()
@@ -1,57 +1,56 @@
 """
 Intent Classification Agent
 """
-import weave
 import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 from .base import LLMClient
-from prompts.weave_prompts import prompt_manager
-from config import config
+from .tracing import weave_op
+from .cascade import run_cascade, cascade_stats
+from .batching import MicroBatcher
+from .deadline import DeadlineExceeded, current_deadline
+from .usage import UsageLedger, active_ledgers, detached_usage, split_usage
+from .language_pack import get_language_pack
+from config import Settings, resolve_settings
 
 
 class IntentAgent:
     """Intent analysis agent"""
     
-    def __init__(self, llm_client: LLMClient, language: str = None):
+    def __init__(self, llm_client: LLMClient, language: str = None, settings: Settings = None,
+                 cascade_llm: LLMClient = None, batcher: MicroBatcher = None):
         self.llm = llm_client
-        from prompts.weave_prompts import WeavePromptManager
-        self.language = language or config.LANGUAGE
-        # Create dedicated prompt manager for this agent
-        self.prompt_manager = WeavePromptManager()
-        self.prompt_manager.set_language(self.language)
+        self.cascade_llm = cascade_llm  # Smaller model tried first (see agents/cascade.py)
+        self.batcher = batcher  # Shares classification calls with concurrent sessions (see agents/batching.py)
+        self.settings = resolve_settings(settings, language)
+        self.language = self.settings.language
     
-    @weave.op()
+    @property
+    def prompt_manager(self):
+        """Prompt manager from the shared per-language resource pack"""
+        return get_language_pack(self.language, self.settings).prompt_manager
+    
+    @weave_op()
     def classify(self, user_input: str, context: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Classify user input intent"""
         
-        # Prepare conversation history
-        history_text = ""
-        if context:
-            recent_turns = context[-3:]  # Only recent 3 turns
-            for turn in recent_turns:
-                if self.language == "ko":
-                    history_text += f"사용자: {turn.get('user', '')}\n봇: {turn.get('bot', '')}\n"
-                elif self.language == "en":
-                    history_text += f"User: {turn.get('user', '')}\nBot: {turn.get('bot', '')}\n"
-                elif self.language == "jp":
-                    history_text += f"ユーザー: {turn.get('user', '')}\nボット: {turn.get('bot', '')}\n"
+        history_text = self._history_text(context)
         
         # Get prompt from Weave
         system_prompt = self.prompt_manager.get_intent_prompt(
-            current_date=config.CURRENT_DATE
+            current_date=self.settings.for_call().current_date
         )
         
+        if self.batcher is not None:
+            result = self._classify_batched(system_prompt, user_input, history_text)
+            if result is not None:
+                return result
+        
         # Create localized user prompt
         if self.language == "ko":
             user_prompt = f"""
-**현재 사용자 입력:** "{user_input}"
-
-**대화 히스토리:**
-{history_text if history_text.strip() else "(첫 대화)"}
-
 ## 작업
-위 사용자 입력을 분석하여 의도를 분류하고 엔티티를 추출하세요.
+아래 사용자 입력을 분석하여 의도를 분류하고 엔티티를 추출하세요.
 
 **출력 형식 (JSON만):**
 {{
@@ -66,16 +65,17 @@ class IntentAgent:
         "refund_reference": true_또는_false,
         "selection_type": "선택유형_또는_null"
     }}
-}}"""
-        elif self.language == "en":
-            user_prompt = f"""
-**Current user input:** "{user_input}"
+}}
 
-**Conversation history:**
-{history_text if history_text.strip() else "(First conversation)"}
+**대화 히스토리:**
+{history_text if history_text.strip() else "(첫 대화)"}
 
+**현재 사용자 입력:** "{user_input}"
+"""
+        elif self.language == "en":
+            user_prompt = f"""
 ## Task
-Analyze the above user input to classify intent and extract entities.
+Analyze the user input below to classify intent and extract entities.
 
 **Output format (JSON only):**
 {{
@@ -90,16 +90,17 @@ Analyze the above user input to classify intent and extract entities.
         "refund_reference": true_or_false,
         "selection_type": "selection_type_or_null"
     }}
-}}"""
-        elif self.language == "jp":
-            user_prompt = f"""
-**現在のユーザー入力:** "{user_input}"
+}}
 
-**会話履歴:**
-{history_text if history_text.strip() else "(初回会話)"}
+**Conversation history:**
+{history_text if history_text.strip() else "(First conversation)"}
 
+**Current user input:** "{user_input}"
+"""
+        elif self.language == "jp":
+            user_prompt = f"""
 ## タスク
-上記のユーザー入力を分析して意図を分類し、エンティティを抽出してください。
+以下のユーザー入力を分析して意図を分類し、エンティティを抽出してください。
 
 **出力形式 (JSONのみ):**
 {{
@@ -114,15 +115,170 @@ Analyze the above user input to classify intent and extract entities.
         "refund_reference": true_またはfalse,
         "selection_type": "選択タイプ_またはnull"
     }}
-}}"""
+}}
+
+**会話履歴:**
+{history_text if history_text.strip() else "(初回会話)"}
+
+**現在のユーザー入力:** "{user_input}"
+"""
 
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ]
         
-        response = self.llm.chat(messages, temperature=0.3)
+        result = run_cascade(
+            "intent_agent", self.cascade_llm, self.llm, messages,
+            self._parse_response, self._escalation_reason, temperature=0.3
+        )
+        if result is None:
+            # Default values when JSON parsing fails
+            return {
+                "intent": "general_chat",
+                "confidence": 0.5,
+                "entities": {}
+            }
+        return result
+    
+    def _history_text(self, context: List[Dict[str, Any]]) -> str:
+        """Recent 3 turns as localized conversation history"""
+        history_text = ""
+        if context:
+            recent_turns = context[-3:]  # Only recent 3 turns
+            for turn in recent_turns:
+                if self.language == "ko":
+                    history_text += f"사용자: {turn.get('user', '')}\n봇: {turn.get('bot', '')}\n"
+                elif self.language == "en":
+                    history_text += f"User: {turn.get('user', '')}\nBot: {turn.get('bot', '')}\n"
+                elif self.language == "jp":
+                    history_text += f"ユーザー: {turn.get('user', '')}\nボット: {turn.get('bot', '')}\n"
+        return history_text
+    
+    def _classify_batched(self, system_prompt: str, user_input: str, history_text: str) -> Optional[Dict[str, Any]]:
+        """Intent from a call shared with concurrent sessions (None → classify on its own)"""
+        deadline = current_deadline()
+        result = self.batcher.submit(
+            (self.llm.model, self.language, system_prompt),
+            (user_input, history_text, active_ledgers()),
+            lambda items: self._classify_batch(system_prompt, items),
+            timeout=deadline.remaining() if deadline is not None else None
+        )
+        if not isinstance(result, dict) or "intent" not in result:
+            return None
+        result.setdefault("entities", {})
+        return result
+    
+    def _classify_batch(self, system_prompt: str, items: List[tuple]) -> List[Optional[Dict[str, Any]]]:
+        """Cascaded multi-item classification of (user_input, history_text, ledgers) items, results in item order
+
+        As in run_cascade(), the small model answers the whole batch first and only the entries that
+        _escalation_reason() objects to are sent again, as one batch, to the main model. Token usage is
+        split evenly among the sessions of the batch (each item carries its session's usage ledgers).
+        """
+        if len(items) == 1:
+            return [None]  # Nothing to share: the usual single-item prompt
+        ledger = UsageLedger()
+        try:
+            with detached_usage(ledger):
+                return self._cascade_batch(system_prompt, items)
+        finally:
+            split_usage(ledger, [item[2] for item in items])
+    
+    def _cascade_batch(self, system_prompt: str, items: List[tuple]) -> List[Optional[Dict[str, Any]]]:
+        """Batch on the small model, then the escalated entries as one batch on the main model"""
+        if self.cascade_llm is None:
+            return self._batch_call(self.llm, system_prompt, items)
+        results = self._batch_call(self.cascade_llm, system_prompt, items)
+        escalated = []
+        for index, result in enumerate(results):
+            reason = self._escalation_reason(result)
+            cascade_stats.record("intent_agent", reason)
+            if reason is not None:
+                escalated.append(index)
+        if not escalated:
+            return results
+        print(f"🔼 intent_agent: escalating {len(escalated)}/{len(items)} batched items "
+              f"{self.cascade_llm.model} → {self.llm.model}")
+        try:
+            retried = self._batch_call(self.llm, system_prompt, [items[index] for index in escalated])
+        except DeadlineExceeded as e:
+            print(f"[WARNING] intent_agent: keeping the {self.cascade_llm.model} answers ({e})")
+            return results
+        for index, result in zip(escalated, retried):
+            results[index] = result
+        return results
+    
+    def _batch_call(self, llm: LLMClient, system_prompt: str, items: List[tuple]) -> List[Optional[Dict[str, Any]]]:
+        """One numbered multi-item call; None for items whose entry is missing"""
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": self._batch_user_prompt(items)}
+        ]
+        parsed = self._parse_response(llm.chat(messages, temperature=0.3, response_format={"type": "json_object"}))
+        entries = parsed.get("results") if parsed else None
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        if not isinstance(entries, list):
+            return results
+        for position, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                continue
+            try:
+                index = int(entry.pop("index", position + 1)) - 1
+            except (TypeError, ValueError):
+                continue
+            if 0 <= index < len(items):
+                results[index] = entry
+        return results
+    
+    def _batch_user_prompt(self, items: List[tuple]) -> str:
+        """Localized task with every item's history and input, answered as one JSON object"""
+        if self.language == "ko":
+            task = "아래 번호가 매겨진 각 사용자 입력을 서로 독립적으로 분석하여 의도를 분류하고 엔티티를 추출하세요. 각 입력은 자신의 대화 히스토리만 참고합니다."
+            output = "출력 형식 (JSON만, 입력마다 하나씩)"
+            header, history_label, input_label, first = "작업", "대화 히스토리", "현재 사용자 입력", "(첫 대화)"
+        elif self.language == "jp":
+            task = "以下の番号付きの各ユーザー入力をそれぞれ独立して分析し、意図を分類してエンティティを抽出してください。各入力は自分の会話履歴のみを参照します。"
+            output = "出力形式 (JSONのみ、入力ごとに1つ)"
+            header, history_label, input_label, first = "タスク", "会話履歴", "現在のユーザー入力", "(初回会話)"
+        else:
+            task = "Analyze each numbered user input below independently to classify intent and extract entities. Each input uses only its own conversation history."
+            output = "Output format (JSON only, one entry per input)"
+            header, history_label, input_label, first = "Task", "Conversation history", "Current user input", "(First conversation)"
         
+        sections = [
+            f"### {number}\n**{history_label}:**\n{history_text if history_text.strip() else first}\n\n**{input_label}:** \"{user_input}\""
+            for number, (user_input, history_text, *_) in enumerate(items, start=1)
+        ]
+        return f"""
+## {header}
+{task}
+
+**{output}:**
+{{
+    "results": [
+        {{
+            "index": 1,
+            "intent": "classified_intent",
+            "confidence": 0.95,
+            "entities": {{
+                "order_id": "ORD_number_or_null",
+                "product_name": "product_name_or_null",
+                "time_reference": "time_expression_or_null",
+                "quantity": number_or_null,
+                "refund_reason": "reason_or_null",
+                "refund_reference": true_or_false,
+                "selection_type": "selection_type_or_null"
+            }}
+        }}
+    ]
+}}
+
+""" + "\n\n".join(sections) + "\n"
+    
+    @staticmethod
+    def _parse_response(response: str) -> Optional[Dict[str, Any]]:
+        """Intent JSON from the model output (None when it is not valid JSON)"""
         try:
             # JSON 마크다운 블록 제거
             if response.startswith('```json'):
@@ -131,13 +287,20 @@ Analyze the above user input to classify intent and extract entities.
                 response = response.replace('```', '').strip()
             
             result = json.loads(response)
-            return result
+            return result if isinstance(result, dict) else None
         except Exception as e:
             print(f"[DEBUG] JSON parsing failed: {e}")
             print(f"[DEBUG] Original response: {repr(response)}")
-            # Default values when JSON parsing fails
-            return {
-                "intent": "general_chat",
-                "confidence": 0.5,
-                "entities": {}
-            }
+            return None
+    
+    def _escalation_reason(self, result: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Why the cascade's small-model answer should be redone by the main model"""
+        if result is None or "intent" not in result:
+            return "invalid_json"
+        try:
+            confidence = float(result.get("confidence", 0.0))
+        except (TypeError, ValueError):
+            return "invalid_json"
+        if confidence < self.settings.cascade_confidence:
+            return "low_confidence"
+        return None
@@ -0,0 +1,195 @@
+"""
+Per-language resource bundles and agent sets
+
+언어별 리소스(프롬프트 매니저, 주문 저장소, 환불 판단 뷰, 환불 정책, UI 문구)를 한 번만 만들어
+불변 LanguagePack으로 공유하고, 같은 언어의 세션들은 미리 만들어 둔 AgentSet을 함께 사용합니다.
+언어 전환은 기존 에이전트를 수정하지 않고 다른 언어의 AgentSet을 선택하는 방식이므로
+한 프로세스에서 세 언어를 동시에 서비스해도 세션 간 간섭이나 재로딩 비용이 없습니다.
+팩은 언어와 리소스에 영향을 주는 설정(프롬프트 버전, 환불 정책)별로, AgentSet은 호출별 필드(날짜, 턴 마감)를 제외한 Settings별로 공유됩니다.
+"""
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, List, Any, Mapping, Optional
+from config import config, Settings, resolve_settings
+
+
+# Localized UI strings used by SimplifiedChatbot
+UI_TEMPLATES = {
+    "ko": {
+        "welcome": "\n🛍️ 쇼핑몰 챗봇에 오신걸 환영합니다!\n주문 조회와 환불 문의를 도와드립니다.\n'종료'를 입력하면 대화를 마칩니다.\n",
+        "user_prompt": "고객님: ",
+        "bot_prefix": "봇: ",
+        "exit_message": "대화를 종료합니다. 감사합니다! 👋",
+        "previous_step_header": "## 이전 단계 결과",
+        "error": "오류 발생: {error}",
+        "processing_failed": "죄송합니다. 요청을 처리하는 중 문제가 발생했습니다.",
+        "still_checking": "확인에 시간이 조금 더 걸리고 있습니다. 잠시 후 다시 문의해 주시면 바로 안내해 드리겠습니다.",
+    },
+    "en": {
+        "welcome": "\n🛍️ Welcome to Shopping Mall Chatbot!\nWe help with order inquiries and refund requests.\nType 'exit' to end the conversation.\n",
+        "user_prompt": "Customer: ",
+        "bot_prefix": "Bot: ",
+        "exit_message": "Ending conversation. Thank you! 👋",
+        "previous_step_header": "## Previous Step Results",
+        "error": "Error occurred: {error}",
+        "processing_failed": "Sorry, there was a problem processing your request.",
+        "still_checking": "We're still checking on this. Please ask again in a moment and we'll have an answer for you.",
+    },
+    "jp": {
+        "welcome": "\n🛍️ ショッピングモールチャットボットへようこそ！\n注文照会と返品お問い合わせをサポートします。\n'終了'を入力すると会話を終了します。\n",
+        "user_prompt": "お客様: ",
+        "bot_prefix": "ボット: ",
+        "exit_message": "会話を終了します。ありがとうございました！ 👋",
+        "previous_step_header": "## 前のステップの結果",
+        "error": "エラーが発生しました: {error}",
+        "processing_failed": "申し訳ございません。リクエストの処理中に問題が発生しました。",
+        "still_checking": "確認にもう少し時間がかかっています。少し後にもう一度お問い合わせいただければ、すぐにご案内いたします。",
+    },
+}
+
+
+@dataclass(frozen=True)
+class LanguagePack:
+    """Immutable per-language resources shared by every session in that language"""
+    language: str
+    settings: Settings
+    prompt_manager: Any  # prompts.weave_prompts.WeavePromptManager
+    order_store: Any  # agents.order_store.OrderStore
+    refund_view: Any  # agents.refund_view.RefundEligibilityView
+    refund_policy: str
+    templates: Mapping[str, str]
+
+    def warm(self) -> "LanguagePack":
+        """Resolve prompts and build the date columns / refund view ahead of the first request"""
+        self.prompt_manager.get_intent_prompt()
+        self.prompt_manager.get_order_agent_prompt()
+        self.prompt_manager.get_refund_agent_prompt()
+        self.prompt_manager.get_general_agent_prompt()
+        self.order_store.refresh(settings=self.settings)
+        self.refund_view.refresh(self.settings.current_date)
+        return self
+
+
+def _pack_key(settings: Settings) -> tuple:
+    """Settings that change the pack's resources (dates are passed per request instead)"""
+    return settings.policy_key + (settings.use_local_prompts, settings.prompt_version)
+
+
+def build_language_pack(language: str, settings: Settings = None) -> LanguagePack:
+    """Load every resource for one language"""
+    from prompts.weave_prompts import WeavePromptManager, load_refund_policy
+    from .order_store import get_order_store
+    from .refund_view import get_refund_view
+
+    settings = resolve_settings(settings, language)
+    return LanguagePack(
+        language=language,
+        settings=settings,
+        prompt_manager=WeavePromptManager(settings=settings),
+        order_store=get_order_store(language),
+        refund_view=get_refund_view(language, settings),
+        refund_policy=load_refund_policy(language),
+        templates=MappingProxyType(dict(UI_TEMPLATES.get(language, UI_TEMPLATES["ko"]))),
+    )
+
+
+_packs: Dict[tuple, LanguagePack] = {}
+_packs_lock = threading.Lock()
+
+
+def get_language_pack(language: str, settings: Settings = None) -> LanguagePack:
+    """Shared LanguagePack, built on first request for the language (and resource settings)"""
+    if language not in config.SUPPORTED_LANGUAGES:
+        raise ValueError(f"Unsupported language: {language}")
+    settings = resolve_settings(settings, language)
+    key = _pack_key(settings)
+    pack = _packs.get(key)
+    if pack is None:
+        with _packs_lock:
+            pack = _packs.get(key)
+            if pack is None:
+                pack = _packs[key] = build_language_pack(language, settings)
+    return pack
+
+
+@dataclass(frozen=True)
+class AgentSet:
+    """Intent, planning and domain agents bound to one Settings (stateless, shared across sessions)"""
+    settings: Settings
+    intent_agent: Any
+    planning_agent: Any
+    agents: Mapping[str, Any]
+
+    @property
+    def language(self) -> str:
+        return self.settings.language
+
+    @property
+    def pack(self) -> LanguagePack:
+        return get_language_pack(self.language, self.settings)
+
+
+def build_agent_set(settings: Settings) -> AgentSet:
+    """Create the agents for one Settings (resources load on first use via the LanguagePack)"""
+    from .base import LLMClient
+    from .intent_agent import IntentAgent
+    from .planning_agent import PlanningAgent
+    from .order_agent import OrderAgent
+    from .refund_agent import RefundAgent
+    from .general_agent import GeneralAgent
+    from .batching import intent_batcher
+
+    def cascade_llm(agent_name: str, model: str):
+        """Small first-try model for agents in settings.cascade_agents (None when not cascading)"""
+        if agent_name in settings.cascade_agents and settings.cascade_model != model:
+            return LLMClient(model=settings.cascade_model, agent_name=agent_name)
+        return None
+
+    return AgentSet(
+        settings=settings,
+        intent_agent=IntentAgent(LLMClient(model=settings.intent_agent_model, agent_name="intent_agent"), settings=settings,
+                                 cascade_llm=cascade_llm("intent_agent", settings.intent_agent_model),
+                                 batcher=intent_batcher if config.INTENT_BATCH_ENABLED else None),
+        planning_agent=PlanningAgent(LLMClient(model=settings.planning_agent_model, agent_name="planning_agent"), settings=settings),
+        agents=MappingProxyType({
+            'order_agent': OrderAgent(LLMClient(model=settings.order_agent_model, agent_name="order_agent"), settings=settings),
+            'refund_agent': RefundAgent(LLMClient(model=settings.refund_agent_model, agent_name="refund_agent"), settings=settings,
+                                        cascade_llm=cascade_llm("refund_agent", settings.refund_agent_model)),
+            'general_agent': GeneralAgent(LLMClient(model=settings.general_agent_model, agent_name="general_agent"), settings=settings),
+        }),
+    )
+
+
+_agent_sets: Dict[Settings, AgentSet] = {}
+_agent_sets_lock = threading.Lock()
+
+
+def get_agent_set(language: str = None, settings: Settings = None) -> AgentSet:
+    """Shared AgentSet for the settings (default: current settings for `language`)
+
+    Keyed without the per-call fields (Settings.shared), so per-session dates do not create agent sets;
+    agents read the date of the running session via Settings.for_call().
+    """
+    settings = resolve_settings(settings, language)
+    if settings.language not in config.SUPPORTED_LANGUAGES:
+        raise ValueError(f"Unsupported language: {settings.language}")
+    settings = settings.shared()
+    agent_set = _agent_sets.get(settings)
+    if agent_set is None:
+        with _agent_sets_lock:
+            agent_set = _agent_sets.get(settings)
+            if agent_set is None:
+                agent_set = _agent_sets[settings] = build_agent_set(settings)
+    return agent_set
+
+
+def prewarm(languages: Optional[List[str]] = None, settings: Settings = None) -> Dict[str, LanguagePack]:
+    """Build and warm the packs and agent sets for the given (default: all supported) languages"""
+    packs = {}
+    for language in languages or config.SUPPORTED_LANGUAGES:
+        language_settings = resolve_settings(settings, language)
+        packs[language] = get_language_pack(language, language_settings).warm()
+        get_agent_set(settings=language_settings)
+        print(f"🔥 Pre-warmed language pack: {language}")
+    return packs
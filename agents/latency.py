@@ -0,0 +1,196 @@
+"""
+Per-stage latency instrumentation
+
+SimplifiedChatbot.chat의 각 단계(컨텍스트 구성, intent, planning, 에이전트, 최종 응답)와
+LLM 호출(레이트 리미터 대기 시간 vs 네트워크 시간)을 monotonic clock으로 측정하여
+(stage, model, language, error)별 HDR 스타일 히스토그램으로 집계합니다. 실패한 호출은 예외 타입이 error 태그로 붙습니다.
+Prometheus 텍스트 파일 또는 JSON 스냅샷으로 내보낼 수 있습니다.
+"""
+import os
+import json
+import math
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Tuple
+
+
+class LatencyHistogram:
+    """HDR-style histogram: values bucketed to a fixed number of significant digits"""
+
+    def __init__(self, significant_digits: int = 2):
+        self.significant_digits = significant_digits
+        self.buckets: Dict[int, int] = {}  # bucket upper bound (µs) → count
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def _bucket(self, value_us: int) -> int:
+        if value_us <= 0:
+            return 0
+        magnitude = int(math.floor(math.log10(value_us)))
+        scale = 10 ** max(0, magnitude - self.significant_digits + 1)
+        return int(math.ceil(value_us / scale) * scale)
+
+    def record(self, seconds: float):
+        value_us = int(seconds * 1_000_000)
+        bucket = self._bucket(value_us)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total_us += value_us
+        self.max_us = max(self.max_us, value_us)
+
+    def percentile(self, q: float) -> float:
+        """Approximate percentile in seconds (bucket upper bound)"""
+        if self.count == 0:
+            return 0.0
+        rank = max(1, int(math.ceil(q * self.count)))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(bucket, self.max_us) / 1_000_000
+        return self.max_us / 1_000_000
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum_sec": round(self.total_us / 1_000_000, 6),
+            "mean_sec": round(self.total_us / self.count / 1_000_000, 6) if self.count else 0.0,
+            "p50_sec": self.percentile(0.50),
+            "p90_sec": self.percentile(0.90),
+            "p95_sec": self.percentile(0.95),
+            "p99_sec": self.percentile(0.99),
+            "max_sec": self.max_us / 1_000_000,
+        }
+
+
+class TurnTimer:
+    """Collects the stage breakdown of a single chat turn"""
+
+    def __init__(self, recorder: "LatencyRecorder", language: str = ""):
+        self.recorder = recorder
+        self.language = language
+        self.breakdown: Dict[str, float] = {}
+        self._started = time.perf_counter()
+
+    def add(self, stage: str, seconds: float, model: str = "", error: str = ""):
+        # Failed calls get their own breakdown entry so they do not inflate the successful ones
+        key = f"{stage}_failed" if error else stage
+        self.breakdown[key] = self.breakdown.get(key, 0.0) + seconds
+        self.recorder.record(stage, seconds, model=model, language=self.language, error=error)
+
+    @contextmanager
+    def stage(self, stage: str, model: str = ""):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start, model=model)
+
+    def finish(self) -> Dict[str, float]:
+        """Record the total turn time and return the breakdown in milliseconds"""
+        total = time.perf_counter() - self._started
+        self.recorder.record("turn_total", total, language=self.language)
+        self.breakdown["turn_total"] = total
+        return {stage: round(seconds * 1000, 2) for stage, seconds in self.breakdown.items()}
+
+
+# Turn being measured in the current thread/task (LLM calls attach their timings to it)
+_current_turn: contextvars.ContextVar[Optional[TurnTimer]] = contextvars.ContextVar("current_turn", default=None)
+
+
+class LatencyRecorder:
+    """Thread-safe registry of histograms keyed by (stage, model, language, error)"""
+
+    def __init__(self, significant_digits: int = 2):
+        self.significant_digits = significant_digits
+        self._histograms: Dict[Tuple[str, str, str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float, model: str = "", language: str = "", error: str = ""):
+        key = (stage, model or "", language or "", error or "")
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram(self.significant_digits)
+            histogram.record(seconds)
+
+    @contextmanager
+    def turn(self, language: str = ""):
+        """Measure one chat turn; yields a TurnTimer visible to nested LLM calls"""
+        timer = TurnTimer(self, language)
+        token = _current_turn.set(timer)
+        try:
+            yield timer
+        finally:
+            _current_turn.reset(token)
+
+    def record_llm_call(self, model: str, queue_wait: Optional[float], network: float, error: str = ""):
+        """Record one LLM request attempt, attributed to the current turn if any
+
+        `queue_wait` is the rate-limiter wait (None without a limiter: nothing queues);
+        `error` is the exception type of a failed attempt.
+        """
+        timer = _current_turn.get()
+        add = timer.add if timer is not None else self.record
+        if queue_wait is not None:
+            add("llm_queue_wait", queue_wait, model=model, error=error)
+        add("llm_network", network, model=model, error=error)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """JSON-serializable snapshot of all histograms"""
+        with self._lock:
+            items = sorted(self._histograms.items())
+            return [
+                {"stage": stage, "model": model, "language": language, "error": error, **histogram.summary()}
+                for (stage, model, language, error), histogram in items
+            ]
+
+    def to_prometheus(self, metric_name: str = "chatbot_stage_latency_seconds") -> str:
+        """Prometheus text exposition format (summary with quantiles)"""
+        lines = [
+            f"# HELP {metric_name} Latency of SimplifiedChatbot stages and LLM calls",
+            f"# TYPE {metric_name} summary",
+        ]
+        for entry in self.snapshot():
+            labels = (f'stage="{entry["stage"]}",model="{entry["model"]}",language="{entry["language"]}",'
+                      f'error="{entry["error"]}"')
+            for quantile, key in (("0.5", "p50_sec"), ("0.9", "p90_sec"), ("0.95", "p95_sec"), ("0.99", "p99_sec")):
+                lines.append(f'{metric_name}{{{labels},quantile="{quantile}"}} {entry[key]}')
+            lines.append(f"{metric_name}_sum{{{labels}}} {entry['sum_sec']}")
+            lines.append(f"{metric_name}_count{{{labels}}} {entry['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        self._write(path, self.to_prometheus())
+
+    def write_json(self, path: str):
+        self._write(path, json.dumps(self.snapshot(), ensure_ascii=False, indent=2))
+
+    def export_configured(self):
+        """Write exports to config.LATENCY_METRICS_PROM_PATH / LATENCY_METRICS_JSON_PATH when set"""
+        from config import config
+        if config.LATENCY_METRICS_PROM_PATH:
+            self.write_prometheus(config.LATENCY_METRICS_PROM_PATH)
+        if config.LATENCY_METRICS_JSON_PATH:
+            self.write_json(config.LATENCY_METRICS_JSON_PATH)
+
+    @staticmethod
+    def _write(path: str, text: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+
+# Global latency recorder
+latency_recorder = LatencyRecorder()
@@ -1,43 +1,43 @@
 """
 Order Management Agent
 """
-import weave
-import json
 from typing import List, Dict, Any
-from datetime import datetime
 from .base import LLMClient
-from prompts.weave_prompts import prompt_manager
-from config import config
+from .tracing import weave_op
+from .language_pack import get_language_pack
+from .serialization import serialize_records
+from config import Settings, resolve_settings
 
 
 class OrderAgent:
     """Order Inquiry Agent"""
     
-    def __init__(self, llm_client: LLMClient, language: str = None):
+    def __init__(self, llm_client: LLMClient, language: str = None, settings: Settings = None):
         self.llm = llm_client
-        from prompts.weave_prompts import WeavePromptManager
-        self.language = language or config.LANGUAGE
-        # Create dedicated prompt manager for this agent
-        self.prompt_manager = WeavePromptManager()
-        self.prompt_manager.set_language(self.language)
-        
-        # Load data
-        data_path = config.get_data_path('purchase_history.json', self.language)
-        try:
-            with open(data_path, 'r', encoding='utf-8') as f:
-                self.purchase_data = json.load(f)
-        except FileNotFoundError:
-            # Fallback to Korean data if localized version doesn't exist
-            with open('data/ko/purchase_history.json', 'r', encoding='utf-8') as f:
-                self.purchase_data = json.load(f)
+        self.settings = resolve_settings(settings, language)
+        self.language = self.settings.language
+    
+    @property
+    def prompt_manager(self):
+        """Prompt manager from the shared per-language resource pack"""
+        return get_language_pack(self.language, self.settings).prompt_manager
+    
+    @property
+    def order_store(self):
+        """Shared per-language order store (dates are parsed once)"""
+        return get_language_pack(self.language, self.settings).order_store
     
-    @weave.op()
+    @property
+    def purchase_data(self) -> List[Dict[str, Any]]:
+        return self.order_store.orders
+    
+    @weave_op()
     def handle(self, user_input: str, context: List[Dict[str, Any]]) -> str:
         """주문 조회 처리"""
         
         # 주문 데이터에 경과일 정보 추가
-        raw_orders = self.purchase_data if isinstance(self.purchase_data, list) else self.purchase_data.get('orders', [])
-        orders = [self._cal_days_since_delivery(order) for order in raw_orders[:20]]
+        orders = self.order_store.enriched(limit=20, settings=self.settings.for_call())
+        order_data = serialize_records(orders, self.settings.order_data_format)
         
         # Prepare conversation context
         context_text = ""
@@ -60,53 +60,56 @@ class OrderAgent:
         # Create localized user prompt
         if self.language == "ko":
             user_prompt = f"""
-**현재 사용자 입력:** "{user_input}"
-
-## 대화 맥락
-{context_text if context_text.strip() else "(첫 대화)"}
-
-## 주문 데이터
-{json.dumps(orders, ensure_ascii=False, indent=2)}
-
 ## 작업 지시
-위 대화 맥락을 고려하여 사용자 요청에 맞는 주문 정보를 찾아서 친절하게 안내해주세요.
+아래 대화 맥락을 고려하여 사용자 요청에 맞는 주문 정보를 찾아서 친절하게 안내해주세요.
 - 이전 대화에서 언급된 조건이나 필터가 있다면 적용
 - 사용자가 참조하는 이전 정보가 있다면 연결하여 설명
-- 환불 등 액션이 필요한 정보는 설명하지 말고 주문 정보만 제공"""
-        elif self.language == "en":
-            user_prompt = f"""
-**Current user input:** "{user_input}"
+- 환불 등 액션이 필요한 정보는 설명하지 말고 주문 정보만 제공
 
-## Conversation Context
-{context_text if context_text.strip() else "(First conversation)"}
+## 주문 데이터
+{order_data}
 
-## Order Data
-{json.dumps(orders, ensure_ascii=False, indent=2)}
+## 대화 맥락
+{context_text if context_text.strip() else "(첫 대화)"}
 
+**현재 사용자 입력:** "{user_input}"
+"""
+        elif self.language == "en":
+            user_prompt = f"""
 ## Task Instructions
-Please find and kindly guide order information that matches the user request considering the above conversation context.
+Please find and kindly guide order information that matches the user request considering the conversation context below.
 - Apply conditions or filters mentioned in previous conversations if any
 - Connect and explain if there's previous information the user is referencing
 - Only provide order information without explaining actions like refunds
 
-IMPORTANT: Your response must be in English only. Do not use Korean or any other language."""
-        elif self.language == "jp":
-            user_prompt = f"""
-**現在のユーザー入力:** "{user_input}"
+IMPORTANT: Your response must be in English only. Do not use Korean or any other language.
 
-## 会話コンテキスト
-{context_text if context_text.strip() else "(初回会話)"}
+## Order Data
+{order_data}
 
-## 注文データ
-{json.dumps(orders, ensure_ascii=False, indent=2)}
+## Conversation Context
+{context_text if context_text.strip() else "(First conversation)"}
 
+**Current user input:** "{user_input}"
+"""
+        elif self.language == "jp":
+            user_prompt = f"""
 ## 作業指示
-上記の会話コンテキストを考慮してユーザーリクエストに合った注文情報を見つけて親切にご案内してください。
+以下の会話コンテキストを考慮してユーザーリクエストに合った注文情報を見つけて親切にご案内してください。
 - 以前の会話で言及された条件やフィルターがあれば適用
 - ユーザーが参照している以前の情報があれば連結して説明
 - 返品などのアクションが必要な情報は説明せず注文情報のみ提供
 
-重要: あなたの応答は日本語でのみ行ってください。韓国語や他の言語を使用してはいけません。"""
+重要: あなたの応答は日本語でのみ行ってください。韓国語や他の言語を使用してはいけません。
+
+## 注文データ
+{order_data}
+
+## 会話コンテキスト
+{context_text if context_text.strip() else "(初回会話)"}
+
+**現在のユーザー入力:** "{user_input}"
+"""
 
         # Add language instruction to system prompt for better enforcement
         if self.language == "en":
@@ -121,7 +124,7 @@ IMPORTANT: Your response must be in English only. Do not use Korean or any other
         
         return self.llm.chat(messages)
     
-    @weave.op()
+    @weave_op()
     def handle_with_order_info(self, user_input: str, context: List[Dict[str, Any]], test_order_info: Dict = None) -> str:
         """Handle order inquiry using test case order_info for evaluation"""
         
@@ -145,8 +148,8 @@ IMPORTANT: Your response must be in English only. Do not use Korean or any other
             enriched_order = self._cal_days_since_delivery(test_order_info)
             orders = [enriched_order]
         else:
-            raw_orders = self.purchase_data if isinstance(self.purchase_data, list) else self.purchase_data.get('orders', [])
-            orders = [self._cal_days_since_delivery(order) for order in raw_orders[:20]]
+            orders = self.order_store.enriched(limit=20, settings=self.settings.for_call())
+        order_data = serialize_records(orders, self.settings.order_data_format)
         
         # Get prompt from Weave
         system_prompt = self.prompt_manager.get_order_agent_prompt()
@@ -154,53 +157,56 @@ IMPORTANT: Your response must be in English only. Do not use Korean or any other
         # Create localized user prompt
         if self.language == "ko":
             user_prompt = f"""
-**현재 사용자 입력:** "{user_input}"
-
-## 대화 맥락
-{context_text if context_text.strip() else "(첫 대화)"}
-
-## 주문 데이터
-{json.dumps(orders, ensure_ascii=False, indent=2)}
-
 ## 작업 지시
-위 대화 맥락을 고려하여 사용자 요청에 맞는 주문 정보를 찾아서 친절하게 안내해주세요.
+아래 대화 맥락을 고려하여 사용자 요청에 맞는 주문 정보를 찾아서 친절하게 안내해주세요.
 - 이전 대화에서 언급된 조건이나 필터가 있다면 적용
 - 사용자가 참조하는 이전 정보가 있다면 연결하여 설명
-- 환불 등 액션이 필요한 정보는 설명하지 말고 주문 정보만 제공"""
-        elif self.language == "en":
-            user_prompt = f"""
-**Current user input:** "{user_input}"
+- 환불 등 액션이 필요한 정보는 설명하지 말고 주문 정보만 제공
 
-## Conversation Context
-{context_text if context_text.strip() else "(First conversation)"}
+## 주문 데이터
+{order_data}
 
-## Order Data
-{json.dumps(orders, ensure_ascii=False, indent=2)}
+## 대화 맥락
+{context_text if context_text.strip() else "(첫 대화)"}
 
+**현재 사용자 입력:** "{user_input}"
+"""
+        elif self.language == "en":
+            user_prompt = f"""
 ## Task Instructions
-Please find and kindly guide order information that matches the user request considering the above conversation context.
+Please find and kindly guide order information that matches the user request considering the conversation context below.
 - Apply conditions or filters mentioned in previous conversations if any
 - Connect and explain if there's previous information the user is referencing
 - Only provide order information without explaining actions like refunds
 
-IMPORTANT: Your response must be in English only. Do not use Korean or any other language."""
-        elif self.language == "jp":
-            user_prompt = f"""
-**現在のユーザー入力:** "{user_input}"
+IMPORTANT: Your response must be in English only. Do not use Korean or any other language.
 
-## 会話コンテキスト
-{context_text if context_text.strip() else "(初回会話)"}
+## Order Data
+{order_data}
 
-## 注文データ
-{json.dumps(orders, ensure_ascii=False, indent=2)}
+## Conversation Context
+{context_text if context_text.strip() else "(First conversation)"}
 
+**Current user input:** "{user_input}"
+"""
+        elif self.language == "jp":
+            user_prompt = f"""
 ## 作業指示
-上記の会話コンテキストを考慮してユーザーリクエストに合った注文情報を見つけて親切にご案内してください。
+以下の会話コンテキストを考慮してユーザーリクエストに合った注文情報を見つけて親切にご案内してください。
 - 以前の会話で言及された条件やフィルターがあれば適用
 - ユーザーが参照している以前の情報があれば連結して説明
 - 返品などのアクションが必要な情報は説明せず注文情報のみ提供
 
-重要: あなたの応答は日本語でのみ行ってください。韓国語や他の言語を使用してはいけません。"""
+重要: あなたの応答は日本語でのみ行ってください。韓国語や他の言語を使用してはいけません。
+
+## 注文データ
+{order_data}
+
+## 会話コンテキスト
+{context_text if context_text.strip() else "(初回会話)"}
+
+**現在のユーザー入力:** "{user_input}"
+"""
 
         messages = [
             {"role": "system", "content": system_prompt},
@@ -209,7 +215,7 @@ IMPORTANT: Your response must be in English only. Do not use Korean or any other
         
         return self.llm.chat(messages)
     
-    @weave.op()
+    @weave_op()
     def handle_with_structured_context(self, user_input: str, structured_context: str, test_order_info: Dict = None) -> str:
         """구조화된 컨텍스트를 사용한 주문 조회 처리"""
         
@@ -218,8 +224,8 @@ IMPORTANT: Your response must be in English only. Do not use Korean or any other
             enriched_order = self._cal_days_since_delivery(test_order_info)
             orders = [enriched_order]
         else:
-            raw_orders = self.purchase_data if isinstance(self.purchase_data, list) else self.purchase_data.get('orders', [])
-            orders = [self._cal_days_since_delivery(order) for order in raw_orders[:20]]
+            orders = self.order_store.enriched(limit=20, settings=self.settings.for_call())
+        order_data = serialize_records(orders, self.settings.order_data_format)
         
         # Get prompt from Weave
         system_prompt = self.prompt_manager.get_order_agent_prompt()
@@ -232,53 +238,56 @@ IMPORTANT: Your response must be in English only. Do not use Korean or any other
         # Create localized user prompt
         if self.language == "ko":
             user_prompt = f"""
-**현재 사용자 입력:** "{user_input}"
-
-## 구조화된 대화 맥락
-{structured_context if structured_context.strip() else "(첫 대화)"}
-
-## 주문 데이터
-{json.dumps(orders, ensure_ascii=False, indent=2)}
-
 ## 작업 지시
-위 구조화된 대화 맥락을 고려하여 사용자 요청에 맞는 주문 정보를 찾아서 친절하게 안내해주세요.
+아래 구조화된 대화 맥락을 고려하여 사용자 요청에 맞는 주문 정보를 찾아서 친절하게 안내해주세요.
 - 이전 에이전트 결과에서 언급된 조건이나 필터가 있다면 적용
 - 사용자가 참조하는 이전 정보가 있다면 연결하여 설명
-- 환불 등 액션이 필요한 정보는 설명하지 말고 주문 정보만 제공"""
-        elif self.language == "en":
-            user_prompt = f"""
-**Current user input:** "{user_input}"
+- 환불 등 액션이 필요한 정보는 설명하지 말고 주문 정보만 제공
 
-## Structured Conversation Context
-{structured_context if structured_context.strip() else "(First conversation)"}
+## 주문 데이터
+{order_data}
 
-## Order Data
-{json.dumps(orders, ensure_ascii=False, indent=2)}
+## 구조화된 대화 맥락
+{structured_context if structured_context.strip() else "(첫 대화)"}
 
+**현재 사용자 입력:** "{user_input}"
+"""
+        elif self.language == "en":
+            user_prompt = f"""
 ## Task Instructions
-Please find and kindly guide order information that matches the user request considering the above structured conversation context.
+Please find and kindly guide order information that matches the user request considering the structured conversation context below.
 - Apply conditions or filters mentioned in previous agent results if any
 - Connect and explain if there's previous information the user is referencing
 - Only provide order information without explaining actions like refunds
 
-IMPORTANT: Your response must be in English only. Do not use Korean or any other language."""
-        elif self.language == "jp":
-            user_prompt = f"""
-**現在のユーザー入力:** "{user_input}"
+IMPORTANT: Your response must be in English only. Do not use Korean or any other language.
 
-## 構造化された会話コンテキスト
-{structured_context if structured_context.strip() else "(初回会話)"}
+## Order Data
+{order_data}
 
-## 注文データ
-{json.dumps(orders, ensure_ascii=False, indent=2)}
+## Structured Conversation Context
+{structured_context if structured_context.strip() else "(First conversation)"}
 
+**Current user input:** "{user_input}"
+"""
+        elif self.language == "jp":
+            user_prompt = f"""
 ## 作業指示
-上記の構造化された会話コンテキストを考慮してユーザーリクエストに合った注文情報を見つけて親切にご案内してください。
+以下の構造化された会話コンテキストを考慮してユーザーリクエストに合った注文情報を見つけて親切にご案内してください。
 - 以前のエージェント結果で言及された条件やフィルターがあれば適用
 - ユーザーが参照している以前の情報があれば連結して説明
 - 返品などのアクションが必要な情報は説明せず注文情報のみ提供
 
-重要: あなたの応答は日本語でのみ行ってください。韓国語や他の言語を使用してはいけません。"""
+重要: あなたの応答は日本語でのみ行ってください。韓国語や他の言語を使用してはいけません。
+
+## 注文データ
+{order_data}
+
+## 構造化された会話コンテキスト
+{structured_context if structured_context.strip() else "(初回会話)"}
+
+**現在のユーザー入力:** "{user_input}"
+"""
 
         messages = [
             {"role": "system", "content": system_prompt},
@@ -288,11 +297,6 @@ IMPORTANT: Your response must be in English only. Do not use Korean or any other
         return self.llm.chat(messages)
     
     def _cal_days_since_delivery(self, order: Dict[str, Any]) -> Dict[str, Any]:
-        enriched_order = order.copy()
-        
-        if order.get("purchase_date"):
-            enriched_order["days_since_delivery"] = (datetime.strptime(config.CURRENT_DATE, "%Y-%m-%d") - datetime.strptime(order["purchase_date"], "%Y-%m-%d")).days
-        else:
-            enriched_order["days_since_delivery"] = None
-        
-        return enriched_order
\ No newline at end of file
+        """Add days_since_purchase / days_since_delivery / within_refund_window to a single order"""
+        from .order_store import OrderStore
+        return OrderStore.enrich_order(order, self.settings.for_call())
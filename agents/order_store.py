@@ -0,0 +1,164 @@
+"""
+Order store with precomputed date columns
+
+주문 데이터의 날짜를 한 번만 파싱하여 NumPy 일(day) 서수 배열로 보관하고,
+구매 후 경과일 / 배송 후 경과일 / 환불 기간 내 여부를 벡터 연산으로 계산합니다.
+계산 결과는 (기준일, 환불 기간) 조합별로 캐시되므로 요청마다 행 단위로 파싱하지 않으며,
+기준일이 다른 세션들이 같은 저장소를 동시에 사용해도 서로 덮어쓰지 않습니다.
+"""
+import json
+import threading
+from collections import OrderedDict
+from datetime import date
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
+import numpy as np
+from config import config, Settings, current_settings
+
+
+# Fields computed from the current date (not part of the stored order)
+DERIVED_FIELDS = ("days_since_purchase", "days_since_delivery", "within_refund_window")
+
+
+@lru_cache(maxsize=4096)
+def to_day_ordinal(value: Optional[str]) -> int:
+    """YYYY-MM-DD → proleptic Gregorian ordinal (0 when missing or unparsable)"""
+    if not value:
+        return 0
+    try:
+        return date.fromisoformat(value).toordinal()
+    except (TypeError, ValueError):
+        return 0
+
+
+class OrderStore:
+    """Orders plus vectorized elapsed-day columns for the current date"""
+    
+    MAX_CACHED_DATES = 8  # (date, refund window) combinations kept at once
+
+    def __init__(self, orders: List[Dict[str, Any]]):
+        self.orders = orders
+        self.purchase_ordinals = np.array([to_day_ordinal(o.get("purchase_date")) for o in orders], dtype=np.int64)
+        self.delivery_ordinals = np.array([to_day_ordinal(o.get("delivery_date")) for o in orders], dtype=np.int64)
+        self._index = {o.get("order_id"): i for i, o in enumerate(orders)}
+        self.version = 0  # bumped on every upsert_order()
+        # (current_date, refund_window_days) → enriched rows, most recently used last
+        self._enriched: "OrderedDict[Tuple[str, int], List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str) -> "OrderStore":
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data if isinstance(data, list) else data.get('orders', []))
+
+    @staticmethod
+    def elapsed_columns(purchase: np.ndarray, delivery: np.ndarray, today: int,
+                        refund_window_days: int = None) -> Dict[str, np.ndarray]:
+        """Elapsed days and refund-window flags for ordinal arrays (0 = missing)"""
+        if refund_window_days is None:
+            refund_window_days = config.REFUND_WINDOW_DAYS
+        has_purchase = purchase > 0
+        has_delivery = delivery > 0
+        days_since_purchase = np.where(has_purchase, today - purchase, -1)
+        days_since_delivery = np.where(has_delivery, today - delivery, -1)
+        # 배송 전/배송 중 주문은 취소 가능, 배송 완료 주문은 배송일 기준 환불 기간 적용
+        within_refund_window = np.where(has_delivery, days_since_delivery <= refund_window_days, True)
+        return {
+            "has_purchase": has_purchase,
+            "has_delivery": has_delivery,
+            "days_since_purchase": days_since_purchase,
+            "days_since_delivery": days_since_delivery,
+            "within_refund_window": within_refund_window,
+        }
+
+    @staticmethod
+    def _enrich_rows(orders: List[Dict[str, Any]], columns: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+        has_purchase = columns["has_purchase"].tolist()
+        has_delivery = columns["has_delivery"].tolist()
+        since_purchase = columns["days_since_purchase"].tolist()
+        since_delivery = columns["days_since_delivery"].tolist()
+        in_window = columns["within_refund_window"].tolist()
+        enriched = []
+        for i, order in enumerate(orders):
+            row = order.copy()
+            row["days_since_purchase"] = since_purchase[i] if has_purchase[i] else None
+            row["days_since_delivery"] = since_delivery[i] if has_delivery[i] else None
+            row["within_refund_window"] = in_window[i]
+            enriched.append(row)
+        return enriched
+
+    def _rows_for(self, settings: Settings, force: bool = False) -> Tuple[List[Dict[str, Any]], bool]:
+        key = (settings.current_date, settings.refund_window_days)
+        rows = self._enriched.get(key)
+        if rows is not None and not force:
+            return rows, False
+        with self._lock:
+            rows = self._enriched.get(key)
+            if rows is None or force:
+                columns = self.elapsed_columns(self.purchase_ordinals, self.delivery_ordinals,
+                                               to_day_ordinal(settings.current_date), settings.refund_window_days)
+                rows = self._enriched[key] = self._enrich_rows(self.orders, columns)
+                built = True
+            else:
+                built = False
+            self._enriched.move_to_end(key)
+            while len(self._enriched) > self.MAX_CACHED_DATES:
+                self._enriched.popitem(last=False)
+        return rows, built
+    
+    def refresh(self, force: bool = False, settings: Settings = None) -> bool:
+        """Build the columns for the settings' date if not cached yet; returns True when rebuilt"""
+        return self._rows_for(settings or current_settings(), force)[1]
+
+    def upsert_order(self, order: Dict[str, Any]):
+        """Replace (by order_id) or append an order; columns are rebuilt on next access"""
+        with self._lock:
+            index = self._index.get(order.get("order_id"))
+            purchase = to_day_ordinal(order.get("purchase_date"))
+            delivery = to_day_ordinal(order.get("delivery_date"))
+            if index is None:
+                self._index[order.get("order_id")] = len(self.orders)
+                self.orders.append(order)
+                self.purchase_ordinals = np.append(self.purchase_ordinals, purchase)
+                self.delivery_ordinals = np.append(self.delivery_ordinals, delivery)
+            else:
+                self.orders[index] = order
+                self.purchase_ordinals[index] = purchase
+                self.delivery_ordinals[index] = delivery
+            self.version += 1
+            self._enriched = OrderedDict()
+
+    def enriched(self, limit: int = None, settings: Settings = None) -> List[Dict[str, Any]]:
+        """Orders with elapsed-day fields for the settings' date (shared rows; do not mutate)"""
+        rows, _ = self._rows_for(settings or current_settings())
+        return rows[:limit] if limit is not None else list(rows)
+
+    @classmethod
+    def enrich_order(cls, order: Dict[str, Any], settings: Settings = None) -> Dict[str, Any]:
+        """Elapsed-day fields for an order outside the store (e.g. evaluation order_info)"""
+        settings = settings or current_settings()
+        columns = cls.elapsed_columns(
+            np.array([to_day_ordinal(order.get("purchase_date"))], dtype=np.int64),
+            np.array([to_day_ordinal(order.get("delivery_date"))], dtype=np.int64),
+            to_day_ordinal(settings.current_date),
+            settings.refund_window_days,
+        )
+        return cls._enrich_rows([order], columns)[0]
+
+
+_stores: Dict[str, OrderStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_order_store(language: str) -> OrderStore:
+    """Shared per-language store for purchase_history.json (Korean data as fallback)"""
+    with _stores_lock:
+        store = _stores.get(language)
+        if store is None:
+            try:
+                store = OrderStore.from_file(config.get_data_path('purchase_history.json', language))
+            except FileNotFoundError:
+                store = OrderStore.from_file('data/ko/purchase_history.json')
+            _stores[language] = store
+        return store
@@ -1,23 +1,23 @@
 """
 Planning Agent
 """
-import weave
 import json
 import re
 from typing import List, Dict, Any
 from .base import LLMClient
-from prompts.weave_prompts import prompt_manager
+from .tracing import weave_op
+from config import Settings, resolve_settings
 
 
 class PlanningAgent:
     """Task planning agent"""
     
-    def __init__(self, llm_client: LLMClient, language: str = None):
+    def __init__(self, llm_client: LLMClient, language: str = None, settings: Settings = None):
         self.llm = llm_client
-        from config import config
-        self.language = language or config.LANGUAGE
+        self.settings = resolve_settings(settings, language)
+        self.language = self.settings.language
     
-    @weave.op()
+    @weave_op()
     def create_plan(self, user_input: str, intent_result: Dict[str, Any], context: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Create task plan based on user intent
@@ -52,18 +52,8 @@ class PlanningAgent:
         # Create localized user prompt
         if self.language == "ko":
             user_prompt = f"""
-**현재 사용자 입력:** "{user_input}"
-
-**Intent 분석 결과:**
-- 의도: {intent_result.get('intent', 'unknown')}
-- 신뢰도: {intent_result.get('confidence', 0.0)}
-- 엔티티: {json.dumps(intent_result.get('entities', {}), ensure_ascii=False)}
-
-**대화 맥락:**
-{context_text if context_text.strip() else "(첫 대화)"}
-
 ## 작업
-위 정보를 바탕으로 사용자 요청을 완전히 처리하기 위한 단계별 실행 계획을 수립하세요.
+아래 정보를 바탕으로 사용자 요청을 완전히 처리하기 위한 단계별 실행 계획을 수립하세요.
 
 **출력 형식 (JSON만):**
 {{
@@ -82,21 +72,22 @@ class PlanningAgent:
         }}
     ],
     "expected_outcome": "기대되는 최종 결과"
-}}"""
-        elif self.language == "en":
-            user_prompt = f"""
-**Current user input:** "{user_input}"
+}}
 
-**Intent analysis result:**
-- Intent: {intent_result.get('intent', 'unknown')}
-- Confidence: {intent_result.get('confidence', 0.0)}
-- Entities: {json.dumps(intent_result.get('entities', {}), ensure_ascii=False)}
+**Intent 분석 결과:**
+- 의도: {intent_result.get('intent', 'unknown')}
+- 신뢰도: {intent_result.get('confidence', 0.0)}
+- 엔티티: {json.dumps(intent_result.get('entities', {}), ensure_ascii=False)}
 
-**Conversation context:**
-{context_text if context_text.strip() else "(First conversation)"}
+**대화 맥락:**
+{context_text if context_text.strip() else "(첫 대화)"}
 
+**현재 사용자 입력:** "{user_input}"
+"""
+        elif self.language == "en":
+            user_prompt = f"""
 ## Task
-Based on the above information, establish a step-by-step execution plan to completely process the user request.
+Based on the information below, establish a step-by-step execution plan to completely process the user request.
 
 **Output format (JSON only):**
 {{
@@ -115,21 +106,22 @@ Based on the above information, establish a step-by-step execution plan to compl
         }}
     ],
     "expected_outcome": "expected final result"
-}}"""
-        elif self.language == "jp":
-            user_prompt = f"""
-**現在のユーザー入力:** "{user_input}"
+}}
 
-**意図分析結果:**
-- 意図: {intent_result.get('intent', 'unknown')}
-- 信頼度: {intent_result.get('confidence', 0.0)}
-- エンティティ: {json.dumps(intent_result.get('entities', {}), ensure_ascii=False)}
+**Intent analysis result:**
+- Intent: {intent_result.get('intent', 'unknown')}
+- Confidence: {intent_result.get('confidence', 0.0)}
+- Entities: {json.dumps(intent_result.get('entities', {}), ensure_ascii=False)}
 
-**会話コンテキスト:**
-{context_text if context_text.strip() else "(初回会話)"}
+**Conversation context:**
+{context_text if context_text.strip() else "(First conversation)"}
 
+**Current user input:** "{user_input}"
+"""
+        elif self.language == "jp":
+            user_prompt = f"""
 ## タスク
-上記の情報に基づいて、ユーザーリクエストを完全に処理するための段階別実行計画を立ててください。
+以下の情報に基づいて、ユーザーリクエストを完全に処理するための段階別実行計画を立ててください。
 
 **出力形式 (JSONのみ):**
 {{
@@ -148,7 +140,18 @@ Based on the above information, establish a step-by-step execution plan to compl
         }}
     ],
     "expected_outcome": "期待される最終結果"
-}}"""
+}}
+
+**意図分析結果:**
+- 意図: {intent_result.get('intent', 'unknown')}
+- 信頼度: {intent_result.get('confidence', 0.0)}
+- エンティティ: {json.dumps(intent_result.get('entities', {}), ensure_ascii=False)}
+
+**会話コンテキスト:**
+{context_text if context_text.strip() else "(初回会話)"}
+
+**現在のユーザー入力:** "{user_input}"
+"""
 
         messages = [
             {"role": "system", "content": system_prompt},
@@ -254,6 +257,10 @@ Respond in accurate JSON format.""",
         
         return prompts.get(self.language, prompts["ko"])
 
+    def template_plan(self, intent: str) -> Dict[str, Any]:
+        """Intent-based plan without an LLM call (used when the turn deadline leaves no time for planning)"""
+        return self._create_fallback_plan(intent)
+
     def _create_fallback_plan(self, intent: str) -> Dict[str, Any]:
         """파싱 실패시 기본 계획 생성"""
         if intent == 'refund_inquiry':
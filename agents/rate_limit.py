@@ -0,0 +1,286 @@
+"""
+Shared RPM/TPM rate limiter for LLM calls
+
+모델별로 요청 수(RPM)와 예상 토큰 수(TPM) 두 개의 토큰 버킷을 두고, 모든 에이전트와 스코어러의 호출이
+같은 버킷에서 용량을 예약합니다. 용량이 부족하면 호출 전에 필요한 만큼만 기다리므로 버스트 부하에서도 429가 연쇄적으로 발생하지 않습니다.
+429 응답의 retry-after 값만큼 해당 모델의 모든 호출을 멈추고, 호출 후에는 실제 사용 토큰으로 예상치를 보정합니다.
+RATE_LIMITS_PATH로 한도를 지정하지 않은 모델은 제한 없이 호출하다가, 429 응답의 x-ratelimit-limit-* 헤더로 계정 한도를 알게 되면 그때부터 적용합니다.
+한도가 없는 모델에도 retry-after 정지는 적용되며, SQLite 백엔드에서는 알게 된 한도도 워커 간에 공유합니다.
+
+Backends (RATE_LIMIT_BACKEND):
+    local                       프로세스 내 스레드 간 공유 (기본값)
+    sqlite:///.cache/rl.db      같은 노드의 워커 프로세스 간 공유 (SQLite 트랜잭션으로 예약)
+    off                         제한 없음
+"""
+import os
+import sys
+import time
+import sqlite3
+import threading
+from typing import Dict, List, Any, Optional
+from config import config
+
+
+# Completion tokens assumed before the response arrives (corrected by reconcile())
+DEFAULT_COMPLETION_ESTIMATE = 256
+
+
+def estimate_tokens(messages: List[Dict[str, str]], max_tokens: int = None) -> int:
+    """Rough request size: UTF-8 bytes / 4 for the prompt (closer than chars for ko/jp) plus the completion"""
+    prompt_bytes = sum(len(str(message.get("content", "")).encode("utf-8")) for message in messages)
+    return prompt_bytes // 4 + (max_tokens or DEFAULT_COMPLETION_ESTIMATE)
+
+
+def retry_after_seconds(exc: Exception) -> Optional[float]:
+    """retry-after-ms / retry-after header of an API error, if any"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def reported_limits(exc: Exception) -> Dict[str, float]:
+    """Account limits from the x-ratelimit-limit-requests / -tokens headers of an API error, if any"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    limits = {}
+    if not headers:
+        return limits
+    for kind, header in (("rpm", "x-ratelimit-limit-requests"), ("tpm", "x-ratelimit-limit-tokens")):
+        try:
+            value = float(headers.get(header) or 0)
+        except (TypeError, ValueError):
+            continue
+        if value > 0:
+            limits[kind] = value
+    return limits
+
+
+RETRYABLE_STATUS = (408, 409, 429)
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Rate limits, timeouts, connection errors and 5xx responses"""
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    openai = sys.modules.get("openai")
+    return openai is not None and isinstance(exc, openai.APIConnectionError)  # includes APITimeoutError
+
+
+def is_rate_limited(exc: Exception) -> bool:
+    return getattr(exc, "status_code", None) == 429
+
+
+def _apply(state: Dict[str, float], limits: Dict[str, float], now: float, tokens: float) -> float:
+    """Refill both buckets, reserve one request and `tokens`, and return the seconds to wait
+
+    Buckets may go negative (a reservation); the wait is the time until every bucket is back at zero.
+    """
+    burst = config.RATE_LIMIT_BURST
+    elapsed = max(0.0, now - state["updated_at"])
+    wait = max(0.0, state["blocked_until"] - now)
+    for kind, amount, limit in (("requests", 1, limits.get("rpm")), ("tokens", tokens, limits.get("tpm"))):
+        if not limit:
+            continue
+        rate = limit / 60.0
+        capacity = max(amount, limit * burst)
+        state[kind] = min(capacity, state[kind] + elapsed * rate) - amount
+        if state[kind] < 0:
+            wait = max(wait, -state[kind] / rate)
+    state["updated_at"] = now
+    return wait
+
+
+def _initial_state(limits: Dict[str, float], now: float) -> Dict[str, float]:
+    burst = config.RATE_LIMIT_BURST
+    return {
+        "requests": (limits.get("rpm") or 0) * burst,
+        "tokens": (limits.get("tpm") or 0) * burst,
+        "updated_at": now,
+        "blocked_until": 0.0,
+    }
+
+
+class RateLimiter:
+    """Per-model RPM/TPM token buckets shared by the threads of this process"""
+
+    def __init__(self, limits: Dict[str, Dict[str, float]] = None):
+        self.limits = limits if limits is not None else config.RATE_LIMITS
+        self.learned: Dict[str, Dict[str, float]] = {}  # from 429 headers, for models without configured limits
+        self._lock = threading.Lock()
+        self._states: Dict[str, Dict[str, float]] = {}
+        self.counters = {"acquired": 0, "delayed": 0, "wait_sec": 0.0, "throttled": 0, "rejected": 0}
+
+    def limits_for(self, model: str) -> Optional[Dict[str, float]]:
+        return self.limits.get(model) or self.learned.get(model) or self.limits.get("default")
+
+    def _reserve(self, model: str, limits: Dict[str, float], tokens: float) -> float:
+        with self._lock:
+            now = time.time()
+            state = self._states.setdefault(model, _initial_state(limits, now))
+            return _apply(state, limits, now, tokens)
+
+    def _adjust(self, model: str, limits: Dict[str, float], tokens: float = 0.0, blocked_until: float = 0.0,
+                requests: float = 0.0):
+        with self._lock:
+            state = self._states.setdefault(model, _initial_state(limits, time.time()))
+            state["tokens"] -= tokens
+            state["requests"] -= requests
+            if blocked_until > state["blocked_until"]:
+                state["blocked_until"] = blocked_until
+                # Drop the remaining burst so requests resume at the steady rate
+                state["requests"] = min(state["requests"], 0.0)
+                state["tokens"] = min(state["tokens"], 0.0)
+
+    def acquire(self, model: str, tokens: int, max_wait: float = None) -> float:
+        """Reserve capacity for one call and sleep until it is available; returns the wait needed
+
+        When the wait would exceed `max_wait`, the reservation is given back and nothing sleeps, so the caller
+        can give up at once (compare the returned wait with `max_wait`).
+        """
+        # Without limits the bucket still enforces a 429's retry-after pause
+        limits = self.limits_for(model) or {}
+        wait = self._reserve(model, limits, tokens)
+        if max_wait is not None and wait > max_wait:
+            self._adjust(model, limits, tokens=-tokens, requests=-1)
+            with self._lock:
+                self.counters["rejected"] += 1
+            return wait
+        with self._lock:
+            self.counters["acquired"] += 1
+            if wait > 0:
+                self.counters["delayed"] += 1
+                self.counters["wait_sec"] += wait
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def reconcile(self, model: str, estimated: int, actual: int):
+        """Charge (or refund) the difference between the estimated and the reported token count"""
+        limits = self.limits_for(model)
+        if limits and actual:
+            self._adjust(model, limits, tokens=actual - estimated)
+
+    def throttle(self, model: str, seconds: float, reported: Dict[str, float] = None):
+        """Pause every caller of `model` (all processes for shared backends) after a 429
+
+        `reported` limits (see reported_limits()) are adopted for models without configured limits.
+        """
+        with self._lock:
+            self.counters["throttled"] += 1
+            learn = bool(reported) and not self.limits.get(model) and self.learned.get(model) != reported
+        if learn:
+            self._learn(model, dict(reported))
+            print(f"⚠️  Warning: Rate limited on {model}; pacing to the reported limits {reported}")
+        limits = self.limits_for(model) or {}
+        self._adjust(model, limits, blocked_until=time.time() + seconds)
+
+    def _learn(self, model: str, limits: Dict[str, float]):
+        with self._lock:
+            self.learned[model] = limits
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.counters, "wait_sec": round(self.counters["wait_sec"], 3)}
+
+
+class SQLiteRateLimiter(RateLimiter):
+    """Buckets stored in a SQLite file so every worker process on the node shares them"""
+
+    def __init__(self, path: str, limits: Dict[str, Dict[str, float]] = None):
+        super().__init__(limits)
+        self.path = path
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS buckets (model TEXT PRIMARY KEY, requests REAL, tokens REAL, "
+            "updated_at REAL, blocked_until REAL)"
+        )
+        # Limits reported by a 429 in any worker, for models without configured limits
+        self._conn().execute("CREATE TABLE IF NOT EXISTS learned_limits (model TEXT PRIMARY KEY, rpm REAL, tpm REAL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _update(self, model: str, limits: Dict[str, float], change) -> Any:
+        """Read-modify-write one model's state in a write transaction (serialized across processes)
+
+        `change(state, now, limits)` gets the limits learned by other workers when none are known here.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            if not limits:
+                learned = conn.execute("SELECT rpm, tpm FROM learned_limits WHERE model = ?", (model,)).fetchone()
+                if learned:
+                    limits = {kind: value for kind, value in zip(("rpm", "tpm"), learned) if value}
+                    with self._lock:
+                        self.learned[model] = limits
+            row = conn.execute(
+                "SELECT requests, tokens, updated_at, blocked_until FROM buckets WHERE model = ?", (model,)
+            ).fetchone()
+            state = dict(zip(("requests", "tokens", "updated_at", "blocked_until"), row)) if row \
+                else _initial_state(limits, now)
+            result = change(state, now, limits)
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (model, requests, tokens, updated_at, blocked_until) VALUES (?, ?, ?, ?, ?)",
+                (model, state["requests"], state["tokens"], state["updated_at"], state["blocked_until"])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def _reserve(self, model: str, limits: Dict[str, float], tokens: float) -> float:
+        return self._update(model, limits, lambda state, now, limits: _apply(state, limits, now, tokens))
+
+    def _adjust(self, model: str, limits: Dict[str, float], tokens: float = 0.0, blocked_until: float = 0.0,
+                requests: float = 0.0):
+        def change(state, now, limits):
+            state["tokens"] -= tokens
+            state["requests"] -= requests
+            if blocked_until > state["blocked_until"]:
+                state["blocked_until"] = blocked_until
+                state["requests"] = min(state["requests"], 0.0)
+                state["tokens"] = min(state["tokens"], 0.0)
+        self._update(model, limits, change)
+
+    def _learn(self, model: str, limits: Dict[str, float]):
+        super()._learn(model, limits)
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO learned_limits (model, rpm, tpm) VALUES (?, ?, ?)",
+                     (model, limits.get("rpm"), limits.get("tpm")))
+
+
+def make_rate_limiter(backend: str = None) -> Optional[RateLimiter]:
+    """Rate limiter for a backend spec (default: config.RATE_LIMIT_BACKEND); None when off"""
+    backend = backend or config.RATE_LIMIT_BACKEND
+    if backend == "off":
+        return None
+    if backend == "local":
+        return RateLimiter()
+    if backend.startswith("sqlite:"):
+        path = backend[len("sqlite:///"):] if backend.startswith("sqlite:///") else backend[len("sqlite:"):]
+        return SQLiteRateLimiter(path)
+    print(f"⚠️  Warning: Unknown rate limit backend '{backend}'. Using 'local'.")
+    return RateLimiter()
+
+
+rate_limiter = make_rate_limiter()
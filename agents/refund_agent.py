@@ -1,27 +1,37 @@
 """
 Refund Management Agent
 """
-import weave
 import json
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from .base import LLMClient
-from prompts.weave_prompts import prompt_manager
+from .tracing import weave_op
+from .cascade import run_cascade
+from .language_pack import get_language_pack
+from config import Settings, resolve_settings
 
 
 class RefundAgent:
     """환불 처리 에이전트"""
     
-    def __init__(self, llm_client: LLMClient, language: str = None):
+    def __init__(self, llm_client: LLMClient, language: str = None, settings: Settings = None,
+                 cascade_llm: LLMClient = None):
         self.llm = llm_client
-        from config import config
-        from prompts.weave_prompts import WeavePromptManager
-        self.language = language or config.LANGUAGE
-        # Create dedicated prompt manager for this agent
-        self.prompt_manager = WeavePromptManager()
-        self.prompt_manager.set_language(self.language)
+        self.cascade_llm = cascade_llm  # Smaller model tried first (see agents/cascade.py)
+        self.settings = resolve_settings(settings, language)
+        self.language = self.settings.language
     
-    @weave.op()
+    @property
+    def prompt_manager(self):
+        """Prompt manager from the shared per-language resource pack"""
+        return get_language_pack(self.language, self.settings).prompt_manager
+    
+    @property
+    def refund_view(self):
+        """Precomputed policy decisions per order (shared per language)"""
+        return get_language_pack(self.language, self.settings).refund_view
+    
+    @weave_op()
     def handle(self, user_input: str, context: List[Dict[str, Any]]) -> Dict[str, Any]:
         """환불 문의 처리"""
         
@@ -46,13 +56,8 @@ class RefundAgent:
         # Create localized user prompt
         if self.language == "ko":
             user_prompt = f"""
-**현재 사용자 입력:** "{user_input}"
-
-## 대화 맥락
-{context_text if context_text.strip() else "(첫 대화)"}
-
 ## 작업 지시
-위 대화 맥락을 고려하여 사용자의 환불 요청을 처리해주세요. 
+아래 대화 맥락을 고려하여 사용자의 환불 요청을 처리해주세요. 
 응답은 다음 형식의 JSON으로 제공해주세요:
 
 {{
@@ -64,16 +69,17 @@ class RefundAgent:
     "policy_applied": ["적용된 정책 목록"]
 }}
 
-정확한 JSON 형식으로 응답해주세요."""
-        elif self.language == "en":
-            user_prompt = f"""
-**Current user input:** "{user_input}"
+정확한 JSON 형식으로 응답해주세요.
 
-## Conversation Context
-{context_text if context_text.strip() else "(First conversation)"}
+## 대화 맥락
+{context_text if context_text.strip() else "(첫 대화)"}
 
+**현재 사용자 입력:** "{user_input}"
+"""
+        elif self.language == "en":
+            user_prompt = f"""
 ## Task Instructions
-Please process the user's refund request considering the above conversation context.
+Please process the user's refund request considering the conversation context below.
 Please provide a response in the following JSON format:
 
 {{
@@ -87,16 +93,17 @@ Please provide a response in the following JSON format:
 
 Please respond in accurate JSON format.
 
-IMPORTANT: Your response must be in English only. Do not use Korean or any other language."""
-        elif self.language == "jp":
-            user_prompt = f"""
-**現在のユーザー入力:** "{user_input}"
+IMPORTANT: Your response must be in English only. Do not use Korean or any other language.
 
-## 会話コンテキスト
-{context_text if context_text.strip() else "(初回会話)"}
+## Conversation Context
+{context_text if context_text.strip() else "(First conversation)"}
 
+**Current user input:** "{user_input}"
+"""
+        elif self.language == "jp":
+            user_prompt = f"""
 ## 作業指示
-上記の会話コンテキストを考慮してユーザーの返品リクエストを処理してください。
+以下の会話コンテキストを考慮してユーザーの返品リクエストを処理してください。
 以下の形式のJSONで応答を提供してください:
 
 {{
@@ -110,7 +117,13 @@ IMPORTANT: Your response must be in English only. Do not use Korean or any other
 
 正確なJSON形式で応答してください。
 
-重要: あなたの応答は日本語でのみ行ってください。韓国語や他の言語を使用してはいけません。"""
+重要: あなたの応答は日本語でのみ行ってください。韓国語や他の言語を使用してはいけません。
+
+## 会話コンテキスト
+{context_text if context_text.strip() else "(初回会話)"}
+
+**現在のユーザー入力:** "{user_input}"
+"""
 
         # Add language instruction to system prompt for better enforcement
         if self.language == "en":
@@ -123,9 +136,10 @@ IMPORTANT: Your response must be in English only. Do not use Korean or any other
             {"role": "user", "content": user_prompt}
         ]
         
-        response = self.llm.chat(messages)
-        
-        # JSON 파싱 시도
+        return self._parse_refund_response(self.llm.chat(messages))
+    
+    def _parse_refund_response(self, response: str) -> Dict[str, Any]:
+        """Refund result from the model output (refund_possible None and reason "JSON 파싱 실패" when invalid)"""
         try:
             # JSON 코드 블록 제거
             if "```json" in response:
@@ -166,6 +180,23 @@ IMPORTANT: Your response must be in English only. Do not use Korean or any other
                 "conversational_response": response
             }
     
+    def _escalation_reason(self, result: Dict[str, Any], decision: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Why the cascade's small-model verdict should be redone by the main model"""
+        if result.get("refund_possible") is None and result.get("reason") == "JSON 파싱 실패":
+            return "invalid_json"
+        if decision is None or decision.get("refund_possible") is None:
+            return None
+        # The verdict must match the policy decision, or its defective-item variant
+        allowed = [decision] + ([decision["if_defective"]] if decision.get("if_defective") else [])
+        for expected in allowed:
+            if bool(result.get("refund_possible")) != expected["refund_possible"]:
+                continue
+            if not expected["refund_possible"]:
+                return None
+            if self._safe_convert_to_number(result.get("refund_fee")) == float(expected["refund_fee"] or 0):
+                return None
+        return "policy_conflict"
+    
     def _safe_convert_to_number(self, value) -> float:
         """값을 안전하게 숫자로 변환"""
         if isinstance(value, (int, float)):
@@ -240,23 +271,62 @@ IMPORTANT: Your response must be in English only. Do not use Korean or any other
         
         return response
     
-    @weave.op()
-    def handle_with_structured_context(self, user_input: str, structured_context: str) -> Dict[str, Any]:
+    def _format_view_section(self, decisions: List[Dict[str, Any]]) -> str:
+        """Prompt section with precomputed refund decisions (empty when no order matched)"""
+        if not decisions:
+            return ""
+        rows = "\n".join(json.dumps(decision, ensure_ascii=False, separators=(",", ":")) for decision in decisions)
+        if self.language == "en":
+            header = "## Precomputed Refund Decisions\n(From order status, category and dates only. Apply if_defective when the user reports a defect or damage.)"
+        elif self.language == "jp":
+            header = "## 事前計算された返品判断\n（注文状況・カテゴリー・日付のみに基づく。ユーザーが不良・破損を申告した場合はif_defectiveを適用）"
+        else:
+            header = "## 사전 계산된 환불 판단\n(주문 상태·카테고리·날짜 기준. 사용자가 불량/파손을 언급하면 if_defective 값을 적용)"
+        return f"{header}\n{rows}\n\n"
+    
+    def _result_from_view(self, decision: Dict[str, Any]) -> Dict[str, Any]:
+        """Refund result built from the view without an LLM call"""
+        result = {
+            "refund_possible": decision["refund_possible"],
+            "refund_fee": decision["refund_fee"] or 0,
+            "total_refund_amount": decision["total_refund_amount"],
+            "reason": decision["reason"],
+            "policy_applied": decision["policy_applied"],
+            "source": "refund_view"
+        }
+        result["conversational_response"] = self._generate_conversational_response(result)
+        result["user_response"] = result["conversational_response"]
+        return result
+    
+    def handle_from_rules(self, user_input: str, order_info: Dict = None) -> Optional[Dict[str, Any]]:
+        """Refund result computed by the refund view alone (no LLM call); None unless exactly one order matches"""
+        current_date = self.settings.for_call().current_date
+        decisions = [self.refund_view.decide(order_info, current_date)] if order_info else self.refund_view.match(user_input, current_date)
+        if len(decisions) != 1:
+            return None
+        result = self._result_from_view(decisions[0])
+        result["source"] = "refund_view_rules"
+        return result
+    
+    @weave_op()
+    def handle_with_structured_context(self, user_input: str, structured_context: str, order_info: Dict = None) -> Dict[str, Any]:
         """Handle refund inquiry with structured context"""
         
+        # 환불 판단 뷰에서 대상 주문 조회 (평가 시 order_info, 아니면 입력의 주문번호/상품명)
+        current_date = self.settings.for_call().current_date
+        decisions = [self.refund_view.decide(order_info, current_date)] if order_info else self.refund_view.match(user_input, current_date)
+        if len(decisions) == 1 and decisions[0]["conversation_independent"] and self.settings.refund_view_short_circuit:
+            return self._result_from_view(decisions[0])
+        refund_view_text = self._format_view_section(decisions)
+        
         # Get prompt from Weave (refund policy is already included)
         system_prompt = self.prompt_manager.get_refund_agent_prompt()
         
         # Create localized user prompt
         if self.language == "ko":
             user_prompt = f"""
-**현재 사용자 입력:** "{user_input}"
-
-## 구조화된 대화 맥락
-{structured_context if structured_context.strip() else "(첫 대화)"}
-
 ## 작업 지시
-위 구조화된 대화 맥락을 고려하여 사용자의 환불 요청을 처리해주세요. 
+아래 구조화된 대화 맥락을 고려하여 사용자의 환불 요청을 처리해주세요. 
 사용자의 입력과 이전 에이전트들의 결과를 적극 활용하여 정확한 환불 판단을 해주세요.
 
 응답은 다음 형식의 JSON으로 제공해주세요:
@@ -270,16 +340,17 @@ IMPORTANT: Your response must be in English only. Do not use Korean or any other
     "policy_applied": ["적용된 정책 목록"]
 }}
 
-정확한 JSON 형식으로 응답해주세요."""
-        elif self.language == "en":
-            user_prompt = f"""
-**Current user input:** "{user_input}"
+정확한 JSON 형식으로 응답해주세요.
 
-## Structured Conversation Context
-{structured_context if structured_context.strip() else "(First conversation)"}
+{refund_view_text}## 구조화된 대화 맥락
+{structured_context if structured_context.strip() else "(첫 대화)"}
 
+**현재 사용자 입력:** "{user_input}"
+"""
+        elif self.language == "en":
+            user_prompt = f"""
 ## Task Instructions
-Please process the user's refund request considering the above structured conversation context.
+Please process the user's refund request considering the structured conversation context below.
 Actively utilize the user's input and results from previous agents to make accurate refund judgments.
 
 Please provide a response in the following JSON format:
@@ -295,16 +366,17 @@ Please provide a response in the following JSON format:
 
 Please respond in accurate JSON format.
 
-IMPORTANT: Your response must be in English only. Do not use Korean or any other language."""
-        elif self.language == "jp":
-            user_prompt = f"""
-**現在のユーザー入力:** "{user_input}"
+IMPORTANT: Your response must be in English only. Do not use Korean or any other language.
 
-## 構造化された会話コンテキスト
-{structured_context if structured_context.strip() else "(初回会話)"}
+{refund_view_text}## Structured Conversation Context
+{structured_context if structured_context.strip() else "(First conversation)"}
 
+**Current user input:** "{user_input}"
+"""
+        elif self.language == "jp":
+            user_prompt = f"""
 ## 作業指示
-上記の構造化された会話コンテキストを考慮してユーザーの返品リクエストを処理してください。
+以下の構造化された会話コンテキストを考慮してユーザーの返品リクエストを処理してください。
 ユーザーの入力と以前のエージェントの結果を積極的に活用して正確な返品判断をしてください。
 
 以下の形式のJSONで応答を提供してください:
@@ -320,7 +392,13 @@ IMPORTANT: Your response must be in English only. Do not use Korean or any other
 
 正確なJSON形式で応答してください。
 
-重要: あなたの応答は日本語でのみ行ってください。韓国語や他の言語を使用してはいけません。"""
+重要: あなたの応答は日本語でのみ行ってください。韓国語や他の言語を使用してはいけません。
+
+{refund_view_text}## 構造化された会話コンテキスト
+{structured_context if structured_context.strip() else "(初回会話)"}
+
+**現在のユーザー入力:** "{user_input}"
+"""
 
         # Add language instruction to system prompt for better enforcement
         if self.language == "en":
@@ -333,45 +411,8 @@ IMPORTANT: Your response must be in English only. Do not use Korean or any other
             {"role": "user", "content": user_prompt}
         ]
         
-        response = self.llm.chat(messages)
-        
-        # JSON 파싱 시도
-        try:
-            # JSON 코드 블록 제거
-            if "```json" in response:
-                json_match = re.search(r'```json\s*(.*?)\s*```', response, re.DOTALL)
-                if json_match:
-                    response = json_match.group(1)
-            elif "```" in response:
-                json_match = re.search(r'```\s*(.*?)\s*```', response, re.DOTALL)
-                if json_match:
-                    response = json_match.group(1)
-            
-            parsed_response = json.loads(response.strip())
-            
-            # 필수 필드 확인 및 기본값 설정
-            result = {
-                "refund_possible": parsed_response.get("refund_possible", False),
-                "refund_fee": parsed_response.get("refund_fee", 0),
-                "total_refund_amount": parsed_response.get("total_refund_amount", 0),
-                "reason": parsed_response.get("reason", "환불 판단 정보 없음"),
-                "user_response": parsed_response.get("user_response", response),
-                "policy_applied": parsed_response.get("policy_applied", [])
-            }
-            
-            # 자연스러운 대화체 응답 생성
-            result["conversational_response"] = self._generate_conversational_response(result)
-            
-            return result
-            
-        except (json.JSONDecodeError, AttributeError) as e:
-            # JSON 파싱 실패시 기본 응답 구조 반환
-            return {
-                "refund_possible": None,
-                "refund_fee": 0,
-                "total_refund_amount": 0,
-                "reason": "JSON 파싱 실패",
-                "user_response": response,
-                "policy_applied": [],
-                "conversational_response": response
-            }
\ No newline at end of file
+        decision = decisions[0] if len(decisions) == 1 else None
+        return run_cascade(
+            "refund_agent", self.cascade_llm, self.llm, messages,
+            self._parse_refund_response, lambda result: self._escalation_reason(result, decision)
+        )
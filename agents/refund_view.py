@@ -0,0 +1,257 @@
+"""
+Materialized refund-eligibility view
+
+주문 상태, 카테고리, 날짜와 환불 정책만으로 결정되는 환불 가능 여부/수수료/환불 금액/사유 코드를
+주문별·언어별로 미리 계산해 두는 테이블입니다.
+주문이 바뀌면 해당 행만, 날짜가 바뀌면 날짜에 의존하는 행(배송 완료 주문)만 다시 계산합니다.
+환불 정책 설정(Settings.policy_key)마다 뷰가 하나씩 있고, 기준일별 결과는 불변 스냅샷으로 보관하므로
+기준일이 다른 세션이 동시에 조회해도 서로 영향을 주지 않습니다.
+불량품 여부처럼 대화에 따라 달라지는 판단은 if_defective 값으로 함께 제공합니다.
+"""
+import re
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+from config import Settings, current_settings, resolve_settings
+from .order_store import OrderStore, DERIVED_FIELDS, get_order_store
+
+
+# Order status groups per language (refund_policy.txt section 2)
+PRE_SHIPPING_STATUSES = {
+    "ko": {"주문접수", "결제완료", "상품준비중"},
+    "en": {"Order Received", "Payment Completed", "Product Preparation"},
+    "jp": {"注文受付", "決済完了", "商品準備中"},
+}
+IN_TRANSIT_STATUSES = {
+    "ko": {"배송중"},
+    "en": {"Shipping"},
+    "jp": {"配送中"},
+}
+DELIVERED_STATUSES = {
+    "ko": {"배송완료"},
+    "en": {"Delivered"},
+    "jp": {"配送完了"},
+}
+
+# Personal hygiene categories (non-refundable after delivery unless defective)
+HYGIENE_CATEGORIES = {
+    "ko": {"개인위생용품", "칫솔", "치약", "샴푸", "린스", "비누", "세안제", "화장품", "마스크팩", "크림", "로션",
+           "향수", "데오드란트", "면도기", "콘택트렌즈", "속옷", "양말", "마스크", "생리용품"},
+    "en": {"Personal Hygiene", "Toothbrush", "Toothpaste", "Shampoo", "Conditioner", "Soap", "Facial Cleanser",
+           "Cosmetics", "Sheet Masks", "Cream", "Lotion", "Perfume", "Deodorant", "Shaver", "Razor",
+           "Contact Lenses", "Underwear", "Socks", "Masks", "Sanitary Products"},
+    "jp": {"個人衛生用品", "歯ブラシ", "歯磨き粉", "シャンプー", "リンス", "石鹸", "洗顔料", "化粧品", "マスクパック",
+           "クリーム", "ローション", "香水", "デオドラント", "シェーバー", "カミソリ", "コンタクトレンズ", "下着",
+           "靴下", "マスク", "生理用品"},
+}
+
+# reason_code → localized reason template
+REASON_TEMPLATES = {
+    "ko": {
+        "PRE_SHIPPING_FREE": "배송 전 주문은 수수료 없이 무료 취소 가능",
+        "IN_TRANSIT_FEE": "배송중 취소 가능, 기본 환불 수수료 {fee:,} 적용 (상품 가격의 10%, 최소 {min_fee:,})",
+        "DELIVERED_WITHIN_WINDOW": "배송 완료 후 {days}일 경과로 {window}일 이내 환불 가능, 수수료 {fee:,} 적용 (상품 가격의 10%, 최소 {min_fee:,})",
+        "WINDOW_EXPIRED": "배송 완료 후 {days}일 경과로 환불 기간({window}일) 초과",
+        "HYGIENE_NON_REFUNDABLE": "배송 완료된 개인위생용품은 환불 불가 (불량/파손 시 무료 환불)",
+        "DEFECTIVE_FREE": "불량/파손 상품은 수수료 없이 무료 환불",
+        "UNKNOWN_STATUS": "주문 상태를 확인할 수 없어 환불 여부 판단 불가",
+    },
+    "en": {
+        "PRE_SHIPPING_FREE": "Free cancellation before shipping, no refund fee",
+        "IN_TRANSIT_FEE": "Cancellation during shipping allowed; basic refund fee {fee:,} applies (10% of price, minimum {min_fee:,})",
+        "DELIVERED_WITHIN_WINDOW": "Delivered {days} days ago, within the {window}-day refund period; refund fee {fee:,} applies (10% of price, minimum {min_fee:,})",
+        "WINDOW_EXPIRED": "Delivered {days} days ago, which exceeds the {window}-day refund period",
+        "HYGIENE_NON_REFUNDABLE": "Delivered personal hygiene products are non-refundable (free refund if defective/damaged)",
+        "DEFECTIVE_FREE": "Defective/damaged products are refunded free of charge",
+        "UNKNOWN_STATUS": "Order status could not be verified, so refund eligibility cannot be determined",
+    },
+    "jp": {
+        "PRE_SHIPPING_FREE": "発送前の注文は手数料なしで無料キャンセル可能",
+        "IN_TRANSIT_FEE": "配送中のキャンセルは可能、基本返品手数料{fee:,}を適用（商品価格の10%、最低{min_fee:,}）",
+        "DELIVERED_WITHIN_WINDOW": "配送完了後{days}日経過で{window}日以内のため返品可能、手数料{fee:,}を適用（商品価格の10%、最低{min_fee:,}）",
+        "WINDOW_EXPIRED": "配送完了後{days}日経過で返品期間（{window}日）を超過",
+        "HYGIENE_NON_REFUNDABLE": "配送完了した個人衛生用品は返品不可（不良・破損の場合は無料返品）",
+        "DEFECTIVE_FREE": "不良・破損商品は手数料なしで無料返品",
+        "UNKNOWN_STATUS": "注文状況を確認できないため返品可否を判断できません",
+    },
+}
+
+# reason_code → policy sections applied (refund_policy.txt numbering)
+POLICY_SECTIONS = {
+    "PRE_SHIPPING_FREE": ["2.1"],
+    "IN_TRANSIT_FEE": ["2.2", "5"],
+    "DELIVERED_WITHIN_WINDOW": ["2.3", "5"],
+    "WINDOW_EXPIRED": ["2.3", "6"],
+    "HYGIENE_NON_REFUNDABLE": ["2.3", "6"],
+    "DEFECTIVE_FREE": ["3"],
+    "UNKNOWN_STATUS": [],
+}
+
+
+def refund_fee(price: float, settings: Settings) -> int:
+    """Basic refund fee: a share of the price with a per-language minimum, never above the price"""
+    return int(min(price, max(round(price * settings.refund_fee_rate), settings.refund_min_fee)))
+
+
+def _reason(code: str, settings: Settings, **values) -> str:
+    templates = REASON_TEMPLATES.get(settings.language, REASON_TEMPLATES["ko"])
+    return templates[code].format(window=settings.refund_window_days, **values)
+
+
+def decide_refund(order: Dict[str, Any], language: str, settings: Settings = None) -> Dict[str, Any]:
+    """Policy-only refund decision for one enriched order (see OrderStore)"""
+    settings = resolve_settings(settings, language)
+    price = int(order.get("price") or 0)
+    status = order.get("delivery_status")
+    days = order.get("days_since_delivery")
+    min_fee = settings.refund_min_fee
+    fee = refund_fee(price, settings)
+
+    if status in PRE_SHIPPING_STATUSES.get(language, ()):
+        code, possible, fee_applied = "PRE_SHIPPING_FREE", True, 0
+    elif status in IN_TRANSIT_STATUSES.get(language, ()):
+        code, possible, fee_applied = "IN_TRANSIT_FEE", True, fee
+    elif status in DELIVERED_STATUSES.get(language, ()) and days is not None:
+        if order.get("category") in HYGIENE_CATEGORIES.get(language, ()):
+            code, possible, fee_applied = "HYGIENE_NON_REFUNDABLE", False, None
+        elif order.get("within_refund_window"):
+            code, possible, fee_applied = "DELIVERED_WITHIN_WINDOW", True, fee
+        else:
+            code, possible, fee_applied = "WINDOW_EXPIRED", False, None
+    else:
+        code, possible, fee_applied = "UNKNOWN_STATUS", None, None
+
+    decision = {
+        "order_id": order.get("order_id"),
+        "refund_possible": possible,
+        "refund_fee": fee_applied,
+        "total_refund_amount": price - fee_applied if fee_applied is not None else 0,
+        "reason_code": code,
+        "reason": _reason(code, settings, fee=fee, min_fee=min_fee, days=days),
+        "policy_applied": POLICY_SECTIONS[code],
+        # 배송 전/배송 중 판단은 대화 내용(불량 여부 등)과 무관
+        "conversation_independent": code in ("PRE_SHIPPING_FREE", "IN_TRANSIT_FEE"),
+    }
+    if code in ("DELIVERED_WITHIN_WINDOW", "HYGIENE_NON_REFUNDABLE", "WINDOW_EXPIRED"):
+        decision["if_defective"] = {
+            "refund_possible": True,
+            "refund_fee": 0,
+            "total_refund_amount": price,
+            "reason_code": "DEFECTIVE_FREE",
+            "reason": _reason("DEFECTIVE_FREE", settings),
+        }
+    return decision
+
+
+def _fingerprint(order: Dict[str, Any]) -> str:
+    """Hash of the stored order fields (date-derived fields excluded)"""
+    stored = {key: value for key, value in order.items() if key not in DERIVED_FIELDS}
+    encoded = json.dumps(stored, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class _Snapshot:
+    """Decisions for one date and store version (never mutated after publication)"""
+    __slots__ = ("current_date", "store_version", "rows", "fingerprints")
+
+    def __init__(self, current_date: str, store_version: int, rows: Dict[str, Dict[str, Any]], fingerprints: Dict[str, str]):
+        self.current_date = current_date
+        self.store_version = store_version
+        self.rows = rows
+        self.fingerprints = fingerprints
+
+
+class RefundEligibilityView:
+    """Per-order refund decisions for one language and refund policy, kept in sync with an OrderStore"""
+
+    MAX_CACHED_DATES = 8
+
+    def __init__(self, store: OrderStore, language: str, settings: Settings = None):
+        self.store = store
+        self.language = language
+        self.settings = resolve_settings(settings, language)  # policy fields only; dates come per call
+        self._snapshots: "OrderedDict[str, _Snapshot]" = OrderedDict()
+        self._latest: Optional[_Snapshot] = None
+        self._lock = threading.Lock()
+        self.stats = {"full_builds": 0, "rows_recomputed": 0}
+
+    def _snapshot(self, current_date: str = None) -> Tuple[_Snapshot, int]:
+        current_date = current_date or current_settings().current_date
+        snapshot = self._snapshots.get(current_date)
+        if snapshot is not None and snapshot.store_version == self.store.version:
+            return snapshot, 0
+        with self._lock:
+            snapshot = self._snapshots.get(current_date)
+            store_version = self.store.version
+            if snapshot is not None and snapshot.store_version == store_version:
+                return snapshot, 0
+            # 같은 날짜의 이전 스냅샷, 없으면 가장 최근 스냅샷에서 바뀐 행만 다시 계산
+            base = snapshot or self._latest
+            if base is None:
+                self.stats["full_builds"] += 1
+            date_changed = base is None or base.current_date != current_date
+            settings = self.settings.replace(current_date=current_date)
+            rows, fingerprints = {}, {}
+            recomputed = 0
+            for order in self.store.enriched(settings=settings):
+                order_id = order.get("order_id")
+                fingerprint = _fingerprint(order)
+                depends_on_date = order.get("delivery_status") in DELIVERED_STATUSES.get(self.language, ())
+                if base is not None and base.fingerprints.get(order_id) == fingerprint and not (date_changed and depends_on_date):
+                    rows[order_id] = base.rows[order_id]
+                else:
+                    rows[order_id] = decide_refund(order, self.language, settings)
+                    recomputed += 1
+                fingerprints[order_id] = fingerprint
+            snapshot = self._latest = self._snapshots[current_date] = _Snapshot(current_date, store_version, rows, fingerprints)
+            self._snapshots.move_to_end(current_date)
+            while len(self._snapshots) > self.MAX_CACHED_DATES:
+                self._snapshots.popitem(last=False)
+            self.stats["rows_recomputed"] += recomputed
+            return snapshot, recomputed
+
+    def refresh(self, current_date: str = None) -> int:
+        """Recompute changed rows (and date-dependent rows for a new date); returns rows recomputed"""
+        return self._snapshot(current_date)[1]
+
+    def lookup(self, order_id: str, current_date: str = None) -> Optional[Dict[str, Any]]:
+        """Precomputed decision for an order in the store"""
+        return self._snapshot(current_date)[0].rows.get(order_id)
+
+    def decide(self, order: Dict[str, Any], current_date: str = None) -> Dict[str, Any]:
+        """Precomputed decision when the order matches the store row, else computed on the fly"""
+        snapshot, _ = self._snapshot(current_date)
+        order_id = order.get("order_id")
+        if order_id in snapshot.rows and snapshot.fingerprints.get(order_id) == _fingerprint(order):
+            return snapshot.rows[order_id]
+        settings = self.settings.replace(current_date=snapshot.current_date)
+        return decide_refund(OrderStore.enrich_order(order, settings), self.language, settings)
+
+    def match(self, text: str, current_date: str = None) -> List[Dict[str, Any]]:
+        """Orders referenced in text by order ID, or else by product name"""
+        rows = self._snapshot(current_date)[0].rows
+        order_ids = set(re.findall(r"ORD\d+", text or ""))
+        if order_ids:
+            return [rows[order_id] for order_id in order_ids if order_id in rows]
+        lowered = (text or "").lower()
+        return [
+            rows[order["order_id"]]
+            for order in self.store.orders
+            if order.get("product_name") and order["product_name"].lower() in lowered and order.get("order_id") in rows
+        ]
+
+
+_views: Dict[tuple, RefundEligibilityView] = {}
+_views_lock = threading.Lock()
+
+
+def get_refund_view(language: str, settings: Settings = None) -> RefundEligibilityView:
+    """Shared view over get_order_store(language) per refund policy (Settings.policy_key)"""
+    settings = resolve_settings(settings, language)
+    with _views_lock:
+        view = _views.get(settings.policy_key)
+        if view is None:
+            view = _views[settings.policy_key] = RefundEligibilityView(get_order_store(language), language, settings)
+        return view
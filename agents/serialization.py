@@ -0,0 +1,101 @@
+"""
+Tabular payload serializers for prompts
+
+주문 목록처럼 같은 키를 가진 레코드 목록을 프롬프트에 넣을 때 사용할 인코딩입니다.
+indent=2 JSON은 레코드마다 키 이름과 공백을 반복하므로, 헤더를 한 번만 쓰는 인코딩으로
+프롬프트 토큰을 줄일 수 있습니다. 인코딩은 Settings.order_data_format (기본값 ORDER_DATA_FORMAT)으로 선택합니다.
+"""
+import json
+from typing import Callable, Dict, List, Any
+
+
+# encoding name → serializer(records) -> str
+SERIALIZERS: Dict[str, Callable[[List[Dict[str, Any]]], str]] = {}
+
+
+def register_serializer(name: str):
+    """Decorator registering a serializer under an encoding name"""
+    def decorator(func: Callable[[List[Dict[str, Any]]], str]):
+        SERIALIZERS[name] = func
+        return func
+    return decorator
+
+
+def _columns(records: List[Dict[str, Any]]) -> List[str]:
+    """Union of keys in first-seen order (records may have missing or extra keys)"""
+    columns: List[str] = []
+    for record in records:
+        for key in record:
+            if key not in columns:
+                columns.append(key)
+    return columns
+
+
+def _cell(value: Any) -> str:
+    """Single-line text for a table cell (null → empty)"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return " ".join(str(value).split())
+
+
+@register_serializer("json_pretty")
+def to_json_pretty(records: List[Dict[str, Any]]) -> str:
+    """Indented JSON (original prompt format)"""
+    return json.dumps(records, ensure_ascii=False, indent=2)
+
+
+@register_serializer("json_compact")
+def to_json_compact(records: List[Dict[str, Any]]) -> str:
+    """One JSON object per line without indentation"""
+    return "[\n" + ",\n".join(json.dumps(record, ensure_ascii=False, separators=(",", ":")) for record in records) + "\n]"
+
+
+@register_serializer("tsv")
+def to_tsv(records: List[Dict[str, Any]]) -> str:
+    """Header line once, then one tab-separated row per record (empty cell = null)"""
+    columns = _columns(records)
+    lines = ["\t".join(columns)]
+    for record in records:
+        lines.append("\t".join(_cell(record.get(column)).replace("\t", " ") for column in columns))
+    return "\n".join(lines)
+
+
+@register_serializer("markdown")
+def to_markdown(records: List[Dict[str, Any]]) -> str:
+    """Markdown table (empty cell = null)"""
+    columns = _columns(records)
+    lines = [
+        "| " + " | ".join(columns) + " |",
+        "|" + "|".join("---" for _ in columns) + "|",
+    ]
+    for record in records:
+        lines.append("| " + " | ".join(_cell(record.get(column)).replace("|", "/") for column in columns) + " |")
+    return "\n".join(lines)
+
+
+@register_serializer("columns")
+def to_columns(records: List[Dict[str, Any]]) -> str:
+    """Column dictionary: key names once, each record as a positional array"""
+    columns = _columns(records)
+    rows = [json.dumps([record.get(column) for column in columns], ensure_ascii=False, separators=(",", ":"))
+            for record in records]
+    return (
+        '{"columns":' + json.dumps(columns, ensure_ascii=False, separators=(",", ":")) + ',\n"rows":[\n'
+        + ",\n".join(rows) + "\n]}"
+    )
+
+
+def serialize_records(records: List[Dict[str, Any]], encoding: str = None) -> str:
+    """Serialize records with the given encoding (default: the current settings' order_data_format)"""
+    if encoding is None:
+        from config import current_settings
+        encoding = current_settings().order_data_format
+    serializer = SERIALIZERS.get(encoding)
+    if serializer is None:
+        print(f"⚠️  Warning: Unknown serialization format '{encoding}'. Using json_compact.")
+        serializer = SERIALIZERS["json_compact"]
+    return serializer(records)
@@ -0,0 +1,34 @@
+"""
+Lazy Weave tracing
+
+weave 패키지는 임포트 비용이 크므로, 에이전트 메서드의 @weave.op() 적용을 첫 호출 시점으로 미룹니다.
+WEAVE_INIT_DISABLED=1 (오프라인 리플레이, 로드 테스트 등)이면 weave를 임포트하지 않고 원래 함수를 호출합니다.
+"""
+import os
+import functools
+import threading
+
+
+def tracing_enabled() -> bool:
+    return os.getenv('WEAVE_INIT_DISABLED') != '1'
+
+
+def weave_op(*op_args, **op_kwargs):
+    """Drop-in for @weave.op() that imports weave and wraps the function on first call"""
+    def decorator(func):
+        traced = None
+        lock = threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            nonlocal traced
+            if not tracing_enabled():
+                return func(*args, **kwargs)
+            if traced is None:
+                with lock:
+                    if traced is None:
+                        import weave
+                        traced = weave.op(*op_args, **op_kwargs)(func)
+            return traced(*args, **kwargs)
+        return wrapper
+    return decorator
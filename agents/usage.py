@@ -0,0 +1,203 @@
+"""
+Token usage and cost accounting
+
+모든 LLM 호출의 prompt/completion/cached 토큰, 모델, 에이전트 이름, 지연 시간을 기록하고
+설정 가능한 가격표(config.MODEL_PRICES)로 비용을 계산합니다.
+턴 단위/세션 단위 원장(ledger)은 usage_scope()로 열린 범위에 자동으로 누적됩니다.
+"""
+import threading
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Any, Tuple
+from config import config
+
+
+@dataclass
+class UsageRecord:
+    """Usage of a single LLM call"""
+    agent_name: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    latency_sec: float = 0.0
+    cost_usd: float = 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def compute_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+    """Cost in USD from config.MODEL_PRICES (USD per 1M tokens)"""
+    prices = config.MODEL_PRICES.get(model)
+    if prices is None:
+        # Dated snapshots (e.g. gpt-4o-2024-08-06) fall back to the longest matching base model
+        matches = [name for name in config.MODEL_PRICES if model.startswith(name)]
+        prices = config.MODEL_PRICES[max(matches, key=len)] if matches else None
+    if prices is None:
+        return 0.0
+    uncached = max(0, prompt_tokens - cached_tokens)
+    cached_price = prices.get("cached_input", prices.get("input", 0.0))
+    cost = (
+        uncached * prices.get("input", 0.0)
+        + cached_tokens * cached_price
+        + completion_tokens * prices.get("output", 0.0)
+    )
+    return cost / 1_000_000
+
+
+class UsageLedger:
+    """Thread-safe list of usage records with per-agent/per-model aggregation"""
+
+    def __init__(self):
+        self.records: List[UsageRecord] = []
+        self.failures: List[Dict[str, str]] = []  # LLM calls that failed after all retries
+        self._lock = threading.Lock()
+
+    def add(self, record: UsageRecord):
+        with self._lock:
+            self.records.append(record)
+
+    def add_failure(self, failure: Dict[str, str]):
+        with self._lock:
+            self.failures.append(failure)
+
+    def extend(self, other: "UsageLedger"):
+        with self._lock:
+            self.records.extend(other.records)
+            self.failures.extend(other.failures)
+
+    @staticmethod
+    def _aggregate(records: List[UsageRecord]) -> Dict[str, Any]:
+        prompt_tokens = sum(r.prompt_tokens for r in records)
+        cached_tokens = sum(r.cached_tokens for r in records)
+        return {
+            "calls": len(records),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": sum(r.completion_tokens for r in records),
+            "cached_tokens": cached_tokens,
+            # Share of prompt tokens served from the provider's prefix cache
+            "cached_token_ratio": round(cached_tokens / prompt_tokens, 4) if prompt_tokens else 0.0,
+            "total_tokens": sum(r.total_tokens for r in records),
+            "latency_sec": round(sum(r.latency_sec for r in records), 4),
+            "cost_usd": round(sum(r.cost_usd for r in records), 6),
+        }
+
+    def _group(self, records: List[UsageRecord], key_fn) -> Dict[str, Dict[str, Any]]:
+        groups: Dict[Any, List[UsageRecord]] = {}
+        for record in records:
+            groups.setdefault(key_fn(record), []).append(record)
+        return {key: self._aggregate(records) for key, records in groups.items()}
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals plus per-agent and per-model breakdowns (and failed calls, if any)"""
+        with self._lock:
+            records = list(self.records)
+            failures = list(self.failures)
+        summary = self._aggregate(records)
+        summary["failed_calls"] = len(failures)
+        if failures:
+            summary["failures"] = failures
+        summary["by_agent"] = self._group(records, lambda r: r.agent_name)
+        summary["by_model"] = self._group(records, lambda r: r.model)
+        return summary
+
+
+# Ledgers currently collecting usage in this thread/task (innermost last)
+_active_ledgers: contextvars.ContextVar[Tuple[UsageLedger, ...]] = contextvars.ContextVar("active_ledgers", default=())
+
+
+@contextmanager
+def usage_scope(ledger: UsageLedger = None):
+    """Collect every LLM call made inside the block into a ledger (nested scopes all receive it)"""
+    ledger = ledger or UsageLedger()
+    token = _active_ledgers.set(_active_ledgers.get() + (ledger,))
+    try:
+        yield ledger
+    finally:
+        _active_ledgers.reset(token)
+
+
+def active_ledgers() -> Tuple[UsageLedger, ...]:
+    """Ledgers collecting usage in the calling thread/task"""
+    return _active_ledgers.get()
+
+
+@contextmanager
+def detached_usage(ledger: UsageLedger = None):
+    """Collect LLM calls made inside the block only into a ledger, not the enclosing scopes"""
+    ledger = ledger or UsageLedger()
+    token = _active_ledgers.set((ledger,))
+    try:
+        yield ledger
+    finally:
+        _active_ledgers.reset(token)
+
+
+def split_usage(ledger: UsageLedger, shares: List[Tuple[UsageLedger, ...]]):
+    """Divide each record of a shared call evenly among `shares` (each the active ledgers of one participant)
+
+    Tokens are split as integers (the remainder goes to the first shares) and cost pro rata; every share keeps
+    the full latency. Failed calls are charged to the calling context's ledgers.
+    """
+    count = len(shares)
+    if count == 0:
+        return
+    with ledger._lock:
+        records = list(ledger.records)
+        failures = list(ledger.failures)
+
+    def part(total: int, index: int) -> int:
+        return total // count + (1 if index < total % count else 0)
+
+    for record in records:
+        for index, ledgers in enumerate(shares):
+            share = UsageRecord(
+                agent_name=record.agent_name,
+                model=record.model,
+                prompt_tokens=part(record.prompt_tokens, index),
+                completion_tokens=part(record.completion_tokens, index),
+                cached_tokens=part(record.cached_tokens, index),
+                latency_sec=record.latency_sec,
+                cost_usd=record.cost_usd / count,
+            )
+            for target in ledgers:
+                target.add(share)
+    for failure in failures:
+        for target in _active_ledgers.get():
+            target.add_failure(failure)
+
+
+def record_usage(agent_name: str, model: str, usage: Dict[str, int], latency_sec: float,
+                 price_rate: float = 1.0) -> UsageRecord:
+    """Build a usage record for one call and append it to all active ledgers
+
+    `price_rate` scales the list price (e.g. config.BATCH_PRICE_RATE for batch API calls).
+    """
+    prompt_tokens = int(usage.get("prompt_tokens", 0) or 0)
+    completion_tokens = int(usage.get("completion_tokens", 0) or 0)
+    cached_tokens = int(usage.get("cached_tokens", 0) or 0)
+    record = UsageRecord(
+        agent_name=agent_name,
+        model=model,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        cached_tokens=cached_tokens,
+        latency_sec=latency_sec,
+        cost_usd=compute_cost(model, prompt_tokens, completion_tokens, cached_tokens) * price_rate,
+    )
+    for ledger in _active_ledgers.get():
+        ledger.add(record)
+    return record
+
+
+def record_failure(agent_name: str, model: str, error: Exception):
+    """Append an LLM call that failed after all retries to all active ledgers"""
+    failure = {"agent_name": agent_name, "model": model, "error": f"{type(error).__name__}: {error}"}
+    for ledger in _active_ledgers.get():
+        ledger.add_failure(failure)
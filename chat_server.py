@@ -0,0 +1,745 @@
+#!/usr/bin/env python3
+"""
+Multi-session HTTP / WebSocket server for SimplifiedChatbot
+
+세션마다 별도의 SimplifiedChatbot(ContextManager 포함)을 두고, 대화 턴은 크기가 제한된 큐와
+워커 스레드 풀에서 처리합니다. 대화 기록은 세션 저장소(--session-store)에 기록되므로
+SQLite/Redis 저장소를 쓰면 어느 워커 프로세스든 세션을 이어받을 수 있습니다. 큐가 가득 차면 429(Retry-After)로 거절하고,
+종료 신호를 받으면 새 요청을 503으로 거절한 뒤 진행 중인 턴을 모두 끝내고(drain) 종료합니다.
+
+Endpoints:
+    POST   /v1/sessions                      {"language": "en", "current_date": "2025-09-01"} → {"session_id", ...}
+    POST   /v1/sessions/{id}/messages        {"message": "...", "order_info": {...}, "stream": false}
+                                             stream=true (또는 Accept: text/event-stream) → Server-Sent Events
+    GET    /v1/sessions/{id}                 세션 정보와 최근 대화
+    DELETE /v1/sessions/{id}
+    GET    /v1/sessions/{id}/ws              WebSocket: {"message": ...} 전송 → 이벤트 JSON 프레임 수신
+    GET    /healthz                          큐 길이, 처리 중인 턴, 세션 수, 카운터, 레이트 리미터 대기, 헤지/캐스케이드 통계
+
+Streaming events: queued → intent → plan → step (에이전트별) → degraded (마감 초과 시) → response → done (실패 시 error)
+
+사용 예:
+    python chat_server.py --port 8080 --workers 16 --queue-size 64
+    python chat_server.py --session-store redis://127.0.0.1:6379/0   # several workers behind a plain load balancer
+    curl -s -X POST localhost:8080/v1/sessions -d '{"language": "en"}'
+    curl -N -X POST localhost:8080/v1/sessions/<id>/messages -d '{"message": "Hello", "stream": true}'
+"""
+import os
+import re
+import json
+import time
+import uuid
+import base64
+import queue
+import signal
+import socket
+import struct
+import hashlib
+import argparse
+import threading
+from datetime import date
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from config import config
+from agents.latency import latency_recorder
+
+
+SESSION_PATH = re.compile(r"^/v1/sessions/([A-Za-z0-9_-]+)(/messages|/ws)?/?$")
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+TERMINAL_EVENTS = ("done", "error")
+
+
+class ServerBusy(Exception):
+    """Turn queue is full (→ 429)"""
+
+
+class ServerDraining(Exception):
+    """Server is shutting down (→ 503)"""
+
+
+class PayloadTooLarge(Exception):
+    """Request body larger than SERVER_MAX_BODY_BYTES (→ 413)"""
+
+
+class SessionBusy(Exception):
+    """A turn is already running for this session (→ 409)"""
+
+
+class Session:
+    """One conversation: its own SimplifiedChatbot and ContextManager"""
+
+    def __init__(self, session_id: str, chatbot):
+        self.session_id = session_id
+        self.chatbot = chatbot
+        self.created_at = time.time()
+        self.last_used = time.monotonic()
+        self.busy = False  # guarded by SessionManager.lock
+        self.lease: Optional[str] = None  # store lease held while a turn runs
+
+    def info(self, recent: int = 3) -> Dict[str, Any]:
+        self.chatbot.context_manager.sync()
+        turns = self.chatbot.context_manager.get_recent_turns(recent)
+        return {
+            "session_id": self.session_id,
+            "language": self.chatbot.language,
+            "current_date": self.chatbot.settings.current_date,
+            "turns": self.chatbot.context_manager.turn_count,
+            "busy": self.busy,
+            "recent": [{"user": turn.user_input, "bot": turn.bot_response, "intent": turn.intent} for turn in turns],
+            "usage": self.chatbot.session_usage.summary()
+        }
+
+
+class SessionManager:
+    """Sessions cached in memory over a shared SessionStore (any worker can resume any session)"""
+
+    def __init__(self, ttl: float = None, max_sessions: int = None, store=None):
+        from tools.session_store import make_session_store
+
+        self.ttl = config.SERVER_SESSION_TTL if ttl is None else ttl
+        self.max_sessions = max_sessions or config.SERVER_MAX_SESSIONS
+        self.store = store or make_session_store(ttl=self.ttl)
+        self.sessions: Dict[str, Session] = {}
+        self.lock = threading.Lock()
+
+    def _build(self, session_id: str, meta: Dict[str, Any]) -> Session:
+        from simple_chatbot import SimplifiedChatbot
+
+        overrides = {"current_date": meta["current_date"]} if meta.get("current_date") else {}
+        settings = config.settings(meta.get("language"), **overrides)
+        return Session(session_id, SimplifiedChatbot(settings=settings, session_store=self.store, session_id=session_id))
+
+    def _cache_locked(self, session: Session) -> Session:
+        if len(self.sessions) >= self.max_sessions:
+            self._evict_idle_locked()
+        if len(self.sessions) >= self.max_sessions:
+            raise ServerBusy("Too many sessions")
+        self.sessions[session.session_id] = session
+        return session
+
+    def create(self, language: str = None, current_date: str = None) -> Session:
+        if language is not None and (not isinstance(language, str) or language not in config.SUPPORTED_LANGUAGES):
+            raise ValueError(f"Unsupported language: {language!r}")
+        if current_date is not None:
+            if not isinstance(current_date, str):
+                raise ValueError("'current_date' must be a YYYY-MM-DD string")
+            date.fromisoformat(current_date)  # ValueError on malformed dates
+        session_id = uuid.uuid4().hex
+        session = self._build(session_id, {"language": language, "current_date": current_date})
+        with self.lock:
+            self._cache_locked(session)
+        self.store.create(session_id, {"language": session.chatbot.language, "current_date": current_date})
+        return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is not None:
+                session.last_used = time.monotonic()
+                return session
+        # Not cached in this worker: resume from the shared store (history loads lazily)
+        meta = self.store.get_meta(session_id)
+        if meta is None:
+            return None
+        session = self._build(session_id, meta)
+        with self.lock:
+            return self.sessions.get(session_id) or self._cache_locked(session)
+
+    def delete(self, session_id: str) -> bool:
+        with self.lock:
+            cached = self.sessions.pop(session_id, None) is not None
+        return self.store.delete(session_id) or cached
+
+    def acquire(self, session: Session):
+        """Mark the session as running a turn (one turn per session at a time, across workers via a store lease)"""
+        with self.lock:
+            if session.busy:
+                raise SessionBusy(session.session_id)
+            session.busy = True
+            session.last_used = time.monotonic()
+        try:
+            session.lease = self.store.acquire_lease(session.session_id, config.SESSION_LEASE_TTL)
+        except Exception:
+            self.release(session)
+            raise
+        if session.lease is None:
+            self.release(session)
+            raise SessionBusy(session.session_id)
+
+    def release(self, session: Session):
+        lease, session.lease = session.lease, None
+        if lease is not None:
+            try:
+                self.store.release_lease(session.session_id, lease)
+            except Exception as e:
+                print(f"⚠️  Warning: could not release the lease of session {session.session_id} ({e})")
+        with self.lock:
+            session.busy = False
+            session.last_used = time.monotonic()
+
+    def _evict_idle_locked(self) -> int:
+        cutoff = time.monotonic() - self.ttl
+        expired = [sid for sid, s in self.sessions.items() if not s.busy and s.last_used < cutoff]
+        for session_id in expired:
+            del self.sessions[session_id]
+        return len(expired)
+
+    def evict_idle(self) -> int:
+        """Drop idle sessions from this worker's cache and expired sessions from the store"""
+        with self.lock:
+            evicted = self._evict_idle_locked()
+        return evicted + self.store.evict_expired()
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+
+class TurnJob:
+    """A queued chat turn; progress events are delivered through `events`"""
+
+    def __init__(self, session: Session, message: str, order_info: Dict[str, Any] = None):
+        self.session = session
+        self.message = message
+        self.order_info = order_info
+        self.enqueued_at = time.perf_counter()
+        self.events: "queue.Queue[Tuple[str, Dict[str, Any]]]" = queue.Queue()
+
+    def emit(self, event: str, data: Dict[str, Any]):
+        self.events.put((event, data))
+
+    def iter_events(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        while True:
+            event, data = self.events.get()
+            yield event, data
+            if event in TERMINAL_EVENTS:
+                return
+
+
+class TurnService:
+    """Bounded turn queue processed by a fixed pool of worker threads"""
+
+    def __init__(self, sessions: SessionManager, workers: int = None, queue_size: int = None):
+        self.sessions = sessions
+        self.workers = workers or config.SERVER_WORKERS
+        self.queue: "queue.Queue[Optional[TurnJob]]" = queue.Queue(maxsize=queue_size or config.SERVER_QUEUE_SIZE)
+        self.draining = False
+        self.in_flight = 0
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self.counters = {"accepted": 0, "rejected_busy": 0, "rejected_draining": 0, "completed": 0, "failed": 0}
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"turn-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, session: Session, message: str, order_info: Dict[str, Any] = None) -> TurnJob:
+        """Queue a turn; raises ServerDraining, SessionBusy or ServerBusy"""
+        with self.lock:
+            if self.draining:
+                self.counters["rejected_draining"] += 1
+                raise ServerDraining()
+        self.sessions.acquire(session)
+        job = TurnJob(session, message, order_info)
+        try:
+            with self.lock:
+                self.queue.put_nowait(job)
+                self.in_flight += 1
+                self.counters["accepted"] += 1
+        except queue.Full:
+            self.sessions.release(session)
+            with self.lock:
+                self.counters["rejected_busy"] += 1
+            raise ServerBusy()
+        job.emit("queued", {"queue_depth": self.queue.qsize()})
+        return job
+
+    def _work(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            try:
+                self._run(job)
+            finally:
+                self.sessions.release(job.session)
+                with self.lock:
+                    self.in_flight -= 1
+                    self.idle.notify_all()
+
+    def _run(self, job: TurnJob):
+        chatbot = job.session.chatbot
+        queue_ms = (time.perf_counter() - job.enqueued_at) * 1000
+        chatbot.event_sink = job.emit
+        try:
+            response = chatbot.chat(job.message, job.order_info)
+            turn = chatbot.context_manager.conversation_history[-1]
+            job.emit("response", {
+                "session_id": job.session.session_id,
+                "response": response,
+                "intent": turn.intent,
+                "timings": turn.timings,
+                "usage": turn.usage,
+                "degraded": turn.degraded or [],
+                "queue_ms": round(queue_ms, 3)
+            })
+            job.emit("done", {})
+            with self.lock:
+                self.counters["completed"] += 1
+        except Exception as e:
+            print(f"[ERROR] Turn failed for session {job.session.session_id}: {e}")
+            job.emit("error", {"status": 500, "message": str(e)})
+            with self.lock:
+                self.counters["failed"] += 1
+        finally:
+            chatbot.event_sink = None
+
+    def drain(self, timeout: float = None) -> bool:
+        """Stop accepting turns and wait for queued/running ones; returns True when all finished"""
+        timeout = config.SERVER_DRAIN_TIMEOUT if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self.lock:
+            self.draining = True
+            while self.in_flight > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.idle.wait(remaining)
+            finished = self.in_flight == 0
+        for _ in self._threads:
+            try:
+                self.queue.put_nowait(None)
+            except queue.Full:
+                break  # workers are daemon threads; unfinished turns are abandoned at exit
+        return finished
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "status": "draining" if self.draining else "ok",
+                "queue_depth": self.queue.qsize(),
+                "queue_capacity": self.queue.maxsize,
+                "in_flight": self.in_flight,
+                "workers": self.workers,
+                **self.counters
+            }
+
+
+class WebSocket:
+    """Minimal RFC 6455 text-frame connection over the handler's socket"""
+
+    def __init__(self, rfile, wfile, connection: socket.socket, max_message: int = None):
+        self.max_message = max_message or config.SERVER_MAX_WS_MESSAGE_BYTES
+        self.rfile = rfile
+        self.wfile = wfile
+        self.connection = connection
+        self.write_lock = threading.Lock()
+        self.closed = False
+        self.idle = False  # waiting for the next client message (safe to close on drain)
+
+    @staticmethod
+    def accept_key(key: str) -> str:
+        return base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+
+    def _read_exact(self, size: int) -> bytes:
+        data = self.rfile.read(size)
+        if len(data) < size:
+            raise ConnectionError("WebSocket closed")
+        return data
+
+    def _read_frame(self) -> Tuple[int, bool, bytes]:
+        first, second = self._read_exact(2)
+        fin, opcode = bool(first & 0x80), first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", self._read_exact(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", self._read_exact(8))[0]
+        if length > self.max_message:
+            self.close(1009, "message too big")
+            raise ConnectionError(f"WebSocket frame of {length} bytes exceeds {self.max_message}")
+        mask = self._read_exact(4) if second & 0x80 else b""
+        payload = self._read_exact(length)
+        if mask:
+            payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+        return opcode, fin, payload
+
+    def receive(self) -> Optional[str]:
+        """Next text message (None once the peer closes)"""
+        fragments = []
+        size = 0
+        while True:
+            opcode, fin, payload = self._read_frame()
+            if opcode == 0x8:  # close
+                self.close()
+                return None
+            if opcode == 0x9:  # ping
+                self._send_frame(0xA, payload)
+                continue
+            if opcode == 0xA:  # pong
+                continue
+            size += len(payload)
+            if size > self.max_message:
+                self.close(1009, "message too big")
+                raise ConnectionError(f"WebSocket message exceeds {self.max_message} bytes")
+            fragments.append(payload)
+            if fin:
+                return b"".join(fragments).decode("utf-8")
+
+    def _send_frame(self, opcode: int, payload: bytes):
+        header = bytes([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header += bytes([length])
+        elif length < 65536:
+            header += bytes([126]) + struct.pack("!H", length)
+        else:
+            header += bytes([127]) + struct.pack("!Q", length)
+        with self.write_lock:
+            if self.closed and opcode != 0x8:
+                return
+            self.wfile.write(header + payload)
+            self.wfile.flush()
+
+    def send_json(self, payload: Dict[str, Any]):
+        self._send_frame(0x1, json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+    def close(self, code: int = 1000, reason: str = ""):
+        if self.closed:
+            return
+        try:
+            self._send_frame(0x8, struct.pack("!H", code) + reason.encode("utf-8"))
+        except OSError:
+            pass
+        self.closed = True
+        try:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class ChatRequestHandler(BaseHTTPRequestHandler):
+    """HTTP + WebSocket front end over SessionManager / TurnService"""
+
+    server_version = "RetailChatServer/1.0"
+
+    def log_message(self, format, *args):
+        # Per-request logs are noisy under load; counters are exposed on /healthz
+        pass
+
+    # --- helpers ---------------------------------------------------------
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Dict[str, str] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str, headers: Dict[str, str] = None):
+        self._send_json(status, {"error": {"status": status, "message": message}}, headers)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length", "0"))
+        if length < 0:
+            raise ValueError("negative Content-Length")
+        if length > config.SERVER_MAX_BODY_BYTES:
+            raise PayloadTooLarge(f"Body of {length} bytes exceeds {config.SERVER_MAX_BODY_BYTES}")
+        raw = self.rfile.read(length) if length else b"{}"
+        body = json.loads(raw.decode("utf-8") or "{}")
+        if not isinstance(body, dict):
+            raise ValueError("JSON body must be an object")
+        return body
+
+    def _session_or_404(self, session_id: str) -> Optional[Session]:
+        session = self.server.sessions.get(session_id)
+        if session is None:
+            self._send_error(404, f"Unknown session {session_id}")
+        return session
+
+    def _submit(self, session: Session, body: Dict[str, Any]) -> Tuple[Optional[TurnJob], Optional[Tuple[int, str]]]:
+        """Queue a turn, or return (status, message) for the rejection"""
+        message = body.get("message")
+        if not isinstance(message, str) or not message.strip():
+            return None, (400, "'message' must be a non-empty string")
+        if body.get("order_info") is not None and not isinstance(body["order_info"], dict):
+            return None, (400, "'order_info' must be an object")
+        try:
+            return self.server.service.submit(session, message, body.get("order_info")), None
+        except ServerDraining:
+            return None, (503, "Server is shutting down")
+        except SessionBusy:
+            return None, (409, "A turn is already in progress for this session")
+        except ServerBusy:
+            return None, (429, "Turn queue is full")
+
+    # --- routes ----------------------------------------------------------
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path.rstrip("/") == "/healthz":
+            stats = self.server.service.stats()
+            stats["sessions"] = len(self.server.sessions)
+            from agents.rate_limit import rate_limiter
+            from agents.hedging import hedger
+            if rate_limiter is not None:
+                stats["rate_limiter"] = rate_limiter.stats()
+            if config.HEDGE_ENABLED:
+                stats["hedging"] = hedger.stats()
+            if config.INTENT_BATCH_ENABLED:
+                from agents.batching import intent_batcher
+                stats["intent_batching"] = intent_batcher.stats()
+            if config.CASCADE_AGENTS:
+                from agents.cascade import cascade_stats
+                stats["cascade"] = cascade_stats.summary()
+            self._send_json(503 if stats["status"] == "draining" else 200, stats)
+            return
+        match = SESSION_PATH.match(path)
+        if not match or match.group(2) == "/messages":
+            self._send_error(404, f"Unknown path {path}")
+            return
+        session = self._session_or_404(match.group(1))
+        if session is None:
+            return
+        if match.group(2) == "/ws":
+            self._serve_websocket(session)
+        else:
+            self._send_json(200, session.info())
+
+    def do_DELETE(self):
+        match = SESSION_PATH.match(self.path.split("?", 1)[0])
+        if not match or match.group(2):
+            self._send_error(404, f"Unknown path {self.path}")
+            return
+        if self.server.sessions.delete(match.group(1)):
+            self._send_json(200, {"deleted": match.group(1)})
+        else:
+            self._send_error(404, f"Unknown session {match.group(1)}")
+
+    def do_POST(self):
+        path = self.path.split("?", 1)[0]
+        try:
+            body = self._read_json()
+        except PayloadTooLarge as e:
+            self.close_connection = True  # the unread body stays on the socket
+            self._send_error(413, str(e))
+            return
+        except ValueError as e:  # includes json.JSONDecodeError and UnicodeDecodeError
+            self._send_error(400, f"Invalid JSON body: {e}")
+            return
+
+        if path.rstrip("/") == "/v1/sessions":
+            if self.server.service.draining:
+                self._send_error(503, "Server is shutting down", {"Retry-After": str(config.SERVER_RETRY_AFTER)})
+                return
+            try:
+                session = self.server.sessions.create(body.get("language"), body.get("current_date"))
+            except ValueError as e:
+                self._send_error(400, str(e))
+                return
+            except ServerBusy as e:
+                self._send_error(429, str(e), {"Retry-After": str(config.SERVER_RETRY_AFTER)})
+                return
+            self._send_json(201, session.info())
+            return
+
+        match = SESSION_PATH.match(path)
+        if not match or match.group(2) != "/messages":
+            self._send_error(404, f"Unknown path {path}")
+            return
+        session = self._session_or_404(match.group(1))
+        if session is None:
+            return
+        job, rejection = self._submit(session, body)
+        if rejection is not None:
+            status, message = rejection
+            headers = {"Retry-After": str(config.SERVER_RETRY_AFTER)} if status in (429, 503) else None
+            self._send_error(status, message, headers)
+            return
+
+        stream = bool(body.get("stream")) or "text/event-stream" in self.headers.get("Accept", "")
+        if stream:
+            self._stream_events(job)
+            return
+        result = None
+        for event, data in job.iter_events():
+            if event == "response":
+                result = data
+            elif event == "error":
+                self._send_error(data.get("status", 500), data.get("message", "Turn failed"))
+                return
+        self._send_json(200, result)
+
+    # --- streaming -------------------------------------------------------
+    def _stream_events(self, job: TurnJob):
+        """Server-Sent Events; the turn still completes if the client goes away"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        connected = True
+        for event, data in job.iter_events():
+            if not connected:
+                continue
+            try:
+                payload = json.dumps(data, ensure_ascii=False, default=str)
+                self.wfile.write(f"event: {event}\ndata: {payload}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            except OSError:
+                connected = False
+
+    def _serve_websocket(self, session: Session):
+        key = self.headers.get("Sec-WebSocket-Key")
+        if self.headers.get("Upgrade", "").lower() != "websocket" or not key:
+            self._send_error(400, "Expected a WebSocket upgrade")
+            return
+        if self.server.service.draining:
+            self._send_error(503, "Server is shutting down", {"Retry-After": str(config.SERVER_RETRY_AFTER)})
+            return
+        self.send_response(101, "Switching Protocols")
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", WebSocket.accept_key(key))
+        self.end_headers()
+        self.wfile.flush()
+        self.close_connection = True
+
+        ws = WebSocket(self.rfile, self.wfile, self.connection)
+        self.server.track_websocket(ws, True)
+        try:
+            while not ws.closed:
+                ws.idle = True
+                text = ws.receive()
+                ws.idle = False
+                if text is None:
+                    break
+                try:
+                    body = json.loads(text)
+                    if not isinstance(body, dict):
+                        raise ValueError("message must be a JSON object")
+                except ValueError as e:
+                    ws.send_json({"event": "error", "status": 400, "message": f"Invalid JSON: {e}"})
+                    continue
+                job, rejection = self._submit(session, body)
+                if rejection is not None:
+                    ws.send_json({"event": "error", "status": rejection[0], "message": rejection[1]})
+                    continue
+                for event, data in job.iter_events():
+                    ws.send_json({"event": event, **data})
+                if self.server.service.draining:
+                    ws.close(1001, "server shutting down")
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.server.track_websocket(ws, False)
+
+
+class ChatHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer holding the session store, turn service and open WebSockets"""
+
+    daemon_threads = True
+    request_queue_size = 128  # listen() backlog; the default of 5 drops connections under bursts
+
+    def __init__(self, address: Tuple[str, int], sessions: SessionManager = None, service: TurnService = None):
+        super().__init__(address, ChatRequestHandler)
+        self.sessions = sessions or SessionManager()
+        self.service = service or TurnService(self.sessions)
+        self.websockets = set()
+        self._websockets_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def track_websocket(self, ws: WebSocket, opened: bool):
+        with self._websockets_lock:
+            if opened:
+                self.websockets.add(ws)
+            else:
+                self.websockets.discard(ws)
+
+    def start_janitor(self, interval: float = 60.0):
+        """Evict idle sessions periodically"""
+        def run():
+            while not self._stopped.wait(interval):
+                evicted = self.sessions.evict_idle()
+                if evicted:
+                    print(f"🧹 Evicted {evicted} idle sessions")
+        threading.Thread(target=run, name="session-janitor", daemon=True).start()
+
+    def drain_and_stop(self, timeout: float = None):
+        """Graceful shutdown: refuse new work, finish running turns, close WebSockets, stop serving"""
+        print("\n🛑 Draining: refusing new turns, finishing in-flight ones...")
+        with self._websockets_lock:
+            idle_sockets = [ws for ws in self.websockets if ws.idle]
+        for ws in idle_sockets:
+            ws.close(1001, "server shutting down")
+        finished = self.service.drain(timeout)
+        with self._websockets_lock:
+            remaining = list(self.websockets)
+        for ws in remaining:
+            ws.close(1001, "server shutting down")
+        print("✅ All turns finished" if finished else "⚠️ Drain timeout reached with turns still running")
+        latency_recorder.export_configured()
+        self._stopped.set()
+        self.shutdown()
+
+
+def make_server(host: str = None, port: int = None, workers: int = None, queue_size: int = None,
+                session_store: str = None) -> ChatHTTPServer:
+    """Create (but do not start serving) a chat server; port 0 picks a free port"""
+    from tools.session_store import make_session_store
+
+    sessions = SessionManager(store=make_session_store(session_store))
+    service = TurnService(sessions, workers=workers, queue_size=queue_size)
+    server = ChatHTTPServer((host or config.SERVER_HOST, config.SERVER_PORT if port is None else port), sessions, service)
+    service.start()
+    server.start_janitor()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-session HTTP/WebSocket chat server")
+    parser.add_argument("--host", default=config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=config.SERVER_WORKERS, help="Turns processed concurrently")
+    parser.add_argument("--queue-size", type=int, default=config.SERVER_QUEUE_SIZE, help="Waiting turns before 429")
+    parser.add_argument("--drain-timeout", type=float, default=config.SERVER_DRAIN_TIMEOUT)
+    parser.add_argument("--session-store", default=config.SESSION_STORE_URL,
+                        help="memory | sqlite:///sessions.db | redis://host:6379/0 (shared stores need no sticky sessions)")
+    parser.add_argument("--no-prewarm", action="store_true", help="Load language resources on first use instead")
+    args = parser.parse_args()
+
+    # Initialize Weave (skipped for offline runs, e.g. cassette replay)
+    if os.getenv('WEAVE_INIT_DISABLED') != '1':
+        import weave
+        weave.init('wandb-korea/retail-chatbot-dev')
+
+    if not args.no_prewarm:
+        from agents.language_pack import prewarm
+        prewarm()
+
+    server = make_server(args.host, args.port, args.workers, args.queue_size, args.session_store)
+
+    def handle_signal(signum, frame):
+        # shutdown() blocks until serve_forever() returns, so drain from another thread
+        threading.Thread(target=server.drain_and_stop, args=(args.drain_timeout,), daemon=True).start()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    host, port = server.server_address[:2]
+    print(f"🛍️ Chat server listening on http://{host}:{port} "
+          f"(workers={args.workers}, queue={args.queue_size}, sessions={args.session_store})")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        print(f"👋 Chat server stopped. {server.service.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,100 @@
 Configuration for LLM-based shopping mall chatbot
 """
 import os
-from typing import Optional
+import json
+import contextvars
+import dataclasses
+from contextlib import contextmanager
+from typing import Optional, Dict, Iterator
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
 
+# Default price table (USD per 1M tokens)
+DEFAULT_MODEL_PRICES: Dict[str, Dict[str, float]] = {
+    "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+    "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+}
+
+
+# Rate limits per model (requests / tokens per minute); "default" applies to unlisted models.
+# Empty: account limits differ by tier, so models are unlimited until RATE_LIMITS_PATH sets them
+# or a 429 reports them in its x-ratelimit-limit-* headers
+DEFAULT_RATE_LIMITS: Dict[str, Dict[str, float]] = {}
+
+
+def _load_model_table(defaults: Dict[str, Dict[str, float]], path_env: str, label: str) -> Dict[str, Dict[str, float]]:
+    """Default per-model table, overridden per model by the JSON file named in `path_env`"""
+    table = {model: dict(values) for model, values in defaults.items()}
+    path = os.getenv(path_env)
+    if path:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                table.update(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Warning: Failed to load {label} from {path}: {e}")
+    return table
+
+
+def _load_model_prices() -> Dict[str, Dict[str, float]]:
+    """Default price table, overridden per model by the JSON file at MODEL_PRICES_PATH"""
+    return _load_model_table(DEFAULT_MODEL_PRICES, "MODEL_PRICES_PATH", "model prices")
+
+
+@dataclasses.dataclass(frozen=True)
+class Settings:
+    """Immutable per-session / per-request settings (defaults come from Config via config.settings())"""
+    language: str
+    current_date: str
+    intent_agent_model: str
+    planning_agent_model: str
+    order_agent_model: str
+    refund_agent_model: str
+    general_agent_model: str
+    policy_compliance_model: str
+    reason_quality_model: str
+    refund_decision_model: str
+    refund_window_days: int
+    refund_fee_rate: float
+    refund_min_fee: int
+    refund_view_short_circuit: bool
+    use_local_prompts: bool
+    prompt_version: str
+    order_data_format: str
+    turn_deadline: float = 0.0  # seconds per chat turn; 0 = unbounded
+    cascade_agents: tuple = ()  # agents that try cascade_model first (agents/cascade.py)
+    cascade_model: str = "gpt-4o-mini"
+    cascade_confidence: float = 0.8  # intent confidence below this escalates to the agent's own model
+    
+    def shared(self) -> "Settings":
+        """Copy with the per-call fields (date, deadline) set to the global defaults
+
+        Key for objects shared across sessions (agent sets): sessions that differ only in their
+        date or deadline share them and pass those fields per call (see for_call).
+        """
+        return dataclasses.replace(self, current_date=Config.CURRENT_DATE, turn_deadline=Config.TURN_DEADLINE)
+    
+    def for_call(self) -> "Settings":
+        """This Settings with the per-call fields (date, deadline) of the current settings scope"""
+        current = current_settings()
+        if current.current_date == self.current_date and current.turn_deadline == self.turn_deadline:
+            return self
+        return dataclasses.replace(self, current_date=current.current_date, turn_deadline=current.turn_deadline)
+    
+    def replace(self, **changes) -> "Settings":
+        """Copy with changes (a language change also re-resolves the language's minimum refund fee)"""
+        if "language" in changes and "refund_min_fee" not in changes:
+            changes["refund_min_fee"] = Config.REFUND_MIN_FEE.get(changes["language"], self.refund_min_fee)
+        return dataclasses.replace(self, **changes)
+    
+    @property
+    def policy_key(self) -> tuple:
+        """Settings that change policy-only refund decisions (besides the date)"""
+        return (self.language, self.refund_window_days, self.refund_fee_rate, self.refund_min_fee)
+
+
 class Config:
     """Configuration class for the chatbot"""
     
@@ -16,6 +103,7 @@ class Config:
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4o")
     OPENAI_MINI_MODEL: str = os.getenv("OPENAI_MINI_MODEL", "gpt-4o-mini")  # Smaller model for tools
+    OPENAI_BASE_URL: Optional[str] = os.getenv("OPENAI_BASE_URL") or None  # e.g. local stub server
     
     # Agent-specific models
     INTENT_AGENT_MODEL: str = os.getenv("INTENT_AGENT_MODEL", "gpt-4o")
@@ -35,13 +123,138 @@ class Config:
     CURRENT_DATE: str = "2025-09-01"
     LANGUAGE: str = os.getenv("LANGUAGE", "ko")  # Default to Korean (ko, en, jp)
     SUPPORTED_LANGUAGES: list = ["ko", "en", "jp"]  # Korean, English, Japanese
+    REFUND_WINDOW_DAYS: int = 7  # Refund period after delivery (refund_policy.txt)
+    REFUND_FEE_RATE: float = 0.10  # Basic refund fee (10% of product price)
+    # Minimum refund fee per language, in the price units of data/{lang}/ (all datasets use 2,000)
+    REFUND_MIN_FEE: Dict[str, int] = {"ko": 2000, "en": 2000, "jp": 2000}
+    # Answer status-only refund decisions (pre-shipping / in-transit) from the refund view without an LLM call
+    REFUND_VIEW_SHORT_CIRCUIT: bool = os.getenv("REFUND_VIEW_SHORT_CIRCUIT", "1") == "1"
     
     # Prompt Settings
     USE_LOCAL_PROMPTS: bool = os.getenv("USE_LOCAL_PROMPTS", "1") == "1"  # Use local prompts for development
+    PROMPT_VERSION: str = os.getenv("PROMPT_VERSION", "latest")  # Weave prompt version (e.g. v3)
+    PROMPT_CACHE_TTL: float = float(os.getenv("PROMPT_CACHE_TTL", "300"))  # seconds; 0 = until explicit refresh
+    PROMPT_REFRESH_INTERVAL: float = float(os.getenv("PROMPT_REFRESH_INTERVAL", "60"))  # Weave prompts; 0 = off
+    USE_PROMPT_BUNDLE: bool = os.getenv("USE_PROMPT_BUNDLE", "1") == "1"  # Prefer the offline bundle over Weave
+    PROMPT_BUNDLE_PATH: str = os.getenv("PROMPT_BUNDLE_PATH", "prompts/prompt_bundle.json")
+    # Order data encoding in agent prompts (json_pretty | json_compact | tsv | markdown | columns)
+    ORDER_DATA_FORMAT: str = os.getenv("ORDER_DATA_FORMAT", "json_pretty")
+    
+    # Cost Accounting (USD per 1M tokens: input / cached_input / output)
+    MODEL_PRICES: Dict[str, Dict[str, float]] = _load_model_prices()
+    
+    # LLM Cassette Settings (off | record | replay)
+    LLM_CASSETTE_MODE: str = os.getenv("LLM_CASSETTE_MODE", "off")
+    LLM_CASSETTE_PATH: str = os.getenv("LLM_CASSETTE_PATH", "cassettes/llm_cassette.jsonl")
+    LLM_REPLAY_LATENCY: str = os.getenv("LLM_REPLAY_LATENCY", "0")  # seconds, or "recorded"
+    
+    # Scorer Cache Settings
+    USE_SCORER_CACHE: bool = os.getenv("USE_SCORER_CACHE", "1") == "1"
+    SCORER_CACHE_DIR: str = os.getenv("SCORER_CACHE_DIR", ".cache/scorers")
+    
+    # Evaluation Settings
+    EVAL_RESULTS_DIR: str = os.getenv("EVAL_RESULTS_DIR", "eval_results")
+    EVAL_CONCURRENCY: int = int(os.getenv("EVAL_CONCURRENCY", "4"))
+    # Turn deadline for evaluation and transcript replay (0 = unbounded): offline runs score full answers, not degraded ones
+    EVAL_TURN_DEADLINE: float = float(os.getenv("EVAL_TURN_DEADLINE", "0"))
+    # Judge scoring mode: sync (one chat-completions call per case) | batch (all judge calls of a run via the batch API)
+    EVAL_JUDGE_MODE: str = os.getenv("EVAL_JUDGE_MODE", "sync")
+    EVAL_BATCH_POLL_INTERVAL: float = float(os.getenv("EVAL_BATCH_POLL_INTERVAL", "30"))  # seconds between status checks
+    EVAL_BATCH_TIMEOUT: float = float(os.getenv("EVAL_BATCH_TIMEOUT", "86400"))  # give up (and cancel) after this many seconds
+    BATCH_PRICE_RATE: float = float(os.getenv("BATCH_PRICE_RATE", "0.5"))  # batch API price relative to synchronous calls
+    
+    # Latency Metrics Settings (export paths; empty = disabled)
+    LATENCY_METRICS_PROM_PATH: str = os.getenv("LATENCY_METRICS_PROM_PATH", "")
+    LATENCY_METRICS_JSON_PATH: str = os.getenv("LATENCY_METRICS_JSON_PATH", "")
     
-    # Retry Settings
-    MAX_RETRIES: int = 3
-    RETRY_DELAY: int = 1  # seconds
+    # Chat Server Settings (chat_server.py)
+    SERVER_HOST: str = os.getenv("SERVER_HOST", "127.0.0.1")
+    SERVER_PORT: int = int(os.getenv("SERVER_PORT", "8080"))
+    SERVER_WORKERS: int = int(os.getenv("SERVER_WORKERS", "16"))  # turns processed at the same time
+    SERVER_QUEUE_SIZE: int = int(os.getenv("SERVER_QUEUE_SIZE", "64"))  # waiting turns before 429
+    SERVER_RETRY_AFTER: int = int(os.getenv("SERVER_RETRY_AFTER", "1"))  # seconds (Retry-After on 429/503)
+    SERVER_SESSION_TTL: float = float(os.getenv("SERVER_SESSION_TTL", "1800"))  # idle seconds before eviction
+    SERVER_MAX_SESSIONS: int = int(os.getenv("SERVER_MAX_SESSIONS", "10000"))
+    SERVER_DRAIN_TIMEOUT: float = float(os.getenv("SERVER_DRAIN_TIMEOUT", "30"))  # seconds on shutdown
+    SERVER_MAX_BODY_BYTES: int = int(os.getenv("SERVER_MAX_BODY_BYTES", "65536"))  # larger HTTP bodies → 413
+    SERVER_MAX_WS_MESSAGE_BYTES: int = int(os.getenv("SERVER_MAX_WS_MESSAGE_BYTES", "65536"))  # larger messages → close 1009
+    
+    # Session Store Settings (tools/session_store.py): memory | sqlite:///sessions.db | redis://host:6379/0
+    SESSION_STORE_URL: str = os.getenv("SESSION_STORE_URL", "memory")
+    SESSION_HISTORY_TURNS: int = int(os.getenv("SESSION_HISTORY_TURNS", "6"))  # turns kept in memory / loaded per session
+    SESSION_LEASE_TTL: float = float(os.getenv("SESSION_LEASE_TTL", "120"))  # seconds a turn holds its session against other workers
+    
+    # Rate Limit Settings (agents/rate_limit.py): off | local | sqlite:///.cache/rate_limits.db
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "local")
+    RATE_LIMITS: Dict[str, Dict[str, float]] = _load_model_table(DEFAULT_RATE_LIMITS, "RATE_LIMITS_PATH", "rate limits")
+    RATE_LIMIT_BURST: float = float(os.getenv("RATE_LIMIT_BURST", "1.0"))  # bucket size as a fraction of the per-minute limit
+    
+    # Model Cascade Settings (agents/cascade.py): listed agents try CASCADE_MODEL first and escalate to their
+    # own model on invalid JSON, low confidence (intent) or a verdict that conflicts with the refund policy view
+    CASCADE_AGENTS: list = [name for name in os.getenv("CASCADE_AGENTS", "").split(",") if name]  # e.g. intent_agent,refund_agent
+    CASCADE_MODEL: str = os.getenv("CASCADE_MODEL", "gpt-4o-mini")
+    CASCADE_CONFIDENCE: float = float(os.getenv("CASCADE_CONFIDENCE", "0.8"))
+    
+    # Intent Micro-batching Settings (agents/batching.py): concurrent sessions' intent classifications with the
+    # same model and system prompt are collected for INTENT_BATCH_WINDOW_MS and sent as one numbered multi-item call
+    INTENT_BATCH_ENABLED: bool = os.getenv("INTENT_BATCH_ENABLED", "0") == "1"
+    INTENT_BATCH_WINDOW_MS: float = float(os.getenv("INTENT_BATCH_WINDOW_MS", "5"))
+    INTENT_BATCH_MAX: int = int(os.getenv("INTENT_BATCH_MAX", "16"))  # items per batched call
+    
+    # Turn Deadline Settings (agents/deadline.py): seconds per SimplifiedChatbot.chat turn; 0 = unbounded
+    TURN_DEADLINE: float = float(os.getenv("TURN_DEADLINE", "20"))
+    # Minimum time left (seconds) to attempt a stage; otherwise the turn degrades
+    # (intent → "still checking" message, planning → template plan, refund agent → refund view result)
+    DEADLINE_STAGE_MIN: Dict[str, float] = {"intent": 1.5, "planning": 1.5, "agent": 3.0}
+    
+    # Hedged Request Settings (agents/hedging.py)
+    HEDGE_ENABLED: bool = os.getenv("HEDGE_ENABLED", "0") == "1"
+    HEDGE_AGENTS: list = os.getenv("HEDGE_AGENTS", "intent_agent,planning_agent,refund_agent").split(",")
+    HEDGE_PERCENTILE: float = float(os.getenv("HEDGE_PERCENTILE", "0.95"))  # hedge once a call outlives this percentile
+    HEDGE_BUDGET: float = float(os.getenv("HEDGE_BUDGET", "0.05"))  # max duplicate requests as a fraction of calls
+    HEDGE_MIN_DELAY: float = float(os.getenv("HEDGE_MIN_DELAY", "0.2"))  # seconds
+    HEDGE_WINDOW: int = int(os.getenv("HEDGE_WINDOW", "200"))  # recent latencies per model
+    HEDGE_MIN_SAMPLES: int = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))  # no hedging until this many samples
+    HEDGE_MAX_WORKERS: int = int(os.getenv("HEDGE_MAX_WORKERS", "256"))
+    
+    # Retry Settings (LLMClient: jittered exponential backoff, honoring retry-after)
+    MAX_RETRIES: int = int(os.getenv("MAX_RETRIES", "3"))
+    RETRY_DELAY: float = float(os.getenv("RETRY_DELAY", "1"))  # seconds; backoff base
+    RETRY_MAX_DELAY: float = float(os.getenv("RETRY_MAX_DELAY", "20"))  # seconds; backoff cap
+    
+    @classmethod
+    def settings(cls, language: str = None, **overrides) -> Settings:
+        """Snapshot of the current class attributes as an immutable Settings (with overrides)"""
+        if language is None:
+            language = cls.LANGUAGE
+        elif language not in cls.SUPPORTED_LANGUAGES:
+            print(f"⚠️  Warning: Unsupported language '{language}'. Using default '{cls.LANGUAGE}'.")
+            language = cls.LANGUAGE
+        values = dict(
+            language=language,
+            current_date=cls.CURRENT_DATE,
+            intent_agent_model=cls.INTENT_AGENT_MODEL,
+            planning_agent_model=cls.PLANNING_AGENT_MODEL,
+            order_agent_model=cls.ORDER_AGENT_MODEL,
+            refund_agent_model=cls.REFUND_AGENT_MODEL,
+            general_agent_model=cls.GENERAL_AGENT_MODEL,
+            policy_compliance_model=cls.POLICY_COMPLIANCE_MODEL,
+            reason_quality_model=cls.REASON_QUALITY_MODEL,
+            refund_decision_model=cls.REFUND_DECISION_MODEL,
+            refund_window_days=cls.REFUND_WINDOW_DAYS,
+            refund_fee_rate=cls.REFUND_FEE_RATE,
+            refund_min_fee=cls.REFUND_MIN_FEE.get(language, cls.REFUND_MIN_FEE["ko"]),
+            refund_view_short_circuit=cls.REFUND_VIEW_SHORT_CIRCUIT,
+            use_local_prompts=cls.USE_LOCAL_PROMPTS,
+            prompt_version=cls.PROMPT_VERSION,
+            order_data_format=cls.ORDER_DATA_FORMAT,
+            turn_deadline=cls.TURN_DEADLINE,
+            cascade_agents=tuple(cls.CASCADE_AGENTS),
+            cascade_model=cls.CASCADE_MODEL,
+            cascade_confidence=cls.CASCADE_CONFIDENCE,
+        )
+        values.update(overrides)
+        return Settings(**values)
     
     @classmethod
     def validate(cls) -> bool:
@@ -62,7 +275,7 @@ class Config:
     
     @classmethod
     def set_language(cls, language: str) -> bool:
-        """Set the current language"""
+        """Set the process-wide default language (sessions pick theirs via SimplifiedChatbot(language=...))"""
         if language not in cls.SUPPORTED_LANGUAGES:
             print(f"⚠️  Warning: Unsupported language '{language}'. Using default 'ko'.")
             return False
@@ -72,3 +285,34 @@ class Config:
 
 # Create config instance
 config = Config()
+
+
+# Settings of the running session/request (see settings_scope); None → config.settings()
+_current_settings: contextvars.ContextVar[Optional[Settings]] = contextvars.ContextVar("current_settings", default=None)
+
+
+def current_settings() -> Settings:
+    """Settings of the enclosing settings_scope, or a snapshot of the global config"""
+    settings = _current_settings.get()
+    return settings if settings is not None else config.settings()
+
+
+def resolve_settings(settings: Optional[Settings] = None, language: str = None) -> Settings:
+    """Explicit settings (re-targeted to `language` if given), else the current settings for `language`"""
+    if settings is None:
+        settings = _current_settings.get()
+        if settings is None:
+            return config.settings(language=language)
+    if language and language != settings.language and language in config.SUPPORTED_LANGUAGES:
+        return settings.replace(language=language)
+    return settings
+
+
+@contextmanager
+def settings_scope(settings: Settings) -> Iterator[Settings]:
+    """Make `settings` the current settings for code that is not handed them explicitly"""
+    token = _current_settings.set(settings)
+    try:
+        yield settings
+    finally:
+        _current_settings.reset(token)
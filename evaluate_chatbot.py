@@ -1,12 +1,20 @@
+import os
 import json
+import time
 import weave
 import asyncio
-from typing import Dict, List, Any
+import argparse
+from typing import Dict, List, Any, Optional, Tuple
 from simple_chatbot import SimplifiedChatbot
 from scorers.policy_compliance_scorer import PolicyComplianceScorer
 from scorers.reason_quality_scorer import ReasonQualityScorer
 from scorers.refund_decision_scorer import RefundDecisionScorer
-from config import config
+from scorers.cache import scorer_cache
+from scorers.batch_judge import BatchJudge, BatchJudgeError
+from tools.jsonl_checkpoint import JsonlCheckpoint
+from agents.usage import usage_scope, record_usage
+from agents.latency import latency_recorder
+from config import config, Settings, current_settings, resolve_settings, settings_scope
 
 class RefundChatbotModel(weave.Model):
     """Refund chatbot evaluation Weave Model class with multi-language support"""
@@ -32,11 +40,14 @@ class RefundChatbotModel(weave.Model):
             # Create chatbot instance with specified language and generate response
             chatbot = SimplifiedChatbot(language=eval_language)
             response = chatbot.chat(user_query, order_info)
+            turn = chatbot.context_manager.conversation_history[-1]
             
             return {
                 "response": response,
                 "raw_response": response,
-                "language": eval_language
+                "language": eval_language,
+                "usage": chatbot.session_usage.summary(),
+                "degraded": turn.degraded
             }
         except Exception as e:
             return {
@@ -45,38 +56,48 @@ class RefundChatbotModel(weave.Model):
                 "language": eval_language
             }
 
-# Multi-language evaluation functions
+# Judge scorer behind each evaluation (judge models come from the current settings)
+JUDGE_SCORERS = {
+    "policy_compliance_evaluation": lambda: PolicyComplianceScorer(model_name=current_settings().policy_compliance_model),
+    "reasoning_performance_evaluation": lambda: ReasonQualityScorer(model_name=current_settings().reason_quality_model),
+    "refund_accuracy_evaluation": lambda: RefundDecisionScorer(model_name=current_settings().refund_decision_model),
+}
+
+# Multi-language evaluation functions (`judgment`: judge answer from a batch run)
 @weave.op()
-def policy_compliance_evaluation(target: Dict, output: Dict) -> Dict[str, Any]:
+def policy_compliance_evaluation(target: Dict, output: Dict, judgment: str = None) -> Dict[str, Any]:
     """Policy compliance evaluation - LLM-based scoring with reason"""
-    scorer = PolicyComplianceScorer()
+    scorer = JUDGE_SCORERS["policy_compliance_evaluation"]()
     language = output.get("language", "ko")
-    result = scorer.score(target, output, language)
+    result = scorer.score(target, output, language, judgment=judgment)
     return {
         "accuracy": result.get("policy_compliance", 0.0),
-        "reason": result.get("reason", "Evaluation failed")
+        "reason": result.get("reason", "Evaluation failed"),
+        "error": result.get("error")
     }
 
 @weave.op()
-def reasoning_performance_evaluation(target: Dict, output: Dict) -> Dict[str, Any]:
+def reasoning_performance_evaluation(target: Dict, output: Dict, judgment: str = None) -> Dict[str, Any]:
     """Reasoning performance evaluation - LLM-based scoring with reason"""
-    scorer = ReasonQualityScorer()
+    scorer = JUDGE_SCORERS["reasoning_performance_evaluation"]()
     language = output.get("language", "ko")
-    result = scorer.score(target, output, language)
+    result = scorer.score(target, output, language, judgment=judgment)
     return {
         "accuracy": result.get("reason_score", 0.0),
-        "reason": result.get("reason", "Evaluation failed")
+        "reason": result.get("reason", "Evaluation failed"),
+        "error": result.get("error")
     }
 
 @weave.op()
-def refund_accuracy_evaluation(target: Dict, output: Dict) -> Dict[str, Any]:
+def refund_accuracy_evaluation(target: Dict, output: Dict, judgment: str = None) -> Dict[str, Any]:
     """Refund accuracy evaluation - LLM-based evaluation (refund decision accuracy only)"""
-    scorer = RefundDecisionScorer()
+    scorer = JUDGE_SCORERS["refund_accuracy_evaluation"]()
     language = output.get("language", "ko")
-    result = scorer.score(target, output, language)
+    result = scorer.score(target, output, language, judgment=judgment)
     return {
         "accuracy": result.get("accuracy", 0.0),  # Refund eligibility accuracy
-        "reason": result.get("reason", "No evaluation result")
+        "reason": result.get("reason", "No evaluation result"),
+        "error": result.get("error")
     }
 
 def load_evaluation_dataset(language: str = "ko"):
@@ -109,11 +130,325 @@ def load_evaluation_dataset(language: str = "ko"):
     
     return examples
 
-async def main(language: str = "ko"):
+# Scorers applied to every case (name → scorer op)
+EVALUATION_SCORERS = {
+    "policy_compliance_evaluation": policy_compliance_evaluation,      # Policy compliance
+    "reasoning_performance_evaluation": reasoning_performance_evaluation,  # Reasoning performance
+    "refund_accuracy_evaluation": refund_accuracy_evaluation        # Refund accuracy
+}
+
+
+def get_checkpoint_path(language: str, checkpoint_dir: str = None) -> str:
+    """Per-language JSONL checkpoint path"""
+    return os.path.join(checkpoint_dir or config.EVAL_RESULTS_DIR, f"refund_chatbot_{language}.jsonl")
+
+
+def get_batch_path(language: str, checkpoint_dir: str = None) -> str:
+    """Per-language judge batch input file (batch judge mode)"""
+    return os.path.join(checkpoint_dir or config.EVAL_RESULTS_DIR, f"judge_batch_{language}.jsonl")
+
+
+def get_batch_state_path(batch_path: str) -> str:
+    """Submitted judge batches of an unfinished batch-mode run (reattached on --resume)"""
+    return os.path.splitext(batch_path)[0] + "_state.json"
+
+
+def predict_case(model: RefundChatbotModel, example: Dict[str, Any]) -> Tuple[Dict[str, Any], float]:
+    """Chatbot output for a single case and its latency"""
+    start = time.perf_counter()
+    output = model.predict(example["user_query"], example["order_info"], example["language"])
+    return output, time.perf_counter() - start
+
+
+def evaluate_case(model: RefundChatbotModel, example: Dict[str, Any]) -> Dict[str, Any]:
+    """Run prediction and all scorers for a single case and build its checkpoint record"""
+    output, latency = predict_case(model, example)
+    return score_case(example, output, latency)
+
+
+def prediction_error(output: Dict[str, Any]) -> Optional[str]:
+    """Why a prediction must not be scored (exception, failed LLM call, deadline-degraded turn), or None"""
+    response = str(output.get("response", ""))
+    if response.startswith("Error:"):
+        return response
+    failures = (output.get("usage") or {}).get("failures") or []
+    if failures:
+        return f"LLM call failed ({failures[0]['agent_name']}): {failures[0]['error']}"
+    if output.get("degraded"):
+        return f"Turn degraded by the deadline: {', '.join(output['degraded'])}"
+    return None
+
+
+def score_case(example: Dict[str, Any], output: Dict[str, Any], latency: float,
+               judgments: Dict[str, Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Apply all scorers to a prediction and build its checkpoint record
+
+    `judgments` holds batch results by scorer name; scorers without one call the judge synchronously.
+    Failed predictions are not scored. They and failed scorers get status "error" and are retried on --resume.
+    """
+    error = prediction_error(output)
+    scores = {}
+    with usage_scope() as judge_usage:
+        for name, scorer in EVALUATION_SCORERS.items():
+            if error is not None:
+                break
+            judgment = (judgments or {}).get(name)
+            try:
+                if judgment is None:
+                    scores[name] = scorer(example["target"], output)
+                    continue
+                record_usage(type(JUDGE_SCORERS[name]()).__name__, judgment["model"], judgment["usage"], 0.0,
+                             price_rate=config.BATCH_PRICE_RATE)
+                scores[name] = scorer(example["target"], output, judgment=judgment["content"])
+            except Exception as e:
+                scores[name] = {"accuracy": 0.0, "reason": "Evaluation failed", "error": f"{type(e).__name__}: {e}"}
+    
+    if error is None:
+        scorer_errors = [f"{name}: {score['error']}" for name, score in scores.items() if score.get("error")]
+        error = "; ".join(scorer_errors) or None
+    status = "error" if error else "ok"
+    return case_record(example, output, latency, scores, judge_usage.summary(), status, error)
+
+
+def case_record(example: Dict[str, Any], output: Dict[str, Any], latency: float, scores: Dict[str, Any],
+                judge_usage: Optional[Dict[str, Any]], status: str, error: Optional[str] = None) -> Dict[str, Any]:
+    """Checkpoint record of one case (status: ok | error | pending_judge)"""
+    return {
+        "id": example["id"],
+        "language": example["language"],
+        "scenario": example["scenario"],
+        "user_query": example["user_query"],
+        "target": example["target"],
+        "prediction": output,
+        "scores": scores,
+        "latency_sec": round(latency, 3),
+        "usage": output.get("usage"),
+        "judge_usage": judge_usage,
+        "status": status,
+        "error": error
+    }
+
+
+def start_evaluation_logger(model: RefundChatbotModel, language: str, examples: List[Dict[str, Any]]):
+    """Weave EvaluationLogger for this run (None for offline runs); cases show up in the Evals comparison view"""
+    if os.getenv('WEAVE_INIT_DISABLED') == '1':
+        return None
+    try:
+        return weave.EvaluationLogger(
+            name=f"refund_chatbot_{language}_evaluation", model=model,
+            dataset=[{key: example[key] for key in ("id", "user_query", "order_info", "target")} for example in examples],
+            scorers=list(EVALUATION_SCORERS)
+        )
+    except Exception as e:
+        print(f"⚠️ Weave evaluation logging disabled: {e}")
+        return None
+
+
+def log_case(eval_logger, example: Dict[str, Any], record: Dict[str, Any]):
+    """Log a finished case (prediction plus each scorer's result) to the Weave evaluation"""
+    if eval_logger is None or record["status"] == "pending_judge":
+        return
+    try:
+        prediction = eval_logger.log_prediction(
+            inputs={"id": example["id"], "user_query": example["user_query"], "order_info": example["order_info"],
+                    "language": example["language"]},
+            output=record["prediction"]
+        )
+        for name, score in record["scores"].items():
+            prediction.log_score(name, score)
+        prediction.finish()
+    except Exception as e:
+        print(f"⚠️ Failed to log {example['id']} to the Weave evaluation: {e}")
+
+
+def summarize_checkpoint(checkpoint: JsonlCheckpoint, case_ids: List[str] = None) -> Dict[str, Any]:
+    """Compute aggregate metrics from the checkpoint file (latest record per case)"""
+    records = checkpoint.latest_by_id()
+    if case_ids is not None:
+        records = {case_id: records[case_id] for case_id in case_ids if case_id in records}
+    completed = [r for r in records.values() if r.get("status") == "ok"]
+    
+    summary = {
+        "total_cases": len(case_ids) if case_ids is not None else len(records),
+        "completed": len(completed),
+        "failed": len(records) - len(completed),
+        "scores": {},
+        "latency_sec": {}
+    }
+    
+    for name in EVALUATION_SCORERS:
+        values = [float(r["scores"][name].get("accuracy", 0.0)) for r in completed if name in r.get("scores", {})]
+        summary["scores"][name] = {
+            "mean": round(sum(values) / len(values), 4) if values else None,
+            "count": len(values)
+        }
+    
+    latencies = sorted(r["latency_sec"] for r in completed if r.get("latency_sec") is not None)
+    if latencies:
+        summary["latency_sec"] = {
+            "mean": round(sum(latencies) / len(latencies), 3),
+            "p50": latencies[int(0.5 * (len(latencies) - 1))],
+            "p95": latencies[int(0.95 * (len(latencies) - 1))],
+            "max": latencies[-1]
+        }
+    
+    for usage_field in ("usage", "judge_usage"):
+        usage_totals = {}
+        by_agent = {}
+        for record in completed:
+            usage = record.get(usage_field) or {}
+            for key, value in usage.items():
+                if isinstance(value, (int, float)) and key != "cached_token_ratio":
+                    usage_totals[key] = usage_totals.get(key, 0) + value
+            for agent_name, agent_usage in (usage.get("by_agent") or {}).items():
+                totals = by_agent.setdefault(agent_name, {})
+                for key, value in agent_usage.items():
+                    if key != "cached_token_ratio":
+                        totals[key] = totals.get(key, 0) + value
+        if usage_totals:
+            # Ratios are recomputed from summed token counts
+            for totals in [usage_totals] + list(by_agent.values()):
+                prompt_tokens = totals.get("prompt_tokens", 0)
+                totals["cached_token_ratio"] = round(totals.get("cached_tokens", 0) / prompt_tokens, 4) if prompt_tokens else 0.0
+            usage_totals["cost_usd"] = round(usage_totals.get("cost_usd", 0.0), 6)
+            usage_totals["by_agent"] = by_agent
+            summary[usage_field] = usage_totals
+    
+    return summary
+
+
+async def run_checkpointed_evaluation(model: RefundChatbotModel, examples: List[Dict[str, Any]],
+                                      checkpoint: JsonlCheckpoint, eval_logger=None) -> int:
+    """Evaluate cases concurrently, appending each record to the checkpoint (and the Weave evaluation) as it finishes"""
+    semaphore = asyncio.Semaphore(config.EVAL_CONCURRENCY)
+    finished = 0
+    
+    async def _run(example: Dict[str, Any]):
+        nonlocal finished
+        async with semaphore:
+            record = await asyncio.to_thread(evaluate_case, model, example)
+        checkpoint.append(record)
+        log_case(eval_logger, example, record)
+        finished += 1
+        mark = "✅" if record["status"] == "ok" else "⚠️"
+        print(f"   {mark} [{finished}/{len(examples)}] {record['id']} ({record['latency_sec']}s)"
+              + (f" - {record['error']}" if record["error"] else ""))
+    
+    await asyncio.gather(*[_run(example) for example in examples])
+    return finished
+
+
+async def run_batch_judged_evaluation(model: RefundChatbotModel, examples: List[Dict[str, Any]],
+                                      checkpoint: JsonlCheckpoint, batch_path: str, resume: bool = False,
+                                      eval_logger=None) -> int:
+    """Predict every case, score them all with one judge batch, then append the records to the checkpoint
+
+    Each prediction is checkpointed with status "pending_judge" as soon as it finishes, and the submitted
+    batch ids are saved next to the batch file. On resume, pending predictions are reused and their
+    batches reattached instead of predicting and submitting again.
+    """
+    semaphore = asyncio.Semaphore(config.EVAL_CONCURRENCY)
+    state_path = get_batch_state_path(batch_path)
+    judge = BatchJudge()
+    finished = 0
+    
+    def report(example: Dict[str, Any], record: Dict[str, Any]):
+        nonlocal finished
+        log_case(eval_logger, example, record)
+        finished += 1
+        mark = "✅" if record["status"] == "ok" else "⚠️"
+        print(f"   {mark} [{finished}/{len(examples)}] {record['id']} ({record['latency_sec']}s)"
+              + (f" - {record['error']}" if record["error"] else ""))
+    
+    # Predictions left by an interrupted run
+    predictions: Dict[str, Tuple[Dict[str, Any], float]] = {}
+    batches: List[Dict[str, Any]] = []
+    if resume:
+        stored = checkpoint.latest_by_id()
+        for example in examples:
+            record = stored.get(example["id"])
+            if record is not None and record.get("status") == "pending_judge":
+                predictions[example["id"]] = (record["prediction"], record["latency_sec"])
+        if predictions:
+            print(f"   ♻️ Reusing {len(predictions)} predictions waiting for the judge")
+        if os.path.exists(state_path):
+            with open(state_path, "r", encoding="utf-8") as f:
+                batches = json.load(f).get("batches", [])
+    elif os.path.exists(state_path):
+        os.remove(state_path)
+    
+    async def _predict(example: Dict[str, Any]):
+        async with semaphore:
+            output, latency = await asyncio.to_thread(predict_case, model, example)
+        if prediction_error(output) is not None:
+            record = score_case(example, output, latency)  # Not judged; recorded as an error right away
+            checkpoint.append(record)
+            report(example, record)
+            return
+        checkpoint.append(case_record(example, output, latency, {}, None, "pending_judge"))
+        predictions[example["id"]] = (output, latency)
+    
+    await asyncio.gather(*[_predict(example) for example in examples if example["id"] not in predictions])
+    print(f"   🤖 {len(predictions)} predictions waiting for the judge; collecting judge requests")
+    
+    judged = [example for example in examples if example["id"] in predictions]
+    submitted = {case_id for batch in batches for case_id in batch["case_ids"]}
+    requests = {}
+    for example in judged:
+        if example["id"] in submitted:
+            continue
+        output = predictions[example["id"]][0]
+        for name in EVALUATION_SCORERS:
+            request = JUDGE_SCORERS[name]().judge_request(example["target"], output, output.get("language", "ko"))
+            if request is not None:
+                requests[f"{example['id']}::{name}"] = request
+    
+    if requests:
+        try:
+            batch_id = await asyncio.to_thread(judge.submit, requests, batch_path)
+            batches.append({"batch_id": batch_id,
+                            "case_ids": sorted({custom_id.split("::")[0] for custom_id in requests})})
+            with open(state_path, "w", encoding="utf-8") as f:
+                json.dump({"batches": batches}, f, ensure_ascii=False, indent=2)
+        except BatchJudgeError as e:
+            print(f"⚠️  Warning: {e} - scoring synchronously")
+    
+    results = {}
+    for batch in batches:
+        try:
+            results.update(await asyncio.to_thread(judge.wait, batch["batch_id"], batch_path))
+        except BatchJudgeError as e:
+            print(f"⚠️  Warning: {e} - scoring synchronously")
+    
+    for example in judged:
+        output, latency = predictions[example["id"]]
+        judgments = {name: results[f"{example['id']}::{name}"]
+                     for name in EVALUATION_SCORERS if f"{example['id']}::{name}" in results}
+        async with semaphore:
+            record = await asyncio.to_thread(score_case, example, output, latency, judgments)
+        checkpoint.append(record)
+        report(example, record)
+    
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    return finished
+
+
+async def main(language: str = "ko", resume: bool = False, checkpoint_dir: str = None, settings: Settings = None,
+               judge_mode: str = None):
     """Main evaluation function with language support"""
-    # Initialize Weave
-    weave.init('retail-chatbot-dev')
+    # Initialize Weave (skipped for offline runs, e.g. cassette replay)
+    if os.getenv('WEAVE_INIT_DISABLED') != '1':
+        weave.init('retail-chatbot-dev')
     
+    # Chatbot and scorers in this run use these settings (e.g. a different current date)
+    settings = resolve_settings(settings, language).replace(turn_deadline=config.EVAL_TURN_DEADLINE)
+    with settings_scope(settings):
+        return await _evaluate_language(language, resume, checkpoint_dir, judge_mode or config.EVAL_JUDGE_MODE)
+
+
+async def _evaluate_language(language: str, resume: bool, checkpoint_dir: str, judge_mode: str = "sync"):
+    """Evaluate one language under the current settings scope"""
     # Create model with specified language
     model = RefundChatbotModel(language=language)
     
@@ -125,16 +460,15 @@ async def main(language: str = "ko"):
     
     print(f"📊 {len(examples)} test scenarios loaded for {lang_name} ({language.upper()})")
     
-    # Evaluation configuration - 3 core evaluations
-    evaluation = weave.Evaluation(
-        name=f"refund_chatbot_{language}_evaluation",
-        dataset=examples,
-        scorers=[
-            policy_compliance_evaluation,      # Policy compliance
-            reasoning_performance_evaluation,  # Reasoning performance
-            refund_accuracy_evaluation        # Refund accuracy
-        ]
-    )
+    # Checkpoint: each finished case is appended immediately
+    checkpoint = JsonlCheckpoint(get_checkpoint_path(language, checkpoint_dir))
+    if resume:
+        done_ids = checkpoint.completed_ids()
+        pending = [example for example in examples if example["id"] not in done_ids]
+        print(f"⏩ Resuming from {checkpoint.path}: {len(examples) - len(pending)} done, {len(pending)} remaining")
+    else:
+        checkpoint.reset()
+        pending = examples
     
     if language == "ko":
         print("🚀 환불 챗봇 평가 시작...")
@@ -155,8 +489,28 @@ async def main(language: str = "ko"):
         print("   2. 推論性能 (Reasoning Performance) - LLMベース評価 (スコア + 理由)")
         print("   3. 返品精度 (Refund Accuracy) - LLMベース評価 (スコア + 理由)")
     
-    # Execute evaluation
-    results = await evaluation.evaluate(model)
+    # Weave evaluation of the whole dataset: cases finished by an earlier run come from the checkpoint
+    eval_logger = start_evaluation_logger(model, language, examples)
+    if resume and eval_logger is not None:
+        stored = checkpoint.latest_by_id()
+        for example in examples:
+            if example["id"] in done_ids:
+                log_case(eval_logger, example, stored[example["id"]])
+    
+    # Execute evaluation (batch judge mode: judge calls go out together once all predictions are done)
+    try:
+        if judge_mode == "batch":
+            await run_batch_judged_evaluation(model, pending, checkpoint, get_batch_path(language, checkpoint_dir),
+                                              resume, eval_logger)
+        else:
+            await run_checkpointed_evaluation(model, pending, checkpoint, eval_logger)
+    except BaseException as e:
+        if eval_logger is not None:
+            eval_logger.fail(e)
+        raise
+    
+    # Aggregate metrics are always computed from the checkpoint file
+    results = summarize_checkpoint(checkpoint, [example["id"] for example in examples])
     
     if language == "ko":
         print("\n✅ 평가 완료!")
@@ -165,11 +519,35 @@ async def main(language: str = "ko"):
     elif language == "jp":
         print("\n✅ 評価完了!")
         
-    print(f"📈 Results: {results}")
+    print(f"📈 Results: {json.dumps(results, ensure_ascii=False, indent=2)}")
+    print(f"💾 Checkpoint: {checkpoint.path}")
+    
+    # Per-stage latency histograms for this process (stage × model × language)
+    latency_path = os.path.join(os.path.dirname(checkpoint.path), f"latency_{language}")
+    latency_recorder.write_json(latency_path + ".json")
+    latency_recorder.write_prometheus(latency_path + ".prom")
+    latency_recorder.export_configured()
+    print(f"⏱️ Stage latency: {latency_path}.json / .prom")
+    cache_stats = scorer_cache.stats()
+    print(f"🗂️ Scorer cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+    if current_settings().cascade_agents:
+        from agents.cascade import cascade_stats
+        for agent_name, entry in cascade_stats.summary().items():
+            print(f"🔼 Cascade {agent_name}: {entry['escalated']}/{entry['calls']} escalated "
+                  f"({entry['escalation_rate']:.1%}) {entry['reasons']}")
+    
+    if eval_logger is None:
+        return results
+    try:
+        eval_logger.log_summary(results)
+        print(f"🔗 Weave evaluation: {eval_logger.ui_url}")
+    except Exception as e:
+        print(f"⚠️ Failed to log the evaluation summary to Weave: {e}")
     
     return results
 
-async def evaluate_all_languages():
+async def evaluate_all_languages(resume: bool = False, checkpoint_dir: str = None, settings: Settings = None,
+                                 judge_mode: str = None):
     """Evaluate chatbot for all supported languages"""
     print("🌍 Multi-language Chatbot Evaluation")
     print("=" * 60)
@@ -180,7 +558,7 @@ async def evaluate_all_languages():
     for lang in languages:
         print(f"\n🔄 Evaluating {lang.upper()} chatbot...")
         try:
-            result = await main(lang)
+            result = await main(lang, resume=resume, checkpoint_dir=checkpoint_dir, settings=settings, judge_mode=judge_mode)
             all_results[lang] = result
             print(f"✅ {lang.upper()} evaluation completed")
         except Exception as e:
@@ -234,17 +612,25 @@ def _prompt_language_selection() -> str:
 
 
 if __name__ == "__main__":
-    import sys
+    parser = argparse.ArgumentParser(description="Refund chatbot evaluation")
+    parser.add_argument("language", nargs="?", help="ko, en, jp or all (interactive selection if omitted)")
+    parser.add_argument("--resume", action="store_true", help="Skip cases already completed in the checkpoint")
+    parser.add_argument("--checkpoint-dir", default=None, help=f"Checkpoint directory (default: {config.EVAL_RESULTS_DIR})")
+    parser.add_argument("--current-date", default=None, help=f"Reference date for refund decisions (default: {config.CURRENT_DATE})")
+    parser.add_argument("--judge-mode", choices=["sync", "batch"], default=None,
+                        help=f"Judge scoring: per-case calls or one batch API job per language (default: {config.EVAL_JUDGE_MODE})")
+    args = parser.parse_args()
+    settings = config.settings(current_date=args.current_date) if args.current_date else None
     
-    if len(sys.argv) > 1:
-        if sys.argv[1].lower() == "all":
+    if args.language:
+        if args.language.lower() == "all":
             # Evaluate all languages
-            asyncio.run(evaluate_all_languages())
+            asyncio.run(evaluate_all_languages(args.resume, args.checkpoint_dir, settings, args.judge_mode))
         else:
             # Evaluate specific language
-            language = sys.argv[1].lower()
+            language = args.language.lower()
             if language in config.SUPPORTED_LANGUAGES:
-                asyncio.run(main(language))
+                asyncio.run(main(language, args.resume, args.checkpoint_dir, settings, args.judge_mode))
             else:
                 print(f"❌ Unsupported language: {language}")
                 print(f"Supported languages: {', '.join(config.SUPPORTED_LANGUAGES)}")
@@ -254,6 +640,6 @@ if __name__ == "__main__":
         if selected == "":
             print("👋 종료합니다.")
         elif selected == "all":
-            asyncio.run(evaluate_all_languages())
+            asyncio.run(evaluate_all_languages(args.resume, args.checkpoint_dir, settings, args.judge_mode))
         else:
-            asyncio.run(main(selected))
\ No newline at end of file
+            asyncio.run(main(selected, args.resume, args.checkpoint_dir, settings, args.judge_mode))
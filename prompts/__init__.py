@@ -3,11 +3,21 @@ Prompts Package
 """
 from .intent_prompts import INTENT_PROMPTS
 from .agent_prompts import AGENT_PROMPTS
-from .weave_prompts import prompt_manager, register_all_prompts
+from .weave_prompts import prompt_cache, PromptCache, register_all_prompts
+
+
+def __getattr__(name: str):
+    # prompt_manager is created lazily by weave_prompts
+    if name == "prompt_manager":
+        from . import weave_prompts
+        return weave_prompts.prompt_manager
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     'INTENT_PROMPTS', 
     'AGENT_PROMPTS', 
     'prompt_manager',
+    'prompt_cache',
+    'PromptCache',
     'register_all_prompts'
 ]
\ No newline at end of file
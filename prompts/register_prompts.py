@@ -7,14 +7,17 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import weave
-from prompts.weave_prompts import register_all_prompts, WeavePromptManager
+from prompts.weave_prompts import (
+    register_all_prompts, WeavePromptManager, build_prompt_bundle, write_prompt_bundle, load_prompt_bundle
+)
 from config import config
 
 
 def _determine_languages_from_args() -> list:
     """CLI 인자에서 등록 대상 언어 목록을 결정합니다."""
-    if len(sys.argv) > 1:
-        lang_arg = sys.argv[1].lower()
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if args:
+        lang_arg = args[0].lower()
         if lang_arg == "all":
             return list(config.SUPPORTED_LANGUAGES)
         if lang_arg in config.SUPPORTED_LANGUAGES:
@@ -40,8 +43,31 @@ def _test_registered_prompts(language: str):
         print(f"   ⚠️ 테스트 실패: {e}")
 
 
+def _existing_bundle():
+    """기존 번들 (없거나 손상되었으면 None) — 등록하지 않은 언어의 프롬프트를 유지하기 위해 사용"""
+    if not os.path.exists(config.PROMPT_BUNDLE_PATH):
+        return None
+    try:
+        return load_prompt_bundle()
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ 기존 번들을 무시합니다 ({config.PROMPT_BUNDLE_PATH}: {e})")
+        return None
+
+
+def _write_bundle(target_languages: list, published_refs: dict = None):
+    """등록한 프롬프트를 해시와 함께 로컬 번들 파일로 저장합니다 (다른 언어는 기존 번들에서 유지)."""
+    bundle = build_prompt_bundle(target_languages, published_refs, base=_existing_bundle())
+    path = write_prompt_bundle(bundle)
+    print(f"📦 프롬프트 번들 저장: {path} (version {bundle['version']}, {len(bundle['prompts'])} prompts)")
+
+
 def main():
     """프롬프트 등록 메인 함수 (언어별/전체 등록 지원)"""
+    # --bundle-only: Weave 없이 로컬 프롬프트로 번들만 생성
+    if "--bundle-only" in sys.argv:
+        _write_bundle(_determine_languages_from_args())
+        return
+
     print("🚀 Weave 프롬프트 등록 시작")
 
     # Weave 초기화
@@ -53,15 +79,17 @@ def main():
     print(f"🌍 등록 대상 언어: {', '.join([lang.upper() for lang in target_languages])}")
 
     all_refs = {}
+    published_refs = {}
     for lang in target_languages:
         print(f"\n🔄 {lang.upper()} 프롬프트 등록 중...")
-        refs = register_all_prompts(language=lang)
+        refs = register_all_prompts(language=lang, published_refs=published_refs)
         all_refs[lang] = refs
         print(f"✅ {lang.upper()} 프롬프트 등록 완료")
         print("   🔍 간단 테스트:")
         _test_registered_prompts(lang)
 
     print("\n🎉 프롬프트 등록(언어별) 완료!")
+    _write_bundle(target_languages, published_refs)
     print("\n📖 등록된 프롬프트 요약:")
     for lang, refs in all_refs.items():
         print(f"- {lang.upper()}")
@@ -2,11 +2,16 @@
 """
 Weave prompt registration and management
 """
-import weave
+import os
+import json
+import time
+import hashlib
+import threading
 from datetime import datetime
+from typing import Dict, List, Any, Callable, Optional, Tuple
 from .intent_prompts import INTENT_PROMPTS
 from .agent_prompts import AGENT_PROMPTS
-from config import config
+from config import config, Settings, resolve_settings
 
 
 # Load refund policy based on language
@@ -26,10 +31,15 @@ def load_refund_policy(language: str = None):
     except FileNotFoundError:
         return "Refund policy file not found."
 
-def register_all_prompts(language: str = "ko"):
-    """Register all prompts to Weave (using official StringPrompt class)"""
+def register_all_prompts(language: str = "ko", published_refs: Dict[str, str] = None):
+    """Register all prompts to Weave (using official StringPrompt class)
+
+    published_refs, if given, is filled with prompt name → published ref URI.
+    """
     from config import config
     
+    import weave
+    
     if language not in config.SUPPORTED_LANGUAGES:
         language = "ko"
     
@@ -61,8 +71,10 @@ def register_all_prompts(language: str = "ko"):
         try:
             # Use official StringPrompt class
             prompt_obj = weave.StringPrompt(prompt_info["content"])
-            weave.publish(prompt_obj, name=name)
+            ref = weave.publish(prompt_obj, name=name)
             registered_refs[name] = name
+            if published_refs is not None:
+                published_refs[name] = ref.uri() if hasattr(ref, "uri") else str(ref)
             print(f"✅ {name} prompt registration completed - {prompt_info['description']}")
         except Exception as e:
             print(f"⚠️ {name} prompt registration failed: {e}")
@@ -78,143 +90,355 @@ def register_all_prompts(language: str = "ko"):
     }
 
 
-def get_prompt_from_weave(prompt_name: str, **kwargs) -> str:
-    """Get StringPrompt object from Weave and call format() (works without Weave)"""
+def prompt_language(prompt_name: str) -> str:
+    """Language suffix of a prompt name (default ko)"""
+    for lang in config.SUPPORTED_LANGUAGES:
+        if prompt_name.endswith(f"_{lang}"):
+            return lang
+    return "ko"
+
+
+def local_prompt_template(prompt_name: str) -> str:
+    """Unformatted local prompt (refund policy already substituted)"""
+    language = prompt_language(prompt_name)
+    if prompt_name == f"intent_classifier_{language}":
+        return INTENT_PROMPTS[language]["system"]
+    if prompt_name == f"order_agent_system_{language}":
+        return AGENT_PROMPTS[language]["order_agent"]["system"]
+    if prompt_name == f"refund_agent_system_{language}":
+        return AGENT_PROMPTS[language]["refund_agent"]["system"] % load_refund_policy(language)
+    if prompt_name == f"general_agent_system_{language}":
+        return AGENT_PROMPTS[language]["general_agent"]["system"]
+    return "Prompt not found."
+
+
+def fetch_weave_prompt(prompt_name: str, version: str = "latest") -> Tuple[Any, str]:
+    """Fetch a StringPrompt from Weave; falls back to the local prompt on failure"""
+    try:
+        import weave
+        ref = weave.ref(prompt_name if version == "latest" else f"{prompt_name}:{version}")
+        return ref.get(), "weave"
+    except Exception as e:
+        print(f"⚠️ Failed to get prompt from Weave ({prompt_name}): {e}")
+        print("📁 Falling back to local prompts.")
+        return local_prompt_template(prompt_name), "fallback"
+
+
+PROMPT_BUNDLE_FORMAT = 1
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def build_prompt_bundle(languages: List[str], published_refs: Dict[str, str] = None,
+                        base: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Snapshot of all resolved prompts for the given languages, with content hashes
+
+    Prompts of other languages are carried over from `base` (an existing bundle) unchanged.
+    """
+    prompts = {name: info for name, info in (base or {}).get("prompts", {}).items()
+               if info.get("language") not in languages}
+    for language in languages:
+        for name in (f"intent_classifier_{language}", f"order_agent_system_{language}",
+                     f"refund_agent_system_{language}", f"general_agent_system_{language}"):
+            content = local_prompt_template(name)
+            prompts[name] = {
+                "language": language,
+                "content": content,
+                "sha256": _sha256(content),
+                "weave_ref": (published_refs or {}).get(name)
+            }
+    digest = _sha256(json.dumps({name: info["sha256"] for name, info in sorted(prompts.items())}))
+    return {
+        "format": PROMPT_BUNDLE_FORMAT,
+        "version": datetime.now().strftime("%Y%m%d%H%M%S") + "-" + digest[:12],
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "bundle_sha256": digest,
+        "prompts": prompts
+    }
+
+
+def write_prompt_bundle(bundle: Dict[str, Any], path: str = None) -> str:
+    """Atomically write a prompt bundle (default config.PROMPT_BUNDLE_PATH)"""
+    path = path or config.PROMPT_BUNDLE_PATH
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(bundle, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_prompt_bundle(path: str = None) -> Dict[str, Any]:
+    """Load a prompt bundle and verify every content hash (ValueError on mismatch)"""
+    with open(path or config.PROMPT_BUNDLE_PATH, "r", encoding="utf-8") as f:
+        bundle = json.load(f)
+    if bundle.get("format") != PROMPT_BUNDLE_FORMAT:
+        raise ValueError(f"unsupported bundle format {bundle.get('format')}")
+    prompts = bundle.get("prompts", {})
+    for name, info in prompts.items():
+        if _sha256(info.get("content", "")) != info.get("sha256"):
+            raise ValueError(f"content hash mismatch for {name}")
+    digest = _sha256(json.dumps({name: info["sha256"] for name, info in sorted(prompts.items())}))
+    if digest != bundle.get("bundle_sha256"):
+        raise ValueError("bundle hash mismatch")
+    return bundle
+
+
+_prompt_bundle: Optional[Dict[str, Any]] = None
+_prompt_bundle_loaded = False
+_prompt_bundle_lock = threading.Lock()
+
+
+def get_prompt_bundle() -> Optional[Dict[str, Any]]:
+    """Verified bundle from config.PROMPT_BUNDLE_PATH, loaded once (None if disabled/missing/invalid)"""
+    global _prompt_bundle, _prompt_bundle_loaded
+    if _prompt_bundle_loaded:
+        return _prompt_bundle
+    with _prompt_bundle_lock:
+        if not _prompt_bundle_loaded:
+            if config.USE_PROMPT_BUNDLE and os.path.exists(config.PROMPT_BUNDLE_PATH):
+                try:
+                    _prompt_bundle = load_prompt_bundle()
+                    print(f"📦 Prompt bundle {_prompt_bundle['version']} loaded ({len(_prompt_bundle['prompts'])} prompts)")
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"⚠️ Ignoring prompt bundle {config.PROMPT_BUNDLE_PATH}: {e}")
+            _prompt_bundle_loaded = True
+    return _prompt_bundle
+
+
+class PromptCache:
+    """Resolved prompts keyed by (prompt name, language, version) with TTL and background refresh"""
     
-    # Use local prompts directly if Weave is disabled
-    import os
-    if os.getenv('WEAVE_INIT_DISABLED') == '1':
-        return get_fallback_prompt(prompt_name, **kwargs)
+    def __init__(self, ttl: float = None):
+        self.ttl = ttl  # None → config.PROMPT_CACHE_TTL; <= 0 → only explicit refresh
+        self._entries: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stats = {"hits": 0, "misses": 0, "refreshes": 0}
     
-    try:
-        # Get StringPrompt object from Weave
-        ref = weave.ref(prompt_name)
-        prompt_obj = ref.get()
-        
-        # Use StringPrompt.format() method
-        if kwargs:
-            return prompt_obj.format(**kwargs)
-        else:
-            return prompt_obj.format()
+    def get(self, prompt_name: str, version: str, loader: Callable[[], Tuple[Any, str]]) -> Tuple[Any, str]:
+        """(template, source) from cache, loading it when missing or expired"""
+        key = (prompt_name, prompt_language(prompt_name), version)
+        ttl = config.PROMPT_CACHE_TTL if self.ttl is None else self.ttl
+        entry = self._entries.get(key)
+        if entry is not None and (ttl <= 0 or time.monotonic() - entry["loaded_at"] < ttl):
+            self.stats["hits"] += 1
+            return entry["template"], entry["source"]
+        self.stats["misses"] += 1
+        # Expired entries reload through their own loader (keeps explicit upgrades)
+        template, source = (entry["loader"] if entry is not None else loader)()
+        with self._lock:
+            self._entries[key] = {"template": template, "source": source, "loader": loader, "loaded_at": time.monotonic()}
+        return template, source
+    
+    def invalidate(self, prompt_name: str = None, language: str = None):
+        """Drop entries (all, or matching name/language) so the next lookup reloads them"""
+        with self._lock:
+            for key in list(self._entries):
+                if (prompt_name is None or key[0] == prompt_name) and (language is None or key[1] == language):
+                    del self._entries[key]
+    
+    def refresh(self, remote_only: bool = True) -> int:
+        """Reload cached entries in place (Weave-hosted and fallback entries only by default)"""
+        with self._lock:
+            entries = list(self._entries.items())
+        refreshed = 0
+        for key, entry in entries:
+            if remote_only and entry["source"] in ("local", "bundle"):
+                continue
+            template, source = entry["loader"]()
+            # 갱신 실패 시 기존 Weave 프롬프트를 유지
+            if source == "fallback" and entry["source"] == "weave":
+                continue
+            with self._lock:
+                self._entries[key] = {**entry, "template": template, "source": source, "loaded_at": time.monotonic()}
+            refreshed += 1
+        self.stats["refreshes"] += refreshed
+        return refreshed
+    
+    def upgrade(self, prompt_name: str = None) -> int:
+        """Explicitly switch cached entries to the current Weave registry version"""
+        with self._lock:
+            keys = [key for key in self._entries if prompt_name is None or key[0] == prompt_name]
+        upgraded = 0
+        for key in keys:
+            name = key[0]
+            version = config.PROMPT_VERSION
+            template, source = fetch_weave_prompt(name, version)
+            if source != "weave":
+                continue
+            with self._lock:
+                self._entries[key] = {
+                    "template": template, "source": source, "loaded_at": time.monotonic(),
+                    "loader": lambda name=name, version=version: fetch_weave_prompt(name, version)
+                }
+            upgraded += 1
+        return upgraded
+    
+    def start_refresher(self, interval: float):
+        """Refresh Weave-hosted prompts every `interval` seconds in a daemon thread (idempotent)"""
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        self._stop.clear()
         
-    except Exception as e:
-        # Quietly fallback in dev/test environment
-        if os.getenv('WEAVE_INIT_DISABLED') == '1':
-            pass  # Quiet fallback
-        else:
-            print(f"⚠️ Failed to get prompt from Weave ({prompt_name}): {e}")
-            print("📁 Falling back to local prompts.")
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh(remote_only=True)
+                except Exception as e:
+                    print(f"⚠️ Prompt refresh failed: {e}")
         
-        # Fallback: use local prompts
-        return get_fallback_prompt(prompt_name, **kwargs)
+        self._refresher = threading.Thread(target=run, name="prompt-refresher", daemon=True)
+        self._refresher.start()
+    
+    def stop_refresher(self):
+        self._stop.set()
+
+
+# Global prompt cache shared by all prompt managers
+prompt_cache = PromptCache()
+
+
+def _render(template: Any, source: str, kwargs: Dict[str, Any]) -> str:
+    """Format a cached template (Weave StringPrompt objects are always formatted)"""
+    if source in ("weave", "bundle"):
+        return template.format(**kwargs) if hasattr(template, "format") else str(template)
+    return template.format(**kwargs) if kwargs else template
+
+
+_pin_warnings = set()
+
+
+def _bundle_serves(info: Dict[str, Any], prompt_name: str, version: str) -> bool:
+    """Whether a bundled prompt satisfies the requested version ("latest", or the version its weave_ref was published as)"""
+    if version == "latest" or (info.get("weave_ref") or "").endswith(f":{version}"):
+        return True
+    if (prompt_name, version) not in _pin_warnings:
+        _pin_warnings.add((prompt_name, version))
+        print(f"📌 {prompt_name}: version {version} is pinned but the bundle holds "
+              f"{info.get('weave_ref') or 'an unpublished copy'}; fetching it from Weave")
+    return False
+
+
+def resolve_prompt(prompt_name: str, use_local: bool = False, prompt_version: str = None, **kwargs) -> str:
+    """Cached prompt lookup: local templates, or Weave (prompt_version, default config.PROMPT_VERSION) with local fallback"""
+    if use_local or os.getenv('WEAVE_INIT_DISABLED') == '1':
+        template, source = prompt_cache.get(prompt_name, "local", lambda: (local_prompt_template(prompt_name), "local"))
+        return _render(template, source, kwargs)
+    version = prompt_version or config.PROMPT_VERSION
+    bundle = get_prompt_bundle()
+    info = bundle["prompts"].get(prompt_name) if bundle is not None else None
+    if info is not None and _bundle_serves(info, prompt_name, version):
+        # 번들이 있으면 레지스트리에 접근하지 않음 (명시적 upgrade() 시에만 갱신)
+        content = info["content"]
+        template, source = prompt_cache.get(prompt_name, f"bundle:{bundle['version']}", lambda: (content, "bundle"))
+    else:
+        template, source = prompt_cache.get(prompt_name, version, lambda: fetch_weave_prompt(prompt_name, version))
+    return _render(template, source, kwargs)
+
+
+def get_prompt_from_weave(prompt_name: str, **kwargs) -> str:
+    """Get StringPrompt object from Weave and call format() (works without Weave)"""
+    return resolve_prompt(prompt_name, use_local=False, **kwargs)
 
 
 def get_fallback_prompt(prompt_name: str, **kwargs) -> str:
     """Local prompt fallback when Weave fails"""
-    from config import config
-    
-    # Extract language from prompt name
-    language = "ko"  # default
-    for lang in config.SUPPORTED_LANGUAGES:
-        if prompt_name.endswith(f"_{lang}"):
-            language = lang
-            break
-    
-    fallback_prompts = {
-        f"intent_classifier_{language}": INTENT_PROMPTS[language]["system"],
-        f"order_agent_system_{language}": AGENT_PROMPTS[language]["order_agent"]["system"],
-        f"refund_agent_system_{language}": AGENT_PROMPTS[language]["refund_agent"]["system"] % load_refund_policy(language),
-        f"general_agent_system_{language}": AGENT_PROMPTS[language]["general_agent"]["system"]
-    }
-    
-    prompt = fallback_prompts.get(prompt_name, "Prompt not found.")
-    
-    if kwargs:
-        return prompt.format(**kwargs)
-    return prompt
+    return resolve_prompt(prompt_name, use_local=True, **kwargs)
 
 
 class WeavePromptManager:
     """Prompt manager - use local prompts directly in development mode"""
     
-    def __init__(self, use_local_only: bool = None):
+    def __init__(self, use_local_only: bool = None, language: str = None, settings: Settings = None):
         """
         Args:
-            use_local_only: If True, always use local prompts, if None, decide by environment variable
+            use_local_only: If True, always use local prompts, if None, decide by settings (USE_LOCAL_PROMPTS)
+            language: Prompt language (default: settings.language)
+            settings: Session settings (default: current settings)
         """
-        import os
+        self.settings = resolve_settings(settings, language)
         if use_local_only is None:
-            # Decide by environment variable (default: use local)
-            self.use_local_only = os.getenv('USE_LOCAL_PROMPTS', '1') == '1'
+            # Decide by settings (default: use local)
+            self.use_local_only = self.settings.use_local_prompts
         else:
             self.use_local_only = use_local_only
             
-        # Set prompt references based on current language
-        from config import config
-        self.language = config.LANGUAGE
-        self.prompt_refs = {
-            "intent_classifier": f"intent_classifier_{self.language}",
-            "order_agent": f"order_agent_system_{self.language}",
-            "refund_agent": f"refund_agent_system_{self.language}", 
-            "general_agent": f"general_agent_system_{self.language}"
-        }
+        # Set prompt references based on the language
+        self.language = self.settings.language
+        self.prompt_refs = self._prompt_refs(self.language)
+        
+        # Load and verify the offline bundle at startup; keep registry-hosted prompts fresh in the background
+        if not self.use_local_only:
+            get_prompt_bundle()
+        if not self.use_local_only and config.PROMPT_REFRESH_INTERVAL > 0 and os.getenv('WEAVE_INIT_DISABLED') != '1':
+            prompt_cache.start_refresher(config.PROMPT_REFRESH_INTERVAL)
     
     def get_intent_prompt(self, current_date: str = None) -> str:
         """Get intent classification prompt"""
         if current_date is None:
-            current_date = config.CURRENT_DATE
-        
-        if self.use_local_only:
-            # Use local prompts directly (immediate reflection)
-            prompt = INTENT_PROMPTS[self.language]["system"]
-            return prompt.format(current_date=current_date)
-        else:
-            # Use Weave prompts
-            return get_prompt_from_weave(
-                self.prompt_refs["intent_classifier"],
-                current_date=current_date
-            )
+            current_date = self.settings.current_date
+        return resolve_prompt(self.prompt_refs["intent_classifier"], self.use_local_only,
+                              self.settings.prompt_version, current_date=current_date)
     
     def get_order_agent_prompt(self) -> str:
         """Get order agent prompt"""
-        if self.use_local_only:
-            return AGENT_PROMPTS[self.language]["order_agent"]["system"]
-        else:
-            return get_prompt_from_weave(self.prompt_refs["order_agent"])
+        return resolve_prompt(self.prompt_refs["order_agent"], self.use_local_only, self.settings.prompt_version)
     
     def get_refund_agent_prompt(self) -> str:
         """Get refund agent prompt"""
-        if self.use_local_only:
-            return AGENT_PROMPTS[self.language]["refund_agent"]["system"] % load_refund_policy(self.language)
-        else:
-            return get_prompt_from_weave(self.prompt_refs["refund_agent"])
+        return resolve_prompt(self.prompt_refs["refund_agent"], self.use_local_only, self.settings.prompt_version)
     
     def get_general_agent_prompt(self) -> str:
         """Get general agent prompt"""
-        if self.use_local_only:
-            return AGENT_PROMPTS[self.language]["general_agent"]["system"]
-        else:
-            return get_prompt_from_weave(self.prompt_refs["general_agent"])
+        return resolve_prompt(self.prompt_refs["general_agent"], self.use_local_only, self.settings.prompt_version)
+    
+    def refresh(self):
+        """Drop this language's cached prompts (e.g. after editing refund_policy.txt)"""
+        prompt_cache.invalidate(language=self.language)
+    
+    def upgrade(self) -> int:
+        """Replace this language's cached prompts (bundle included) with the Weave registry version"""
+        return sum(prompt_cache.upgrade(name) for name in self.prompt_refs.values())
+    
+    @staticmethod
+    def _prompt_refs(language: str) -> Dict[str, str]:
+        return {
+            "intent_classifier": f"intent_classifier_{language}",
+            "order_agent": f"order_agent_system_{language}",
+            "refund_agent": f"refund_agent_system_{language}", 
+            "general_agent": f"general_agent_system_{language}"
+        }
     
     def set_language(self, language: str):
-        """Set the language for prompts"""
-        from config import config
+        """Set the language for prompts (prefer WeavePromptManager(language=...) for shared instances)"""
         if language in config.SUPPORTED_LANGUAGES:
+            self.settings = self.settings.replace(language=language)
             self.language = language
-            # Update prompt references
-            self.prompt_refs = {
-                "intent_classifier": f"intent_classifier_{self.language}",
-                "order_agent": f"order_agent_system_{self.language}",
-                "refund_agent": f"refund_agent_system_{self.language}", 
-                "general_agent": f"general_agent_system_{self.language}"
-            }
+            self.prompt_refs = self._prompt_refs(language)
+
 
+# Global prompt manager instance (created on first access)
+_prompt_manager: Optional[WeavePromptManager] = None
 
-# Global prompt manager instance
-prompt_manager = WeavePromptManager()
+
+def __getattr__(name: str):
+    global _prompt_manager
+    if name == "prompt_manager":
+        if _prompt_manager is None:
+            _prompt_manager = WeavePromptManager()
+        return _prompt_manager
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
+    import weave
+    
     # Initialize Weave
     weave.init("retail-chatbot-dev")
     
@@ -6,9 +6,15 @@
 from .policy_compliance_scorer import PolicyComplianceScorer
 from .reason_quality_scorer import ReasonQualityScorer
 from .refund_decision_scorer import RefundDecisionScorer
+from .cache import ScorerResultCache, scorer_cache
+from .batch_judge import BatchJudge, BatchJudgeError
 
 __all__ = [
     "PolicyComplianceScorer",
     "ReasonQualityScorer", 
-    "RefundDecisionScorer"
+    "RefundDecisionScorer",
+    "ScorerResultCache",
+    "scorer_cache",
+    "BatchJudge",
+    "BatchJudgeError"
 ]
\ No newline at end of file
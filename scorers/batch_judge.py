@@ -0,0 +1,144 @@
+"""
+Batch API judge runs
+
+평가 실행 한 번의 모든 심사(judge) 요청을 배치 JSONL 파일로 저장하고, 배치 엔드포인트(/v1/batches)로 제출한 뒤
+완료될 때까지 상태를 확인(polling)하여 custom_id별 응답을 돌려줍니다.
+배치 API는 지연 시간 대신 더 낮은 가격과 별도의 처리량 한도를 제공하므로 실시간 트래픽과 레이트 리밋을 다투지 않습니다.
+"""
+import io
+import os
+import json
+import time
+from typing import Dict, Any
+from config import config
+from agents.rate_limit import is_retryable
+
+
+# Batch states after which no more results will appear
+FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+class BatchJudgeError(RuntimeError):
+    """The batch could not be submitted or finished without any output"""
+
+
+def write_batch_file(path: str, requests: Dict[str, Dict[str, Any]]) -> str:
+    """Write {custom_id: chat-completions body} as a batch input JSONL file"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for custom_id, body in requests.items():
+            line = {"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body}
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    return path
+
+
+def parse_batch_output(text: str) -> Dict[str, Dict[str, Any]]:
+    """custom_id → {"content", "model", "usage"} for every successful line of a batch output file"""
+    results = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        response = entry.get("response") or {}
+        if entry.get("error") or response.get("status_code") != 200:
+            continue
+        body = response.get("body") or {}
+        choices = body.get("choices") or [{}]
+        usage = body.get("usage") or {}
+        results[entry["custom_id"]] = {
+            "content": (choices[0].get("message") or {}).get("content") or "",
+            "model": body.get("model", ""),
+            "usage": {
+                "prompt_tokens": usage.get("prompt_tokens", 0) or 0,
+                "completion_tokens": usage.get("completion_tokens", 0) or 0,
+                "total_tokens": usage.get("total_tokens", 0) or 0,
+                "cached_tokens": ((usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0) or 0),
+            },
+        }
+    return results
+
+
+class BatchJudge:
+    """Submits judge requests through the batch API and waits for their results"""
+
+    def __init__(self, client=None, poll_interval: float = None, timeout: float = None):
+        self._client = client
+        self.poll_interval = config.EVAL_BATCH_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.timeout = config.EVAL_BATCH_TIMEOUT if timeout is None else timeout
+
+    @property
+    def client(self):
+        if self._client is None:
+            import openai
+            self._client = openai.OpenAI(api_key=config.OPENAI_API_KEY, base_url=config.OPENAI_BASE_URL)
+        return self._client
+
+    def run(self, requests: Dict[str, Dict[str, Any]], batch_path: str) -> Dict[str, Dict[str, Any]]:
+        """Results by custom_id (requests that failed inside the batch are missing)"""
+        if not requests:
+            return {}
+        return self.wait(self.submit(requests, batch_path), batch_path)
+
+    def submit(self, requests: Dict[str, Dict[str, Any]], batch_path: str) -> str:
+        """Write and upload the batch input file, create the batch and return its id"""
+        write_batch_file(batch_path, requests)
+        try:
+            with open(batch_path, "rb") as f:
+                uploaded = self.client.files.create(file=(os.path.basename(batch_path), io.BytesIO(f.read())), purpose="batch")
+            batch = self.client.batches.create(
+                input_file_id=uploaded.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h",
+                metadata={"source": "evaluate_chatbot"}
+            )
+        except Exception as e:
+            raise BatchJudgeError(f"Batch submission failed: {type(e).__name__}: {e}") from e
+        print(f"📦 Submitted judge batch {batch.id}: {len(requests)} requests ({batch_path})")
+        return batch.id
+
+    def wait(self, batch_id: str, batch_path: str) -> Dict[str, Dict[str, Any]]:
+        """Poll a submitted batch (also one from an earlier, interrupted run) until it ends; results by custom_id
+
+        Transient API errors (see is_retryable) are retried; anything else raises BatchJudgeError, so callers
+        can fall back to synchronous scoring.
+        """
+        batch = self._call(f"retrieve batch {batch_id}", self.client.batches.retrieve, batch_id)
+        started = time.monotonic()
+        while batch.status not in FINAL_STATUSES:
+            if time.monotonic() - started > self.timeout:
+                self._call(f"cancel batch {batch.id}", self.client.batches.cancel, batch.id)
+                raise BatchJudgeError(f"Batch {batch.id} did not finish within {self.timeout:.0f}s (cancelled)")
+            time.sleep(self.poll_interval)
+            batch = self._call(f"retrieve batch {batch.id}", self.client.batches.retrieve, batch.id)
+            counts = getattr(batch, "request_counts", None)
+            if counts is not None:
+                print(f"   ⏳ {batch.id}: {batch.status} ({counts.completed}/{counts.total} done, {counts.failed} failed)")
+
+        # Expired/cancelled batches still return the requests they finished
+        if not getattr(batch, "output_file_id", None):
+            raise BatchJudgeError(f"Batch {batch.id} ended as {batch.status} without output")
+        output = self._call(f"download output of batch {batch.id}", self.client.files.content, batch.output_file_id).text
+        with open(f"{os.path.splitext(batch_path)[0]}_{batch.id}_output.jsonl", "w", encoding="utf-8") as f:
+            f.write(output)
+        try:
+            results = parse_batch_output(output)
+        except (ValueError, KeyError) as e:
+            raise BatchJudgeError(f"Batch {batch.id} output could not be parsed: {type(e).__name__}: {e}") from e
+        counts = getattr(batch, "request_counts", None)
+        total = f"/{counts.total}" if counts is not None else ""
+        print(f"📦 Judge batch {batch.id} {batch.status}: {len(results)}{total} results")
+        return results
+
+    def _call(self, action: str, method, *args):
+        """One batch/file API call, retried MAX_RETRIES times on transient errors with exponential backoff"""
+        for attempt in range(config.MAX_RETRIES + 1):
+            try:
+                return method(*args)
+            except Exception as e:
+                if not is_retryable(e) or attempt == config.MAX_RETRIES:
+                    raise BatchJudgeError(f"Could not {action}: {type(e).__name__}: {e}") from e
+                delay = min(config.RETRY_MAX_DELAY, config.RETRY_DELAY * 2 ** attempt)
+                print(f"⚠️  Warning: Could not {action}: {e} - retry {attempt + 1}/{config.MAX_RETRIES} in {delay:.1f}s")
+                time.sleep(delay)
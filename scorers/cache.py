@@ -0,0 +1,100 @@
+"""
+Content-addressed scorer result cache
+
+스코어러 결과를 (스코어러 이름, 프롬프트 버전, 심사 모델, 언어, 기대 결과, 응답 텍스트, 심사 요청 본문)의
+해시로 저장합니다. 심사 요청 본문에는 환불 정책 텍스트와 평가 프롬프트 템플릿이 포함되므로 이를 수정하면 캐시가 무효화됩니다. 챗봇 출력이 바뀌지 않은 케이스는 재평가 시 LLM 호출 없이 로컬 저장소에서 반환됩니다.
+"""
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from typing import Dict, Any, Optional
+from config import config
+
+
+class ScorerResultCache:
+    """Local file store for scorer results keyed by content hash"""
+
+    def __init__(self, cache_dir: str = None, enabled: bool = None):
+        """
+        Args:
+            cache_dir: Directory for cached results (default: config.SCORER_CACHE_DIR)
+            enabled: If None, decide by config.USE_SCORER_CACHE
+        """
+        self.cache_dir = cache_dir or config.SCORER_CACHE_DIR
+        self.enabled = config.USE_SCORER_CACHE if enabled is None else enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(scorer_name: str, prompt_version: str, model_name: str, language: str,
+                 target: Dict[str, Any], response: str, judge_request: Dict[str, Any] = None) -> str:
+        """Build a stable content hash for one (response, target) pair
+
+        `judge_request` is the judge call body (messages and sampling parameters); it carries the
+        policy text and prompt templates the score depends on.
+        """
+        payload = json.dumps(
+            {
+                "scorer": scorer_name,
+                "prompt_version": prompt_version,
+                "model": model_name,
+                "language": language,
+                "target": target,
+                "response": response,
+                "judge_request": judge_request,
+            },
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        # 디렉토리당 파일 수를 줄이기 위해 앞 2글자로 샤딩
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached result, or None on miss"""
+        if not self.enabled:
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry.get("result")
+
+    def contains(self, key: str) -> bool:
+        """Whether a result is cached (without counting a hit or miss)"""
+        return self.enabled and os.path.exists(self._path(key))
+
+    def put(self, key: str, result: Dict[str, Any], meta: Dict[str, Any] = None):
+        """Store a result atomically (write to temp file, then rename)"""
+        if not self.enabled:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {"result": result, "meta": meta or {}}
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for this process"""
+        return {"hits": self.hits, "misses": self.misses}
+
+
+# Global scorer cache instance
+scorer_cache = ScorerResultCache()
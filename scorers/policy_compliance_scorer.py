@@ -1,17 +1,19 @@
 import weave
 import json
-from typing import Dict, Any
-from openai import OpenAI
+from typing import Dict, Any, Optional
 from config import config
+from agents.base import LLMClient
+from .cache import scorer_cache
 
 class PolicyComplianceScorer(weave.Model):
     """LLM-based policy compliance evaluation scorer with multi-language support"""
     
     model_name: str = config.POLICY_COMPLIANCE_MODEL
     language: str = "ko"  # Default language
+    prompt_version: str = "1"  # Bump when the scoring logic changes (prompt and policy edits already invalidate cached results)
     
     @weave.op()
-    def score(self, target: Dict, model_output: Dict, language: str = "ko") -> Dict[str, Any]:
+    def score(self, target: Dict, model_output: Dict, language: str = "ko", judgment: str = None) -> Dict[str, Any]:
         """
         LLM-based policy compliance evaluation
         
@@ -19,6 +21,7 @@ class PolicyComplianceScorer(weave.Model):
             target: Expected result
             model_output: Model output
             language: Language for evaluation (ko, en, jp)
+            judgment: Judge answer already obtained (e.g. from a batch run); skips the LLM call
         
         Returns:
             Evaluation result dictionary (accuracy and reason included)
@@ -38,28 +41,21 @@ class PolicyComplianceScorer(weave.Model):
                 "reason": empty_msg.get(language, empty_msg["ko"])
             }
         
+        # Serve unchanged (response, target) pairs from the local cache
+        cache_key = self._cache_key(expected_result, response, language)
+        cached = scorer_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         # LLM-based policy compliance evaluation
         evaluation_prompt = self._create_evaluation_prompt(response, expected_result, language)
         
         try:
-            client = OpenAI(api_key=config.OPENAI_API_KEY)
-            system_messages = {
-                "ko": "당신은 환불 정책 준수도를 평가하는 전문가입니다. 주어진 챗봇 응답이 환불 정책을 얼마나 잘 준수하는지 평가하세요.",
-                "en": "You are an expert evaluating refund policy compliance. Evaluate how well the given chatbot response complies with the refund policy.",
-                "jp": "あなたは返品ポリシーの遵守度を評価する専門家です。与えられたチャットボットの応答が返品ポリシーをどれだけよく遵守しているか評価してください。"
-            }
-            
-            llm_response = client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system", "content": system_messages.get(language, system_messages["ko"])},
-                    {"role": "user", "content": evaluation_prompt}
-                ],
-                temperature=0.1,
-                response_format={"type": "json_object"}
-            )
+            if judgment is None:
+                judge = LLMClient(model=self.model_name, agent_name=type(self).__name__)
+                judgment = judge.complete(**self._judge_request(evaluation_prompt, language)).content
             
-            result = json.loads(llm_response.choices[0].message.content)
+            result = json.loads(judgment)
             score = float(result.get("score", 0.0))
             default_reasons = {
                 "ko": "평가 결과를 가져올 수 없습니다.",
@@ -70,11 +66,13 @@ class PolicyComplianceScorer(weave.Model):
             
             # 점수가 0-1 범위를 벗어나면 조정
             score = max(0.0, min(1.0, score))
-            
-            return {
+
+            scored = {
                 "policy_compliance": score,
                 "reason": reason
             }
+            scorer_cache.put(cache_key, scored)
+            return scored
             
         except Exception as e:
             error_msgs = {
@@ -84,9 +82,40 @@ class PolicyComplianceScorer(weave.Model):
             }
             return {
                 "policy_compliance": 0.0,
-                "reason": error_msgs.get(language, error_msgs["ko"])
+                "reason": error_msgs.get(language, error_msgs["ko"]),
+                "error": f"{type(e).__name__}: {e}"
             }
     
+    def _cache_key(self, target: Dict, response: str, language: str) -> str:
+        # Key on the full judge request so edits to the policy text or prompt templates invalidate results
+        judge_request = self._judge_request(self._create_evaluation_prompt(response, target, language), language)
+        return scorer_cache.make_key(
+            type(self).__name__, self.prompt_version, self.model_name, language, target, response, judge_request
+        )
+    
+    def judge_request(self, target: Dict, model_output: Dict, language: str = "ko") -> Optional[Dict[str, Any]]:
+        """Chat-completions body of the judge call, or None when score() needs no call (empty response, cached result)"""
+        response = model_output.get("response", "")
+        if not response.strip() or scorer_cache.contains(self._cache_key(target, response, language)):
+            return None
+        return {"model": self.model_name, **self._judge_request(self._create_evaluation_prompt(response, target, language), language)}
+    
+    def _judge_request(self, evaluation_prompt: str, language: str = "ko") -> Dict[str, Any]:
+        """Judge messages and sampling parameters (without the model)"""
+        system_messages = {
+            "ko": "당신은 환불 정책 준수도를 평가하는 전문가입니다. 주어진 챗봇 응답이 환불 정책을 얼마나 잘 준수하는지 평가하세요.",
+            "en": "You are an expert evaluating refund policy compliance. Evaluate how well the given chatbot response complies with the refund policy.",
+            "jp": "あなたは返品ポリシーの遵守度を評価する専門家です。与えられたチャットボットの応答が返品ポリシーをどれだけよく遵守しているか評価してください。"
+        }
+        return {
+            "messages": [
+                {"role": "system", "content": system_messages.get(language, system_messages["ko"])},
+                {"role": "user", "content": evaluation_prompt}
+            ],
+            "temperature": 0.1,
+            "response_format": {"type": "json_object"}
+        }
+    
     def _create_evaluation_prompt(self, response: str, expected_result: Dict, language: str = "ko") -> str:
         """Generate prompt for policy compliance evaluation"""
         
@@ -1,17 +1,19 @@
 import weave
 import json
-from typing import Dict, Any
-from openai import OpenAI
+from typing import Dict, Any, Optional
 from config import config
+from agents.base import LLMClient
+from .cache import scorer_cache
 
 class ReasonQualityScorer(weave.Model):
     """LLM-based reason explanation quality evaluation scorer with multi-language support"""
     
     model_name: str = config.REASON_QUALITY_MODEL
     language: str = "ko"  # Default language
+    prompt_version: str = "1"  # Bump when the scoring logic changes (prompt and policy edits already invalidate cached results)
     
     @weave.op()
-    def score(self, target: Dict, model_output: Dict, language: str = "ko") -> Dict[str, Any]:
+    def score(self, target: Dict, model_output: Dict, language: str = "ko", judgment: str = None) -> Dict[str, Any]:
         """
         LLM-based reason explanation quality evaluation
         
@@ -19,6 +21,7 @@ class ReasonQualityScorer(weave.Model):
             target: Expected result
             model_output: Model output
             language: Language for evaluation (ko, en, jp)
+            judgment: Judge answer already obtained (e.g. from a batch run); skips the LLM call
         
         Returns:
             Evaluation result dictionary (accuracy and reason included)
@@ -33,39 +36,66 @@ class ReasonQualityScorer(weave.Model):
                 "reason": "응답이 비어있습니다."
             }
         
+        # 변경되지 않은 (응답, 기대 결과) 쌍은 로컬 캐시에서 반환
+        cache_key = self._cache_key(expected_result, response, language)
+        cached = scorer_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         # LLM을 사용한 이유 설명 품질 평가
         evaluation_prompt = self._create_evaluation_prompt(response, expected_result)
         
         try:
-            client = OpenAI(api_key=config.OPENAI_API_KEY)
-            llm_response = client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system", "content": "당신은 챗봇 응답의 추론 품질을 평가하는 전문가입니다. 챗봇이 제공한 이유와 설명의 품질을 평가하세요."},
-                    {"role": "user", "content": evaluation_prompt}
-                ],
-                temperature=0.1,
-                response_format={"type": "json_object"}
-            )
+            if judgment is None:
+                judge = LLMClient(model=self.model_name, agent_name=type(self).__name__)
+                judgment = judge.complete(**self._judge_request(evaluation_prompt, language)).content
             
-            result = json.loads(llm_response.choices[0].message.content)
+            result = json.loads(judgment)
             score = float(result.get("score", 0.0))
             reason = result.get("reason", "평가 결과를 가져올 수 없습니다.")
             
             # 점수가 0-1 범위를 벗어나면 조정
             score = max(0.0, min(1.0, score))
-            
-            return {
+
+            scored = {
                 "reason_score": score,
                 "reason": reason
             }
+            scorer_cache.put(cache_key, scored)
+            return scored
             
         except Exception as e:
             return {
                 "reason_score": 0.0,
-                "reason": f"LLM 평가 중 오류 발생: {str(e)}"
+                "reason": f"LLM 평가 중 오류 발생: {str(e)}",
+                "error": f"{type(e).__name__}: {e}"
             }
     
+    def _cache_key(self, target: Dict, response: str, language: str) -> str:
+        # Key on the full judge request so edits to the policy text or prompt templates invalidate results
+        judge_request = self._judge_request(self._create_evaluation_prompt(response, target), language)
+        return scorer_cache.make_key(
+            type(self).__name__, self.prompt_version, self.model_name, language, target, response, judge_request
+        )
+    
+    def judge_request(self, target: Dict, model_output: Dict, language: str = "ko") -> Optional[Dict[str, Any]]:
+        """Chat-completions body of the judge call, or None when score() needs no call (empty response, cached result)"""
+        response = model_output.get("response", "")
+        if not response.strip() or scorer_cache.contains(self._cache_key(target, response, language)):
+            return None
+        return {"model": self.model_name, **self._judge_request(self._create_evaluation_prompt(response, target), language)}
+    
+    def _judge_request(self, evaluation_prompt: str, language: str = "ko") -> Dict[str, Any]:
+        """Judge messages and sampling parameters (without the model)"""
+        return {
+            "messages": [
+                {"role": "system", "content": "당신은 챗봇 응답의 추론 품질을 평가하는 전문가입니다. 챗봇이 제공한 이유와 설명의 품질을 평가하세요."},
+                {"role": "user", "content": evaluation_prompt}
+            ],
+            "temperature": 0.1,
+            "response_format": {"type": "json_object"}
+        }
+    
     def _create_evaluation_prompt(self, response: str, expected_result: Dict, language: str = "ko") -> str:
         """Generate prompt for reason explanation quality evaluation"""
         
@@ -1,17 +1,19 @@
 import weave
 import json
-from typing import Dict, Any
-from openai import OpenAI
+from typing import Dict, Any, Optional
 from config import config
+from agents.base import LLMClient
+from .cache import scorer_cache
 
 class RefundDecisionScorer(weave.Model):
     """LLM-based refund decision accuracy evaluation scorer with multi-language support"""
     
     model_name: str = config.REFUND_DECISION_MODEL
     language: str = "ko"  # Default language
+    prompt_version: str = "1"  # Bump when the scoring logic changes (prompt and policy edits already invalidate cached results)
     
     @weave.op()
-    def score(self, target: Dict, model_output: Dict, language: str = "ko") -> Dict[str, Any]:
+    def score(self, target: Dict, model_output: Dict, language: str = "ko", judgment: str = None) -> Dict[str, Any]:
         """
         LLM-based refund decision accuracy evaluation
         
@@ -19,6 +21,7 @@ class RefundDecisionScorer(weave.Model):
             target: Expected result (expected_result)
             model_output: Model output (chatbot response)
             language: Language for evaluation (ko, en, jp)
+            judgment: Judge answer already obtained (e.g. from a batch run); skips the LLM call
         
         Returns:
             Evaluation result dictionary (refund decision accuracy and reason included)
@@ -38,28 +41,21 @@ class RefundDecisionScorer(weave.Model):
                 "reason": empty_msg.get(language, empty_msg["ko"])
             }
         
+        # Serve unchanged (response, target) pairs from the local cache
+        cache_key = self._cache_key(expected_result, response, language)
+        cached = scorer_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         # LLM-based refund decision evaluation
         evaluation_prompt = self._create_evaluation_prompt(response, expected_result, language)
         
         try:
-            client = OpenAI(api_key=config.OPENAI_API_KEY)
-            system_messages = {
-                "ko": "당신은 환불 여부 결정의 정확성을 평가하는 전문가입니다. 챗봇의 환불 가능/불가능 판단이 올바른지 평가하세요.",
-                "en": "You are an expert evaluating the accuracy of refund decisions. Evaluate whether the chatbot's refund possible/impossible judgment is correct.",
-                "jp": "あなたは返品判定の正確性を評価する専門家です。チャットボットの返品可能・不可能の判断が正しいか評価してください。"
-            }
-            
-            llm_response = client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system", "content": system_messages.get(language, system_messages["ko"])},
-                    {"role": "user", "content": evaluation_prompt}
-                ],
-                temperature=0.1,
-                response_format={"type": "json_object"}
-            )
+            if judgment is None:
+                judge = LLMClient(model=self.model_name, agent_name=type(self).__name__)
+                judgment = judge.complete(**self._judge_request(evaluation_prompt, language)).content
             
-            result = json.loads(llm_response.choices[0].message.content)
+            result = json.loads(judgment)
             
             # 환불 여부 정확도를 True/False로 평가
             accuracy_score = float(result.get("accuracy", 0.0))
@@ -72,11 +68,13 @@ class RefundDecisionScorer(weave.Model):
             
             # 0.5 이상이면 True, 미만이면 False
             accuracy = accuracy_score >= 0.5
-            
-            return {
+
+            scored = {
                 "accuracy": accuracy,
                 "reason": reason
             }
+            scorer_cache.put(cache_key, scored)
+            return scored
             
         except Exception as e:
             error_msgs = {
@@ -86,9 +84,40 @@ class RefundDecisionScorer(weave.Model):
             }
             return {
                 "accuracy": False,
-                "reason": error_msgs.get(language, error_msgs["ko"])
+                "reason": error_msgs.get(language, error_msgs["ko"]),
+                "error": f"{type(e).__name__}: {e}"
             }
     
+    def _cache_key(self, target: Dict, response: str, language: str) -> str:
+        # Key on the full judge request so edits to the policy text or prompt templates invalidate results
+        judge_request = self._judge_request(self._create_evaluation_prompt(response, target, language), language)
+        return scorer_cache.make_key(
+            type(self).__name__, self.prompt_version, self.model_name, language, target, response, judge_request
+        )
+    
+    def judge_request(self, target: Dict, model_output: Dict, language: str = "ko") -> Optional[Dict[str, Any]]:
+        """Chat-completions body of the judge call, or None when score() needs no call (empty response, cached result)"""
+        response = model_output.get("response", "")
+        if not response.strip() or scorer_cache.contains(self._cache_key(target, response, language)):
+            return None
+        return {"model": self.model_name, **self._judge_request(self._create_evaluation_prompt(response, target, language), language)}
+    
+    def _judge_request(self, evaluation_prompt: str, language: str = "ko") -> Dict[str, Any]:
+        """Judge messages and sampling parameters (without the model)"""
+        system_messages = {
+            "ko": "당신은 환불 여부 결정의 정확성을 평가하는 전문가입니다. 챗봇의 환불 가능/불가능 판단이 올바른지 평가하세요.",
+            "en": "You are an expert evaluating the accuracy of refund decisions. Evaluate whether the chatbot's refund possible/impossible judgment is correct.",
+            "jp": "あなたは返品判定の正確性を評価する専門家です。チャットボットの返品可能・不可能の判断が正しいか評価してください。"
+        }
+        return {
+            "messages": [
+                {"role": "system", "content": system_messages.get(language, system_messages["ko"])},
+                {"role": "user", "content": evaluation_prompt}
+            ],
+            "temperature": 0.1,
+            "response_format": {"type": "json_object"}
+        }
+    
     def _create_evaluation_prompt(self, response: str, expected_result: Dict, language: str = "ko") -> str:
         """Generate prompt for refund decision accuracy evaluation"""
         
@@ -4,14 +4,18 @@ Simplified multi-turn shopping mall chatbot
 - Multi-turn conversation support with while loop
 - Continuous context management
 """
-import weave
+import os
 import json
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from dataclasses import dataclass, asdict
 
 # Agent imports
-from agents import LLMClient, IntentAgent, PlanningAgent, OrderAgent, RefundAgent, GeneralAgent
-from config import config
+from agents.language_pack import get_agent_set, UI_TEMPLATES
+from agents.usage import UsageLedger, usage_scope
+from agents.tracing import weave_op
+from agents.deadline import Deadline, DeadlineExceeded, deadline_scope
+from agents.latency import latency_recorder
+from config import config, Settings, resolve_settings, settings_scope
 
 
 @dataclass
@@ -24,6 +28,10 @@ class AgentOutput:
     
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AgentOutput":
+        return cls(data['agent_name'], data['step_id'], data.get('raw_output'), data.get('structured_data'))
 
 
 @dataclass 
@@ -35,6 +43,9 @@ class ConversationTurn:
     entities: Dict[str, Any]
     plan: Optional[Dict[str, Any]] = None
     agent_outputs: List[AgentOutput] = None
+    timings: Optional[Dict[str, float]] = None  # Stage latency breakdown (ms)
+    usage: Optional[Dict[str, Any]] = None  # Token usage and cost ledger summary
+    degraded: Optional[List[str]] = None  # Stages skipped or cut short by the turn deadline
     
     def __post_init__(self):
         if self.agent_outputs is None:
@@ -42,17 +53,74 @@ class ConversationTurn:
     
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
+    
+    def to_store_dict(self) -> Dict[str, Any]:
+        """Compact form for session stores (raw agent output is dropped; structured_data carries the context)"""
+        data = self.to_dict()
+        data['agent_outputs'] = [
+            {k: v for k, v in output.items() if k != 'raw_output'} for output in data['agent_outputs']
+        ]
+        return {k: v for k, v in data.items() if v is not None}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ConversationTurn":
+        return cls(
+            user_input=data['user_input'],
+            bot_response=data['bot_response'],
+            intent=data['intent'],
+            entities=data.get('entities') or {},
+            plan=data.get('plan'),
+            agent_outputs=[AgentOutput.from_dict(output) for output in data.get('agent_outputs') or []],
+            timings=data.get('timings'),
+            usage=data.get('usage'),
+            degraded=data.get('degraded')
+        )
 
 
 class ContextManager:
-    """Conversation context manager - separates chat content and structured data"""
+    """Conversation context manager - separates chat content and structured data
+    
+    store가 주어지면 턴을 세션 저장소(tools/session_store.py)에 한 건씩 추가 기록하고,
+    메모리에는 최근 `window`개 턴만 지연 로딩하여 유지합니다 (다른 워커가 이어받을 수 있음).
+    """
+    
+    def __init__(self, store=None, session_id: str = None, window: int = None):
+        self.store = store
+        self.session_id = session_id
+        self.window = window or config.SESSION_HISTORY_TURNS
+        self._turn_count = 0
+        self._history: Optional[List[ConversationTurn]] = [] if store is None else None
     
-    def __init__(self):
-        self.conversation_history: List[ConversationTurn] = []
+    @property
+    def turn_count(self) -> int:
+        """Turns in the whole session (including those outside the loaded window)"""
+        if self._history is None:
+            self._load()
+        return self._turn_count
+    
+    @property
+    def conversation_history(self) -> List[ConversationTurn]:
+        if self._history is None:
+            self._load()
+        return self._history
+    
+    def _load(self):
+        self._turn_count = self.store.turn_count(self.session_id)
+        self._history = [ConversationTurn.from_dict(turn) for turn in self.store.load_turns(self.session_id, self.window)]
+    
+    def sync(self):
+        """Reload the recent window if another worker appended turns to this session"""
+        if self.store is not None and (self._history is None or self.store.turn_count(self.session_id) != self._turn_count):
+            self._load()
     
     def add_turn(self, turn: ConversationTurn):
         """새로운 대화 턴 추가"""
         self.conversation_history.append(turn)
+        if self.store is None:
+            self._turn_count += 1
+            return
+        self._turn_count = self.store.append_turn(self.session_id, turn.to_store_dict())
+        del self._history[:-self.window]
     
     def get_recent_turns(self, count: int = 3) -> List[ConversationTurn]:
         """최근 N개 턴 반환"""
@@ -157,108 +225,149 @@ class ContextManager:
 class SimplifiedChatbot:
     """Simplified multi-turn chatbot"""
     
-    def __init__(self, language: str = None):
-        self.language = language or config.LANGUAGE
+    def __init__(self, language: str = None, settings: Settings = None, session_store=None, session_id: str = None):
+        # Session settings (immutable); the global config only supplies defaults
+        self.settings = resolve_settings(settings, language)
+        self.language = self.settings.language
         
-        # 1. Intent analysis agent (lightweight model)
-        intent_llm = LLMClient(model=config.INTENT_AGENT_MODEL)
-        self.intent_agent = IntentAgent(intent_llm, self.language)
+        # 1-3. Intent / planning / domain agents: shared per-settings set (see agents/language_pack.py)
+        self.agent_set = get_agent_set(settings=self.settings)
         
-        # 2. Planning agent (lightweight model)
-        planning_llm = LLMClient(model=config.PLANNING_AGENT_MODEL)
-        self.planning_agent = PlanningAgent(planning_llm, self.language)
+        # 4. Conversation context manager (optionally backed by a shared session store)
+        self.context_manager = ContextManager(session_store, session_id)
         
-        # 3. Domain-specific agents (each using appropriate model)
-        order_llm = LLMClient(model=config.ORDER_AGENT_MODEL)
-        refund_llm = LLMClient(model=config.REFUND_AGENT_MODEL)
-        general_llm = LLMClient(model=config.GENERAL_AGENT_MODEL)
+        # 5. Session-wide token usage and cost ledger
+        self.session_usage = UsageLedger()
         
-        self.agents = {
-            'order_agent': OrderAgent(order_llm, self.language),
-            'refund_agent': RefundAgent(refund_llm, self.language), 
-            'general_agent': GeneralAgent(general_llm, self.language)
-        }
-        
-        # 4. Conversation context manager
-        self.context_manager = ContextManager()
+        # 6. Optional progress callback (event, data), e.g. for streaming in chat_server.py
+        self.event_sink: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    
+    def _emit(self, event: str, **data):
+        if self.event_sink is not None:
+            try:
+                self.event_sink(event, data)
+            except Exception as e:
+                print(f"[WARNING] event_sink failed: {e}")
+    
+    @property
+    def intent_agent(self):
+        return self.agent_set.intent_agent
+    
+    @property
+    def planning_agent(self):
+        return self.agent_set.planning_agent
+    
+    @property
+    def agents(self):
+        return self.agent_set.agents
+    
+    @property
+    def templates(self):
+        return UI_TEMPLATES[self.language]
     
     def set_language(self, language: str):
-        """Change the chatbot language"""
+        """Change the chatbot language (selects another shared agent set; nothing is mutated)"""
         if language in config.SUPPORTED_LANGUAGES:
+            self.settings = self.settings.replace(language=language)
             self.language = language
-            # Update all agents with new language
-            self.intent_agent.language = language
-            self.planning_agent.language = language
-            for agent in self.agents.values():
-                agent.language = language
+            self.agent_set = get_agent_set(settings=self.settings)
             return True
         return False
     
-    @weave.op()
+    @weave_op()
     def chat(self, user_input: str, order_info: Dict[str, Any] = None) -> str:
-        """Planning Agent 기반 멀티 스텝 처리"""
-        
-        # 1. Intent 분석 (레거시 컨텍스트 사용)
-        legacy_context = self.context_manager.get_legacy_context()
-        intent_result = self.intent_agent.classify(user_input, legacy_context)
-        intent = intent_result.get('intent', 'general_chat')
-        entities = intent_result.get('entities', {})
+        """Planning Agent 기반 멀티 스텝 처리 (턴 마감 시간을 넘기면 단계를 축소하여 응답)"""
         
-        # 2. Planning Agent가 실행 계획 수립
-        plan = self.planning_agent.create_plan(user_input, intent_result, legacy_context)
-        
-        # 3. 계획에 따라 에이전트들을 순차 실행
-        agent_outputs = []
-        for step in plan['steps']:
-            agent_name = step['agent']
-            agent = self.agents.get(agent_name)
-            
-            if not agent:
-                print(f"[WARNING] 에이전트 '{agent_name}'를 찾을 수 없습니다.")
-                continue
+        reserve = config.DEADLINE_STAGE_MIN["agent"]  # keep time for at least one agent after intent / planning
+        degraded: List[str] = []
+        with settings_scope(self.settings), deadline_scope(self.settings.turn_deadline) as deadline, \
+                latency_recorder.turn(self.language) as timer, usage_scope(self.session_usage), \
+                usage_scope() as turn_usage:
+            # 1. Intent 분석 (레거시 컨텍스트 사용)
+            with timer.stage("context_build"):
+                self.context_manager.sync()
+                legacy_context = self.context_manager.get_legacy_context()
+            intent_result = self._run_stage(
+                "intent", "intent", deadline, reserve, timer, self.intent_agent.llm.model,
+                lambda: self.intent_agent.classify(user_input, legacy_context)
+            )
+            if intent_result is None:
+                degraded.append("intent")
+                intent_result = {"intent": "general_chat", "entities": {}}
+            intent = intent_result.get('intent', 'general_chat')
+            entities = intent_result.get('entities', {})
+            self._emit("intent", intent=intent, entities=entities)
             
-            # Generate structured context with language support
-            structured_context = self.context_manager.get_structured_context_for_llm(self.language)
-            
-            # Add previous step results to structured context
-            if step['parameters'].get('context_from_previous') and agent_outputs:
-                prev_output = agent_outputs[-1]
-                if prev_output.structured_data:
-                    if self.language == "ko":
-                        structured_context += f"\n\n## 이전 단계 결과\n{json.dumps(prev_output.structured_data, ensure_ascii=False, indent=2)}"
-                    elif self.language == "en":
-                        structured_context += f"\n\n## Previous Step Results\n{json.dumps(prev_output.structured_data, ensure_ascii=False, indent=2)}"
-                    elif self.language == "jp":
-                        structured_context += f"\n\n## 前のステップの結果\n{json.dumps(prev_output.structured_data, ensure_ascii=False, indent=2)}"
+            # 2. Planning Agent가 실행 계획 수립 (시간이 부족하면 의도별 템플릿 계획)
+            plan = None
+            if not degraded:
+                plan = self._run_stage(
+                    "planning", "planning", deadline, reserve, timer, self.planning_agent.llm.model,
+                    lambda: self.planning_agent.create_plan(user_input, intent_result, legacy_context)
+                )
+                if plan is None:
+                    degraded.append("planning")
+                    plan = self.planning_agent.template_plan(intent)
+                self._emit("plan", plan_type=plan.get('plan_type'), agents=[step['agent'] for step in plan['steps']])
             
-            # Execute agent
-            try:
-                # Pass order_info for OrderAgent
-                if agent_name == 'order_agent' and hasattr(agent, 'handle_with_structured_context'):
-                    raw_result = agent.handle_with_structured_context(user_input, structured_context, order_info)
-                elif hasattr(agent, 'handle_with_structured_context'):
-                    raw_result = agent.handle_with_structured_context(user_input, structured_context)
-                else:
-                    # Fallback to legacy method
-                    raw_result = self._call_agent_legacy(agent, agent_name, user_input, order_info)
+            # 3. 계획에 따라 에이전트들을 순차 실행
+            agent_outputs = []
+            steps = plan['steps'] if plan else []
+            for index, step in enumerate(steps):
+                agent_name = step['agent']
+                agent = self.agents.get(agent_name)
                 
-                # Structure agent output
-                agent_output = self._create_agent_output(agent_name, step['step_id'], raw_result)
-                agent_outputs.append(agent_output)
+                if not agent:
+                    print(f"[WARNING] 에이전트 '{agent_name}'를 찾을 수 없습니다.")
+                    continue
                 
-            except Exception as e:
-                print(f"[ERROR] Error during step {step['step_id']} execution: {e}")
-                error_msg = f"Error occurred: {str(e)}" if self.language == "en" else f"エラーが発生しました: {str(e)}" if self.language == "jp" else f"오류 발생: {str(e)}"
-                error_output = AgentOutput(
-                    agent_name=agent_name,
-                    step_id=step['step_id'],
-                    raw_output=error_msg,
-                    structured_data={"error": str(e), "agent_type": agent_name}
-                )
-                agent_outputs.append(error_output)
-        
-        # 4. 최종 응답 처리
-        final_response = self._process_final_response_v2(plan, agent_outputs, intent)
+                with timer.stage("context_build"):
+                    # Generate structured context with language support
+                    structured_context = self.context_manager.get_structured_context_for_llm(self.language)
+                    
+                    # Add previous step results to structured context
+                    if step['parameters'].get('context_from_previous') and agent_outputs:
+                        prev_output = agent_outputs[-1]
+                        if prev_output.structured_data:
+                            structured_context += f"\n\n{self.templates['previous_step_header']}\n{json.dumps(prev_output.structured_data, ensure_ascii=False, indent=2)}"
+                
+                # Execute agent (later steps keep their minimum share of the deadline)
+                try:
+                    raw_result = self._run_stage(
+                        agent_name, "agent", deadline, reserve * (len(steps) - index - 1), timer, agent.llm.model,
+                        lambda: self._call_agent(agent, agent_name, user_input, structured_context, order_info)
+                    )
+                    if raw_result is None:
+                        degraded.append(agent_name)
+                        raw_result = self._degraded_result(agent, agent_name, user_input, order_info)
+                        if raw_result is None:
+                            continue
+                    
+                    # Structure agent output
+                    agent_output = self._create_agent_output(agent_name, step['step_id'], raw_result)
+                    agent_outputs.append(agent_output)
+                    self._emit("step", step_id=step['step_id'], agent=agent_name, structured_data=agent_output.structured_data)
+                    
+                except Exception as e:
+                    print(f"[ERROR] Error during step {step['step_id']} execution: {e}")
+                    error_msg = self.templates['error'].format(error=str(e))
+                    error_output = AgentOutput(
+                        agent_name=agent_name,
+                        step_id=step['step_id'],
+                        raw_output=error_msg,
+                        structured_data={"error": str(e), "agent_type": agent_name}
+                    )
+                    agent_outputs.append(error_output)
+            
+            # 4. 최종 응답 처리 (마감으로 결과가 없으면 "확인 중" 안내)
+            with timer.stage("final_response"):
+                if degraded and not agent_outputs:
+                    final_response = self.templates["still_checking"]
+                else:
+                    final_response = self._process_final_response_v2(plan, agent_outputs, intent)
+            if degraded:
+                self._emit("degraded", stages=degraded)
+            timings = timer.finish()
         
         # 5. 구조화된 컨텍스트로 저장
         conversation_turn = ConversationTurn(
@@ -267,12 +376,49 @@ class SimplifiedChatbot:
             intent=intent,
             entities=entities,
             plan=plan,
-            agent_outputs=agent_outputs
+            agent_outputs=agent_outputs,
+            timings=timings,
+            usage=turn_usage.summary(),
+            degraded=degraded or None
         )
         self.context_manager.add_turn(conversation_turn)
         
         return final_response
     
+    @staticmethod
+    def _run_stage(stage: str, budget_key: str, deadline: Optional[Deadline], reserve: float, timer, model: str,
+                   run: Callable[[], Any]) -> Any:
+        """Run one stage within the turn deadline minus `reserve`; None when skipped or timed out"""
+        budget = None
+        if deadline is not None:
+            budget = deadline.remaining() - reserve
+            if budget < config.DEADLINE_STAGE_MIN[budget_key]:
+                print(f"[WARNING] {stage} skipped: {deadline.remaining():.1f}s left before the turn deadline")
+                return None
+        try:
+            with timer.stage(stage, model=model), deadline_scope(budget):
+                return run()
+        except DeadlineExceeded as e:
+            print(f"[WARNING] {e}")
+            return None
+    
+    def _call_agent(self, agent, agent_name: str, user_input: str, structured_context: str, order_info: Dict = None):
+        """Dispatch one plan step to its agent"""
+        # Pass order_info for OrderAgent
+        if agent_name in ('order_agent', 'refund_agent') and hasattr(agent, 'handle_with_structured_context'):
+            return agent.handle_with_structured_context(user_input, structured_context, order_info)
+        elif hasattr(agent, 'handle_with_structured_context'):
+            return agent.handle_with_structured_context(user_input, structured_context)
+        # Fallback to legacy method
+        return self._call_agent_legacy(agent, agent_name, user_input, order_info)
+    
+    @staticmethod
+    def _degraded_result(agent, agent_name: str, user_input: str, order_info: Dict = None):
+        """Step result without an LLM call when the deadline leaves no time (refund rules only)"""
+        if agent_name == 'refund_agent' and hasattr(agent, 'handle_from_rules'):
+            return agent.handle_from_rules(user_input, order_info)
+        return None
+    
     def _process_final_response(self, plan: Dict[str, Any], step_results: List[Any], intent: str) -> str:
         """단계별 결과를 최종 응답으로 처리"""
         
@@ -375,7 +521,7 @@ class SimplifiedChatbot:
         """구조화된 에이전트 출력을 최종 응답으로 처리"""
         
         if not agent_outputs:
-            return "죄송합니다. 요청을 처리하는 중 문제가 발생했습니다."
+            return self.templates["processing_failed"]
         
         # single_agent인 경우 마지막 결과만 반환
         if plan['plan_type'] == 'single_agent':
@@ -395,28 +541,13 @@ class SimplifiedChatbot:
     
     def chat_loop(self):
         """Multi-turn conversation loop"""
-        if self.language == "ko":
-            print("\n🛍️ 쇼핑몰 챗봇에 오신걸 환영합니다!")
-            print("주문 조회와 환불 문의를 도와드립니다.")
-            print("'종료'를 입력하면 대화를 마칩니다.\n")
-            user_prompt = "고객님: "
-            exit_msg = "대화를 종료합니다. 감사합니다! 👋"
-            bot_prefix = "봇: "
-        elif self.language == "en":
-            print("\n🛍️ Welcome to Shopping Mall Chatbot!")
-            print("We help with order inquiries and refund requests.")
-            print("Type 'exit' to end the conversation.\n")
-            user_prompt = "Customer: "
-            exit_msg = "Ending conversation. Thank you! 👋"
-            bot_prefix = "Bot: "
-        elif self.language == "jp":
-            print("\n🛍️ ショッピングモールチャットボットへようこそ！")
-            print("注文照会と返品お問い合わせをサポートします。")
-            print("'終了'を入力すると会話を終了します。\n")
-            user_prompt = "お客様: "
-            exit_msg = "会話を終了します。ありがとうございました！ 👋"
-            bot_prefix = "ボット: "
+        templates = self.templates
+        print(templates["welcome"])
+        user_prompt = templates["user_prompt"]
+        exit_msg = templates["exit_message"]
+        bot_prefix = templates["bot_prefix"]
         
+        import weave
         with weave.thread() as thread_ctx:
             print(f"Thread ID: {thread_ctx.thread_id}")
         
@@ -428,6 +559,7 @@ class SimplifiedChatbot:
                     exit_commands = ['종료', 'exit', 'quit', '終了']
                     if user_input.lower() in exit_commands:
                         print(exit_msg)
+                        latency_recorder.export_configured()
                         break
                     
                     if not user_input:
@@ -439,6 +571,7 @@ class SimplifiedChatbot:
                     
                 except KeyboardInterrupt:
                     print(f"\n\n{exit_msg}")
+                    latency_recorder.export_configured()
                     break
                 except Exception as e:
                     print(f"오류 발생: {e}")
@@ -466,8 +599,10 @@ def main():
         else:
             print("Invalid choice. Please enter 1, 2, or 3.")
     
-    # Initialize Weave
-    weave.init('wandb-korea/retail-chatbot-dev')
+    # Initialize Weave (skipped for offline runs, e.g. cassette replay)
+    if os.getenv('WEAVE_INIT_DISABLED') != '1':
+        import weave
+        weave.init('wandb-korea/retail-chatbot-dev')
     
     # Create and run chatbot
     chatbot = SimplifiedChatbot(language=language)
@@ -0,0 +1,28 @@
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# Tests never talk to Weave
+os.environ.setdefault("WEAVE_INIT_DISABLED", "1")
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    """tools/stub_server.py without simulated latency, with the LLM clients pointed at it"""
+    from config import config
+    from tools.stub_server import make_server, load_stub_config
+
+    stub_config = load_stub_config(None)
+    stub_config["time_scale"] = 0
+    server = make_server(port=0, stub_config=stub_config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    monkeypatch.setattr(config, "OPENAI_BASE_URL", f"http://{host}:{port}/v1")
+    monkeypatch.setattr(config, "OPENAI_API_KEY", "stub")
+    yield server
+    server.shutdown()
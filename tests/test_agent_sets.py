@@ -0,0 +1,27 @@
+from agents.language_pack import get_agent_set, _agent_sets
+from config import config, settings_scope
+
+
+def test_per_session_dates_share_one_agent_set():
+    sets = {
+        id(get_agent_set(settings=config.settings("en", current_date=f"2025-{month:02d}-{day:02d}", turn_deadline=5.0)))
+        for month in range(1, 13) for day in range(1, 26)
+    }
+    assert len(sets) == 1
+    assert len([key for key in _agent_sets if key.language == "en"]) == 1
+
+
+def test_agents_use_the_date_of_the_running_session():
+    settings = config.settings("en", current_date="2030-01-01")
+    refund_agent = get_agent_set(settings=settings).agents["refund_agent"]
+
+    with settings_scope(settings):
+        assert refund_agent.settings.for_call().current_date == "2030-01-01"
+    assert refund_agent.settings.for_call().current_date == config.CURRENT_DATE
+
+
+def test_model_changes_still_get_their_own_agent_set():
+    base = get_agent_set(settings=config.settings("en"))
+    other = get_agent_set(settings=config.settings("en", refund_agent_model="gpt-4o-mini-test"))
+    assert other is not base
+    assert other.agents["refund_agent"].llm.model == "gpt-4o-mini-test"
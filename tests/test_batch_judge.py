@@ -0,0 +1,186 @@
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import evaluate_chatbot as ev
+from config import config
+from scorers.batch_judge import BatchJudge, BatchJudgeError
+from scorers.cache import scorer_cache
+from tools.jsonl_checkpoint import JsonlCheckpoint
+
+
+@pytest.fixture
+def batch_eval(stub_server, monkeypatch, tmp_path):
+    monkeypatch.setattr(scorer_cache, "enabled", False)
+    monkeypatch.setattr(config, "EVAL_BATCH_POLL_INTERVAL", 0.05)
+    examples = ev.load_evaluation_dataset("en")[:2]
+    checkpoint = JsonlCheckpoint(str(tmp_path / "refund_chatbot_en.jsonl"))
+    return SimpleNamespace(examples=examples, checkpoint=checkpoint, batch_path=str(tmp_path / "judge_batch_en.jsonl"))
+
+
+def prediction(example):
+    return {"response": "A refund is possible within 7 days of delivery.", "language": example["language"],
+            "usage": {"failed_calls": 0}, "degraded": []}
+
+
+def fake_model(calls):
+    def predict(user_query, order_info=None, language=None):
+        calls.append(user_query)
+        return prediction({"language": language})
+    return SimpleNamespace(predict=predict)
+
+
+def run(batch_eval, model, resume=False, eval_logger=None):
+    return asyncio.run(ev.run_batch_judged_evaluation(
+        model, batch_eval.examples, batch_eval.checkpoint, batch_eval.batch_path, resume, eval_logger))
+
+
+class RecordingEvaluationLogger:
+    """Stands in for weave.EvaluationLogger"""
+
+    def __init__(self):
+        self.predictions = []
+
+    def log_prediction(self, inputs, output=None):
+        prediction = SimpleNamespace(inputs=inputs, output=output, scores={}, finished=False)
+        prediction.log_score = lambda name, score: prediction.scores.__setitem__(name, score)
+        prediction.finish = lambda: setattr(prediction, "finished", True)
+        self.predictions.append(prediction)
+        return prediction
+
+
+def test_resume_reattaches_to_the_submitted_batch(batch_eval, stub_server, monkeypatch):
+    def interrupted(self, batch_id, batch_path):
+        raise KeyboardInterrupt
+
+    calls = []
+    with monkeypatch.context() as patch:
+        patch.setattr(BatchJudge, "wait", interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            run(batch_eval, fake_model(calls))
+
+    # Predictions are on disk before the batch finishes, and so is the batch id
+    records = batch_eval.checkpoint.latest_by_id()
+    assert {record["status"] for record in records.values()} == {"pending_judge"}
+    state_path = ev.get_batch_state_path(batch_eval.batch_path)
+    with open(state_path, "r", encoding="utf-8") as f:
+        batches = json.load(f)["batches"]
+    assert len(batches) == 1
+    assert batches[0]["case_ids"] == sorted(example["id"] for example in batch_eval.examples)
+
+    run(batch_eval, fake_model(calls), resume=True)
+
+    assert len(calls) == len(batch_eval.examples)  # nothing predicted twice
+    assert stub_server.state.counters["batches"] == 1  # nothing submitted twice
+    assert batch_eval.checkpoint.completed_ids() == {example["id"] for example in batch_eval.examples}
+    assert not os.path.exists(state_path)
+
+
+def test_batch_results_map_to_scorers_with_fallback_and_batch_pricing(batch_eval, stub_server, monkeypatch):
+    monkeypatch.setattr(config, "BATCH_PRICE_RATE", 0.25)
+    # The first two batch lines (the first case's first two scorers) fail inside the batch
+    failures = iter([500, 500])
+    monkeypatch.setattr(stub_server.state, "inject_error", lambda: next(failures, None))
+
+    run(batch_eval, fake_model([]))
+
+    first, second = (batch_eval.checkpoint.latest_by_id()[example["id"]] for example in batch_eval.examples)
+    assert first["status"] == second["status"] == "ok"
+
+    # custom_id "<case id>::<scorer>" carries that scorer's own judge request
+    with open(batch_eval.batch_path, "r", encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert len(lines) == 2 * len(ev.EVALUATION_SCORERS)
+    examples = {example["id"]: example for example in batch_eval.examples}
+    for line in lines:
+        case_id, name = line["custom_id"].split("::")
+        example = examples[case_id]
+        assert line["body"] == ev.JUDGE_SCORERS[name]().judge_request(example["target"], prediction(example), "en")
+
+    # The stub answers each judge prompt type with its canned score, so a mixed-up mapping changes the values
+    expected = {"policy_compliance_evaluation": 0.8, "reasoning_performance_evaluation": 0.8,
+                "refund_accuracy_evaluation": 1.0}
+    for record in (first, second):
+        assert {name: score["accuracy"] for name, score in record["scores"].items()} == expected
+
+    # Fully batched case: every judge call at BATCH_PRICE_RATE of the list price
+    from agents.usage import compute_cost
+    from scorers.batch_judge import parse_batch_output
+    output_path = next(path for path in os.listdir(os.path.dirname(batch_eval.batch_path)) if path.endswith("_output.jsonl"))
+    with open(os.path.join(os.path.dirname(batch_eval.batch_path), output_path), "r", encoding="utf-8") as f:
+        results = parse_batch_output(f.read())
+    assert len(results) == len(lines) - 2
+
+    def list_price(custom_ids):
+        return sum(compute_cost(results[custom_id]["model"], results[custom_id]["usage"]["prompt_tokens"],
+                                results[custom_id]["usage"]["completion_tokens"]) for custom_id in custom_ids)
+
+    second_ids = [f"{second['id']}::{name}" for name in ev.EVALUATION_SCORERS]
+    assert second["judge_usage"]["calls"] == 3
+    assert second["judge_usage"]["cost_usd"] == pytest.approx(list_price(second_ids) * 0.25, abs=1e-6)
+
+    # The failed lines were scored with normal (full-price) calls
+    batched_ids = [custom_id for custom_id in results if custom_id.startswith(f"{first['id']}::")]
+    assert batched_ids == [f"{first['id']}::refund_accuracy_evaluation"]
+    assert first["judge_usage"]["calls"] == 3
+    assert first["judge_usage"]["cost_usd"] > list_price(batched_ids) * 0.25
+
+
+class FlakyBatches:
+    """batches.retrieve that fails with the given errors before reporting a completed batch"""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def retrieve(self, batch_id):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        counts = SimpleNamespace(total=1, completed=1, failed=0)
+        return SimpleNamespace(id=batch_id, status="completed", output_file_id="file-out", request_counts=counts)
+
+
+def api_error(status_code):
+    error = RuntimeError(f"HTTP {status_code}")
+    error.status_code = status_code
+    return error
+
+
+def flaky_judge(errors):
+    line = {"custom_id": "CASE::scorer", "response": {"status_code": 200, "body": {
+        "model": "gpt-4o-mini", "choices": [{"message": {"content": "{}"}}], "usage": {}}}}
+    client = SimpleNamespace(batches=FlakyBatches(errors),
+                             files=SimpleNamespace(content=lambda file_id: SimpleNamespace(text=json.dumps(line))))
+    return BatchJudge(client=client, poll_interval=0, timeout=60)
+
+
+def test_wait_retries_transient_errors(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "RETRY_DELAY", 0.0)
+    judge = flaky_judge([api_error(503), api_error(429)])
+    assert list(judge.wait("batch_1", str(tmp_path / "judge_batch_en.jsonl"))) == ["CASE::scorer"]
+    assert judge.client.batches.calls == 3
+
+
+def test_wait_turns_other_errors_into_batch_judge_errors(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "RETRY_DELAY", 0.0)
+    with pytest.raises(BatchJudgeError):
+        flaky_judge([api_error(404)]).wait("batch_1", str(tmp_path / "judge_batch_en.jsonl"))
+    with pytest.raises(BatchJudgeError):
+        flaky_judge([api_error(503)] * (config.MAX_RETRIES + 1)).wait("batch_1", str(tmp_path / "judge_batch_en.jsonl"))
+
+
+def test_judged_cases_are_logged_to_the_weave_evaluation(batch_eval):
+    eval_logger = RecordingEvaluationLogger()
+    run(batch_eval, fake_model([]), eval_logger=eval_logger)
+
+    # One prediction per case, after the judge (never while pending), with all three scores
+    assert [prediction.inputs["id"] for prediction in eval_logger.predictions] == [example["id"] for example in batch_eval.examples]
+    for prediction, example in zip(eval_logger.predictions, batch_eval.examples):
+        assert prediction.finished
+        assert prediction.inputs["user_query"] == example["user_query"]
+        assert prediction.output == batch_eval.checkpoint.latest_by_id()[example["id"]]["prediction"]
+        assert set(prediction.scores) == set(ev.EVALUATION_SCORERS)
@@ -0,0 +1,88 @@
+import json
+import os
+import socket
+import struct
+import threading
+import http.client
+
+import pytest
+
+from chat_server import make_server
+
+
+@pytest.fixture
+def server():
+    server = make_server(host="127.0.0.1", port=0, workers=1, queue_size=4, session_store="memory")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post(server, path, body: bytes):
+    connection = http.client.HTTPConnection(*server.server_address[:2], timeout=10)
+    connection.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+    response = connection.getresponse()
+    payload = response.read()
+    connection.close()
+    return response.status, json.loads(payload) if payload else None
+
+
+@pytest.mark.parametrize("body", [
+    {"current_date": 5},
+    {"current_date": ["2025-09-01"]},
+    {"current_date": "2025-13-01"},
+    {"language": 5},
+    {"language": "fr"},
+])
+def test_invalid_session_fields_return_400(server, body):
+    status, payload = post(server, "/v1/sessions", json.dumps(body).encode("utf-8"))
+    assert status == 400
+    assert payload["error"]["status"] == 400
+
+
+def test_session_with_date_is_created(server):
+    status, payload = post(server, "/v1/sessions", json.dumps({"language": "en", "current_date": "2025-10-01"}).encode())
+    assert status == 201
+    assert payload["current_date"] == "2025-10-01"
+
+
+def test_oversized_body_returns_413(server, monkeypatch):
+    from config import config
+    monkeypatch.setattr(config, "SERVER_MAX_BODY_BYTES", 1024)
+    status, payload = post(server, "/v1/sessions", json.dumps({"language": "en", "pad": "x" * 2048}).encode())
+    assert status == 413
+
+
+def test_non_object_order_info_returns_400(server):
+    _, session = post(server, "/v1/sessions", b'{"language": "en"}')
+    status, payload = post(server, f"/v1/sessions/{session['session_id']}/messages",
+                           json.dumps({"message": "Hello", "order_info": "ORD-1"}).encode())
+    assert status == 400
+
+
+def test_oversized_websocket_frame_closes_with_1009(server, monkeypatch):
+    from config import config
+    monkeypatch.setattr(config, "SERVER_MAX_WS_MESSAGE_BYTES", 1024)
+    _, session = post(server, "/v1/sessions", b'{"language": "en"}')
+
+    sock = socket.create_connection(server.server_address[:2], timeout=10)
+    sock.sendall((f"GET /v1/sessions/{session['session_id']}/ws HTTP/1.1\r\nHost: test\r\n"
+                  "Upgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Version: 13\r\n"
+                  "Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n\r\n").encode("ascii"))
+    handshake = b""
+    while b"\r\n\r\n" not in handshake:
+        handshake += sock.recv(1024)
+    assert handshake.split(b"\r\n", 1)[0].split(b" ")[1] == b"101"
+
+    # Text frame announcing 1 GiB; the server must not try to read it
+    sock.sendall(bytes([0x81, 0x80 | 127]) + struct.pack("!Q", 1 << 30) + os.urandom(4))
+    frame = handshake.split(b"\r\n\r\n", 1)[1]
+    while len(frame) < 4:
+        chunk = sock.recv(1024)
+        if not chunk:
+            break
+        frame += chunk
+    sock.close()
+    assert frame[0] & 0x0F == 0x8
+    assert struct.unpack("!H", frame[2:4])[0] == 1009
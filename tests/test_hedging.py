@@ -0,0 +1,64 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import agents.base as base
+from agents.hedging import Hedger
+from agents.rate_limit import RateLimiter
+from agents.usage import usage_scope
+from config import config
+
+
+class SlowFirstCompletions:
+    """The first request takes `slow` seconds, later ones answer at once"""
+
+    def __init__(self, slow):
+        self.slow = slow
+        self.calls = 0
+        self.finished = threading.Event()
+        self._lock = threading.Lock()
+
+    def create(self, **request):
+        with self._lock:
+            self.calls += 1
+            first = self.calls == 1
+        if first:
+            time.sleep(self.slow)
+        usage = SimpleNamespace(prompt_tokens=100, completion_tokens=20, total_tokens=120, prompt_tokens_details=None)
+        response = SimpleNamespace(model=request["model"], usage=usage,
+                                   choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))])
+        if first:
+            self.finished.set()
+        return response
+
+
+class RecordingLimiter(RateLimiter):
+    def __init__(self):
+        super().__init__(limits={})
+        self.reconciled = []
+
+    def reconcile(self, model, estimated, actual):
+        self.reconciled.append(actual)
+
+
+def test_losing_hedge_is_charged_to_the_callers_ledger(monkeypatch):
+    monkeypatch.setattr(config, "HEDGE_MIN_SAMPLES", 1)
+    hedger = Hedger(percentile=0.5, budget=1.0, min_delay=0.05)
+    hedger.latency.observe("gpt-4o", 0.01)
+    completions = SlowFirstCompletions(slow=0.3)
+    limiter = RecordingLimiter()
+    monkeypatch.setattr(base, "hedger", hedger)
+    monkeypatch.setattr(base, "rate_limiter", limiter)
+    monkeypatch.setattr(base.LLMClient, "client", property(lambda self: SimpleNamespace(
+        chat=SimpleNamespace(completions=completions))))
+
+    with usage_scope() as ledger:
+        base.LLMClient(model="gpt-4o", agent_name="intent_agent", hedge=True).complete([{"role": "user", "content": "hi"}])
+    assert completions.finished.wait(2.0)
+    time.sleep(0.05)  # done-callback of the losing primary
+
+    by_agent = ledger.summary()["by_agent"]
+    assert hedger.stats()["hedge_wins"] == 1
+    assert by_agent["intent_agent"]["total_tokens"] == 120
+    assert by_agent["intent_agent:hedge"]["total_tokens"] == 120
+    assert limiter.reconciled == [120, 120]
@@ -0,0 +1,66 @@
+import json
+import threading
+
+from agents.batching import MicroBatcher
+from agents.cascade import cascade_stats
+from agents.intent_agent import IntentAgent
+from agents.usage import record_usage, usage_scope
+from config import config
+
+
+class FakeLLM:
+    """Answers a numbered batch prompt with one entry per item, recording 90/30 tokens per call"""
+
+    def __init__(self, model, confidence):
+        self.model = model
+        self.confidence = confidence
+        self.batches = []
+
+    def chat(self, messages, **kwargs):
+        prompt = messages[-1]["content"]
+        inputs = [line.split('"')[1] for line in prompt.splitlines() if line.startswith("**Current user input:**")]
+        self.batches.append(inputs)
+        record_usage("intent_agent", self.model, {"prompt_tokens": 90, "completion_tokens": 30}, 0.1)
+        results = [
+            {"index": number, "intent": f"intent_{text}", "confidence": self.confidence(text), "entities": {}}
+            for number, text in enumerate(inputs, start=1)
+        ]
+        return json.dumps({"results": results})
+
+
+def classify_concurrently(agent, inputs):
+    results, ledgers = {}, {}
+
+    def run(text):
+        with usage_scope() as ledger:
+            results[text] = agent.classify(text, [])
+        ledgers[text] = ledger
+
+    threads = [threading.Thread(target=run, args=(text,)) for text in inputs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, ledgers
+
+
+def test_batch_goes_through_the_cascade_and_splits_usage():
+    cascade_stats.reset()
+    small = FakeLLM("small-model", lambda text: 0.3 if text == "b" else 0.99)
+    large = FakeLLM("large-model", lambda text: 0.99)
+    agent = IntentAgent(large, settings=config.settings("en"), cascade_llm=small,
+                        batcher=MicroBatcher(window=5.0, max_size=3))
+
+    results, ledgers = classify_concurrently(agent, ["a", "b", "c"])
+
+    assert {text: result["intent"] for text, result in results.items()} == {"a": "intent_a", "b": "intent_b", "c": "intent_c"}
+    assert sorted(small.batches[0]) == ["a", "b", "c"]
+    assert large.batches == [["b"]]  # only the low-confidence entry is escalated
+    assert cascade_stats.summary()["intent_agent"]["reasons"] == {"low_confidence": 1}
+
+    # Each session is charged a third of both calls; together they add up to the full usage
+    summaries = [ledgers[text].summary() for text in "abc"]
+    assert all(summary["by_model"].keys() == {"small-model", "large-model"} for summary in summaries)
+    assert sum(summary["prompt_tokens"] for summary in summaries) == 2 * 90
+    assert sum(summary["completion_tokens"] for summary in summaries) == 2 * 30
+    assert all(summary["prompt_tokens"] == 60 for summary in summaries)
@@ -0,0 +1,51 @@
+import json
+
+from tools.jsonl_checkpoint import JsonlCheckpoint
+
+
+def write_torn_file(path, torn_tail: bytes):
+    with open(path, "wb") as f:
+        f.write(json.dumps({"id": "a", "status": "ok"}).encode("utf-8") + b"\n")
+        f.write(torn_tail)
+
+
+def test_append_after_torn_line_keeps_new_record(tmp_path):
+    path = tmp_path / "results.jsonl"
+    write_torn_file(path, b'{"id": "b", "status": "o')
+
+    checkpoint = JsonlCheckpoint(str(path))
+    checkpoint.append({"id": "c", "status": "ok"})
+
+    assert [record["id"] for record in checkpoint.load()] == ["a", "c"]
+    assert checkpoint.completed_ids() == {"a", "c"}
+
+
+def test_append_after_torn_multibyte_character(tmp_path):
+    path = tmp_path / "results.jsonl"
+    write_torn_file(path, '{"id": "b", "response": "환'.encode("utf-8")[:-1])
+
+    checkpoint = JsonlCheckpoint(str(path))
+    assert [record["id"] for record in checkpoint.load()] == ["a"]
+    checkpoint.append({"id": "c", "status": "ok"})
+
+    assert [record["id"] for record in checkpoint.load()] == ["a", "c"]
+
+
+def test_complete_record_without_newline_is_kept(tmp_path):
+    path = tmp_path / "results.jsonl"
+    write_torn_file(path, b'{"id": "b", "status": "ok"}')
+
+    checkpoint = JsonlCheckpoint(str(path))
+    checkpoint.append({"id": "c", "status": "ok"})
+
+    assert [record["id"] for record in checkpoint.load()] == ["a", "b", "c"]
+
+
+def test_latest_record_wins_on_resume(tmp_path):
+    checkpoint = JsonlCheckpoint(str(tmp_path / "results.jsonl"))
+    checkpoint.append({"id": "a", "status": "error"})
+    checkpoint.append({"id": "b", "status": "ok"})
+    checkpoint.append({"id": "a", "status": "ok"})
+
+    assert checkpoint.completed_ids() == {"a", "b"}
+    assert checkpoint.latest_by_id()["a"]["status"] == "ok"
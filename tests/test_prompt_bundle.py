@@ -0,0 +1,49 @@
+import pytest
+
+from config import config
+from prompts import weave_prompts
+from prompts.register_prompts import _write_bundle
+from prompts.weave_prompts import PromptCache, load_prompt_bundle, resolve_prompt
+
+
+@pytest.fixture
+def bundle_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "prompt_bundle.json")
+    monkeypatch.setattr(config, "PROMPT_BUNDLE_PATH", path)
+    return path
+
+
+def test_single_language_registration_keeps_other_languages(bundle_path):
+    _write_bundle(["ko", "en", "jp"], {"intent_classifier_ko": "weave:///team/project/object/intent_classifier_ko:v1"})
+    _write_bundle(["en"])
+
+    prompts = load_prompt_bundle(bundle_path)["prompts"]
+    assert {info["language"] for info in prompts.values()} == {"ko", "en", "jp"}
+    assert prompts["intent_classifier_ko"]["weave_ref"].endswith(":v1")
+
+
+@pytest.fixture
+def bundled(monkeypatch):
+    """A loaded bundle whose intent_classifier_en was published as v1; registry fetches are recorded"""
+    bundle = weave_prompts.build_prompt_bundle(["en"], {"intent_classifier_en": "weave:///t/p/object/intent_classifier_en:v1"})
+    fetched = []
+    monkeypatch.delenv("WEAVE_INIT_DISABLED")
+    monkeypatch.setattr(weave_prompts, "_prompt_bundle", bundle)
+    monkeypatch.setattr(weave_prompts, "_prompt_bundle_loaded", True)
+    monkeypatch.setattr(weave_prompts, "prompt_cache", PromptCache(ttl=0))
+    monkeypatch.setattr(weave_prompts, "fetch_weave_prompt",
+                        lambda name, version: (fetched.append((name, version)) or f"registry {version}", "weave"))
+    return fetched
+
+
+def test_bundle_serves_latest_and_its_own_version(bundled):
+    assert resolve_prompt("general_agent_system_en") != "registry latest"
+    assert resolve_prompt("intent_classifier_en", prompt_version="v1", current_date="2025-10-01") != "registry v1"
+    assert bundled == []
+
+
+def test_pinned_version_bypasses_a_different_bundle(bundled, monkeypatch):
+    assert resolve_prompt("intent_classifier_en", prompt_version="v2") == "registry v2"
+    monkeypatch.setattr(config, "PROMPT_VERSION", "v3")
+    assert resolve_prompt("order_agent_system_en") == "registry v3"
+    assert bundled == [("intent_classifier_en", "v2"), ("order_agent_system_en", "v3")]
@@ -0,0 +1,84 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import agents.base as base
+from agents.deadline import DeadlineExceeded, deadline_scope
+from agents.rate_limit import RateLimiter, SQLiteRateLimiter, reported_limits
+from config import DEFAULT_RATE_LIMITS, config
+
+
+def rate_limit_error(headers):
+    return SimpleNamespace(status_code=429, response=SimpleNamespace(headers=headers))
+
+
+def test_models_are_unlimited_by_default():
+    assert DEFAULT_RATE_LIMITS == {}
+    limiter = RateLimiter(limits={})
+    assert all(limiter.acquire("gpt-4o", 100000) == 0 for _ in range(1000))
+    assert limiter.stats()["delayed"] == 0
+
+
+def test_limits_reported_by_a_429_are_adopted():
+    limiter = RateLimiter(limits={})
+    error = rate_limit_error({"x-ratelimit-limit-requests": "60", "x-ratelimit-limit-tokens": "6000"})
+    assert reported_limits(error) == {"rpm": 60.0, "tpm": 6000.0}
+
+    limiter.throttle("gpt-4o", 0.0, reported_limits(error))
+    assert limiter.limits_for("gpt-4o") == {"rpm": 60.0, "tpm": 6000.0}
+    assert limiter.limits_for("gpt-4o-mini") is None
+
+
+def test_configured_limits_win_over_reported_ones():
+    limiter = RateLimiter(limits={"gpt-4o": {"rpm": 10, "tpm": 1000}})
+    limiter.throttle("gpt-4o", 0.0, {"rpm": 60.0, "tpm": 6000.0})
+    assert limiter.limits_for("gpt-4o") == {"rpm": 10, "tpm": 1000}
+
+
+def test_missing_or_bad_headers_report_nothing():
+    assert reported_limits(rate_limit_error({})) == {}
+    assert reported_limits(rate_limit_error({"x-ratelimit-limit-requests": "n/a"})) == {}
+    assert reported_limits(ValueError("no response")) == {}
+
+
+
+def test_waits_longer_than_max_wait_return_at_once_and_give_the_reservation_back():
+    limiter = RateLimiter(limits={"gpt-4o": {"tpm": 600}})  # 10 tokens/s, 600-token bucket
+    assert limiter.acquire("gpt-4o", 600) == 0.0
+
+    started = time.monotonic()
+    assert limiter.acquire("gpt-4o", 100, max_wait=1.0) == pytest.approx(10.0, abs=0.5)
+    assert time.monotonic() - started < 0.5
+    assert limiter.stats()["rejected"] == 1
+    # The rejected reservation was released: a small call only waits for its own tokens
+    assert limiter.acquire("gpt-4o", 2, max_wait=1.0) < 1.0
+
+
+def test_llm_call_fails_fast_when_the_rate_limit_wait_outlasts_the_deadline(monkeypatch):
+    limiter = RateLimiter(limits={"gpt-4o": {"tpm": 600}})
+    limiter.acquire("gpt-4o", 600)
+    monkeypatch.setattr(base, "rate_limiter", limiter)
+    monkeypatch.setattr(config, "OPENAI_API_KEY", "unused")  # the request never goes out
+
+    started = time.monotonic()
+    with deadline_scope(3.0), pytest.raises(DeadlineExceeded):
+        base.LLMClient(model="gpt-4o", agent_name="intent_agent").complete([{"role": "user", "content": "x" * 400}])
+    assert time.monotonic() - started < 1.0
+
+
+def test_retry_after_pauses_models_without_limits():
+    limiter = RateLimiter(limits={})
+    limiter.throttle("gpt-4o", 5.0, {})
+    assert limiter.acquire("gpt-4o", 100, max_wait=0) == pytest.approx(5.0, abs=0.5)
+    assert limiter.acquire("gpt-4o-mini", 100, max_wait=0) == 0.0
+
+
+def test_sqlite_backend_shares_pauses_and_learned_limits(tmp_path):
+    path = str(tmp_path / "rate_limits.db")
+    first, second = SQLiteRateLimiter(path, limits={}), SQLiteRateLimiter(path, limits={})
+
+    first.throttle("gpt-4o", 5.0, {"rpm": 60.0, "tpm": 6000.0})
+
+    assert second.acquire("gpt-4o", 100, max_wait=0) == pytest.approx(5.0, abs=0.5)
+    assert second.limits_for("gpt-4o") == {"rpm": 60.0, "tpm": 6000.0}
@@ -0,0 +1,136 @@
+import threading
+import time
+
+import pytest
+
+from simple_chatbot import ContextManager, ConversationTurn
+from tools import resp_stub_server
+from tools.session_store import (
+    SessionStore, MemorySessionStore, RespSessionStore, RespError, make_session_store
+)
+
+
+@pytest.fixture(scope="module")
+def resp_server():
+    server = resp_stub_server.make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=["memory", "sqlite", "resp"])
+def store(request, tmp_path, resp_server):
+    if request.param == "memory":
+        return MemorySessionStore()
+    if request.param == "sqlite":
+        return make_session_store(f"sqlite:///{tmp_path / 'sessions.db'}")
+    host, port = resp_server.server_address[:2]
+    return make_session_store(f"redis://{host}:{port}/0")
+
+
+def make_turn(index: int, padding: int = 0) -> ConversationTurn:
+    return ConversationTurn(user_input=f"question {index}", bot_response=f"answer {index}" + "." * padding,
+                            intent="refund_request", entities={"product": "cream"}, degraded=None)
+
+
+def test_session_store_is_abstract():
+    class Incomplete(SessionStore):
+        def create(self, session_id, meta):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_round_trip(store):
+    store.create("s1", {"language": "en", "current_date": "2025-10-01"})
+    assert store.get_meta("s1") == {"language": "en", "current_date": "2025-10-01"}
+    assert store.get_meta("missing") is None
+
+    for index in range(5):
+        # Every other turn is large enough to be zlib-compressed
+        assert store.append_turn("s1", make_turn(index, padding=2000 * (index % 2)).to_store_dict()) == index + 1
+
+    assert store.turn_count("s1") == 5
+    turns = store.load_turns("s1", 3)
+    assert [turn["user_input"] for turn in turns] == ["question 2", "question 3", "question 4"]
+    assert turns[1]["bot_response"] == "answer 3" + "." * 2000
+    assert store.load_turns("s1", 0) == []
+
+    assert store.delete("s1") is True
+    assert store.get_meta("s1") is None
+    assert store.turn_count("s1") == 0
+    assert store.delete("s1") is False
+
+
+def test_another_worker_resumes_the_session(store):
+    store.create("s2", {"language": "en"})
+    first_worker = ContextManager(store, "s2", window=3)
+    for index in range(5):
+        first_worker.add_turn(make_turn(index))
+
+    second_worker = ContextManager(store, "s2", window=3)
+    # Counted from the store before the history is loaded
+    assert second_worker.turn_count == 5
+    assert [turn.user_input for turn in second_worker.conversation_history] == ["question 2", "question 3", "question 4"]
+
+    second_worker.add_turn(make_turn(5))
+    first_worker.sync()
+    assert first_worker.turn_count == 6
+    assert first_worker.conversation_history[-1].user_input == "question 5"
+    assert len(first_worker.conversation_history) == 3
+
+
+def test_resp_error_reply_keeps_connection_in_sync(resp_server):
+    host, port = resp_server.server_address[:2]
+    store = RespSessionStore(host, port)
+    store._execute("SET", "plain-string", "x")
+
+    with pytest.raises(RespError):
+        # The error reply comes first; the remaining replies must still be read
+        store._pipeline(("RPUSH", "plain-string", "y"), ("SET", "after", "1"), ("GET", "after"))
+    assert store._execute("GET", "after") == b"1"
+    assert store._pipeline(("SET", "k", "v"), ("GET", "k")) == ["OK", b"v"]
+
+
+def test_one_turn_lease_per_session_across_workers(store):
+    store.create("s3", {"language": "en"})
+    token = store.acquire_lease("s3", ttl=30)
+    assert token is not None
+    # Another worker (or a second request) cannot start a turn on the session
+    assert store.acquire_lease("s3", ttl=30) is None
+    assert store.acquire_lease("other", ttl=30) is not None
+
+    store.release_lease("s3", "not-the-holder")
+    assert store.acquire_lease("s3", ttl=30) is None
+    store.release_lease("s3", token)
+    assert store.acquire_lease("s3", ttl=30) is not None
+
+
+def test_expired_lease_is_taken_over(store):
+    store.create("s4", {"language": "en"})
+    stale = store.acquire_lease("s4", ttl=0.05)
+    time.sleep(0.1)
+    token = store.acquire_lease("s4", ttl=30)
+    assert token is not None
+    # The worker that outlived its lease does not release the new holder's
+    store.release_lease("s4", stale)
+    assert store.acquire_lease("s4", ttl=30) is None
+
+
+def test_sessions_busy_on_another_worker_return_busy(tmp_path):
+    from chat_server import SessionBusy, SessionManager
+
+    url = f"sqlite:///{tmp_path / 'sessions.db'}"
+    first, second = SessionManager(store=make_session_store(url)), SessionManager(store=make_session_store(url))
+    session = first.create(language="en")
+    resumed = second.get(session.session_id)
+
+    first.acquire(session)
+    with pytest.raises(SessionBusy):
+        second.acquire(resumed)
+    assert resumed.busy is False
+    first.release(session)
+    second.acquire(resumed)
+    second.release(resumed)
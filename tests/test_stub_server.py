@@ -0,0 +1,29 @@
+import threading
+
+from agents.base import LLMClient
+from agents.batching import MicroBatcher
+from agents.intent_agent import IntentAgent
+from config import config
+
+
+def test_batched_intent_followers_get_their_own_entries(stub_server):
+    batcher = MicroBatcher(window=5.0, max_size=3)
+    agent = IntentAgent(LLMClient(model="gpt-4o-mini", agent_name="intent_agent"),
+                        settings=config.settings("en"), batcher=batcher)
+    order_ids = ["ORD20250819000", "ORD20250819001", "ORD20250819002"]
+    results = {}
+
+    def classify(order_id):
+        results[order_id] = agent.classify(f"Please refund {order_id}", [])
+
+    threads = [threading.Thread(target=classify, args=(order_id,)) for order_id in order_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert batcher.stats()["batches"] == 1
+    assert stub_server.state.counters["requests"] == 1
+    for order_id in order_ids:
+        assert results[order_id]["intent"] == "refund_inquiry"
+        assert results[order_id]["entities"]["order_id"] == order_id
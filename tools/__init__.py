@@ -0,0 +1,8 @@
+"""
+Tools Package - evaluation, benchmarking and serving utilities
+"""
+from .jsonl_checkpoint import JsonlCheckpoint
+
+__all__ = [
+    'JsonlCheckpoint'
+]
@@ -0,0 +1,112 @@
+"""
+Append-only JSONL checkpoint for long-running batch jobs
+
+각 케이스 결과를 완료 즉시 한 줄씩 기록하여, 중단된 실행을 이어서 재개하고
+부분 결과만으로도 집계를 계산할 수 있게 합니다.
+"""
+import os
+import json
+import threading
+from typing import Dict, List, Any, Set
+
+
+class JsonlCheckpoint:
+    """Thread-safe append-only JSONL result file"""
+
+    def __init__(self, path: str, id_field: str = "id"):
+        self.path = path
+        self.id_field = id_field
+        self._lock = threading.Lock()
+        self._tail_checked = False
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def reset(self):
+        """Start a fresh checkpoint (keeps the previous file as *.bak)"""
+        with self._lock:
+            self._tail_checked = False
+            if os.path.exists(self.path):
+                os.replace(self.path, self.path + ".bak")
+
+    def append(self, record: Dict[str, Any]):
+        """Append one record and flush it to disk immediately"""
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            if not self._tail_checked:
+                self._repair_tail()
+                self._tail_checked = True
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _repair_tail(self):
+        """Make the file end on a line boundary before the first append of this process
+
+        A crash mid-write leaves a torn last line; appending onto it would merge the next record
+        into a line load() drops. A complete record that only lacks its newline is kept.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            # Find the start of the unterminated last line
+            start = size
+            while start > 0:
+                step = min(4096, start)
+                f.seek(start - step)
+                chunk = f.read(step)
+                newline = chunk.rfind(b"\n")
+                if newline != -1:
+                    start = start - step + newline + 1
+                    break
+                start -= step
+            f.seek(start)
+            tail = f.read()
+            try:
+                json.loads(tail.decode("utf-8"))
+                f.write(b"\n")
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                print(f"⚠️  Warning: Dropping torn last line of {self.path} ({len(tail)} bytes)")
+                f.truncate(start)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Load all records, ignoring a torn trailing line from a crash"""
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        # A torn line may end inside a multi-byte character
+        with open(self.path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return records
+
+    def latest_by_id(self) -> Dict[str, Dict[str, Any]]:
+        """Latest record per case id (later lines win, e.g. retried cases)"""
+        latest = {}
+        for record in self.load():
+            case_id = record.get(self.id_field)
+            if case_id is not None:
+                latest[case_id] = record
+        return latest
+
+    def completed_ids(self) -> Set[str]:
+        """Ids whose latest record finished without error"""
+        return {
+            case_id for case_id, record in self.latest_by_id().items()
+            if record.get("status") == "ok"
+        }
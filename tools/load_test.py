@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Concurrent session load test for SimplifiedChatbot
+
+여러 개의 시뮬레이션 세션을 동시에 실행하여 처리량(turns/sec)과 턴 지연 분포를 측정합니다.
+실제 API 비용 없이 측정하려면 로컬 스텁 서버(tools/stub_server.py)를 함께 사용하세요.
+
+사용 예:
+    python tools/load_test.py --sessions 200 --concurrency 50 --embedded-stub
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Any
+
+from config import config
+from agents.latency import latency_recorder
+
+
+# Scripted conversations per language (greeting → recent orders → refund request)
+SESSION_SCRIPTS = {
+    "ko": ["안녕하세요", "최근 구매목록 3개 보여주세요", "키엘 크림 환불해주세요"],
+    "en": ["Hello", "Show me my recent 3 purchase list", "Please refund Kiehl's cream"],
+    "jp": ["こんにちは", "最近の購入リスト3つを見せてください", "キールズクリームを返品してください"]
+}
+
+
+def run_session(language: str, turns: List[str]) -> Dict[str, Any]:
+    """Run one scripted session and return per-turn latencies and failed/degraded turn counts
+
+    LLMClient.chat() turns API failures into an error reply instead of raising, so a turn also counts
+    as an error when its usage ledger holds a call that failed after all retries.
+    """
+    from simple_chatbot import SimplifiedChatbot
+
+    chatbot = SimplifiedChatbot(language=language)
+    latencies = []
+    errors = 0
+    degraded = 0
+    for user_input in turns:
+        turn_count = chatbot.context_manager.turn_count
+        start = time.perf_counter()
+        try:
+            chatbot.chat(user_input)
+        except Exception:
+            errors += 1
+            latencies.append(time.perf_counter() - start)
+            continue
+        latencies.append(time.perf_counter() - start)
+        context = chatbot.context_manager
+        turn = context.conversation_history[-1] if context.turn_count > turn_count else None
+        if turn is None or (turn.usage or {}).get("failed_calls"):
+            errors += 1
+        if turn is not None and turn.degraded:
+            degraded += 1
+    return {"language": language, "latencies": latencies, "errors": errors, "degraded": degraded}
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent SimplifiedChatbot load test")
+    parser.add_argument("--sessions", type=int, default=100, help="Total simulated sessions")
+    parser.add_argument("--concurrency", type=int, default=20, help="Sessions running at the same time")
+    parser.add_argument("--languages", default="ko,en,jp", help="Comma-separated languages to mix")
+    parser.add_argument("--embedded-stub", action="store_true", help="Start tools/stub_server.py in-process")
+    parser.add_argument("--stub-config", default=None, help="Stub server JSON config (with --embedded-stub)")
+    args = parser.parse_args()
+
+    os.environ.setdefault("WEAVE_INIT_DISABLED", "1")
+
+    server = None
+    if args.embedded_stub:
+        from tools.stub_server import make_server, load_stub_config
+        server = make_server(port=0, stub_config=load_stub_config(args.stub_config))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address[:2]
+        config.OPENAI_BASE_URL = f"http://{host}:{port}/v1"
+        config.OPENAI_API_KEY = config.OPENAI_API_KEY or "stub"
+        print(f"🧪 Embedded stub server at {config.OPENAI_BASE_URL}")
+
+    languages = [lang.strip() for lang in args.languages.split(",") if lang.strip() in config.SUPPORTED_LANGUAGES]
+    print(f"🚦 {args.sessions} sessions, concurrency {args.concurrency}, languages {languages}")
+
+    all_latencies = []
+    total_errors = 0
+    total_degraded = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [
+            pool.submit(run_session, languages[i % len(languages)], SESSION_SCRIPTS[languages[i % len(languages)]])
+            for i in range(args.sessions)
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            all_latencies.extend(result["latencies"])
+            total_errors += result["errors"]
+            total_degraded += result["degraded"]
+    elapsed = time.perf_counter() - started
+
+    all_latencies.sort()
+    print("\n📊 Load test results")
+    print(f"   Turns: {len(all_latencies)} in {elapsed:.2f}s → {len(all_latencies) / elapsed:.1f} turns/sec")
+    print(f"   Turn latency p50={percentile(all_latencies, 0.5):.3f}s "
+          f"p95={percentile(all_latencies, 0.95):.3f}s p99={percentile(all_latencies, 0.99):.3f}s")
+    failed_attempts = sum(entry["count"] for entry in latency_recorder.snapshot()
+                          if entry["stage"] == "llm_network" and entry["error"])
+    print(f"   Errors: {total_errors} turns with failed LLM calls or exceptions, {total_degraded} degraded turns, "
+          f"{failed_attempts} failed LLM attempts (including retried ones)")
+    print("\n⏱️ Stage breakdown (all models/languages)")
+    stage_totals = {}
+    for entry in latency_recorder.snapshot():
+        stage = f"{entry['stage']}_failed" if entry["error"] else entry["stage"]
+        stage_totals.setdefault(stage, []).append(entry)
+    for stage, entries in sorted(stage_totals.items()):
+        count = sum(entry["count"] for entry in entries)
+        p95 = max(entry["p95_sec"] for entry in entries)
+        print(f"   {stage:<16} n={count:<6} worst p95={p95:.3f}s")
+    latency_recorder.export_configured()
+    if server is not None:
+        print(f"   Stub counters: {server.state.counters}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Pipeline-overhead micro-benchmark with a null LLM
+
+지연 시간 0의 가짜 OpenAI 클라이언트(에이전트별 고정 JSON 응답)로 SimplifiedChatbot.chat을 실행하여
+LLM 호출을 제외한 순수 파이썬 오버헤드(컨텍스트 구성, JSON 직렬화, 프롬프트 포맷팅, _create_agent_output,
+Weave op 래핑 등)를 턴 단위로 측정합니다. 대화 히스토리 길이, 계획 단계 수, 주문 수를 하나씩 늘려 가며 측정하고
+기준선(baseline) 파일과 비교해 회귀를 찾습니다.
+
+LLMClient.complete 경로(재시도, 사용량 기록, 지연 시간 기록)는 그대로 실행되며, 네트워크만 가짜 클라이언트로 대체됩니다.
+레이트 리미터는 초당 수천 건의 가짜 호출을 지연시키지 않도록 비활성화하고, 긴 계획이 잘리지 않도록 턴 마감을 넉넉히 둡니다.
+
+사용 예:
+    python tools/overhead_benchmark.py                    # measure and compare with the baseline
+    python tools/overhead_benchmark.py --profile 20       # + 20 hottest functions of the base scenario
+    python tools/overhead_benchmark.py --write-baseline   # record current numbers as the baseline
+"""
+import sys
+import os
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+import json
+import time
+import pstats
+import argparse
+import cProfile
+import statistics
+from types import SimpleNamespace
+from typing import Dict, List, Any, Tuple
+
+
+DEFAULT_BASELINE_PATH = os.path.join(ROOT_DIR, "tools", "overhead_baseline.json")
+
+# Base scenario; each sweep grows one dimension while the others stay at these values
+BASE_SCENARIO = {"history": 0, "plan_steps": 2, "orders": 10}
+SWEEPS = {
+    "history": [0, 5, 20, 50],
+    "plan_steps": [1, 2, 4, 8],
+    "orders": [10, 100, 1000, 5000],  # last: orders are only ever added to the shared store
+}
+
+# Question per language that goes through intent → planning → order/refund agents
+BENCHMARK_INPUTS = {
+    "ko": "칫솔 주문 환불해주세요",
+    "en": "Please refund my Toothbrush order",
+    "jp": "歯ブラシの注文を返品してください",
+}
+
+PLAN_AGENTS = ["order_agent", "refund_agent", "general_agent"]
+
+
+class NullCompletions:
+    """chat.completions.create that answers instantly with the stub server's canned content"""
+
+    def __init__(self):
+        self.plan_steps = BASE_SCENARIO["plan_steps"]
+        self.calls = 0
+
+    def create(self, model: str, messages: List[Dict[str, Any]], **kwargs) -> SimpleNamespace:
+        from tools.stub_server import detect_prompt_type, batch_intent_content, CANNED_RESPONSES
+
+        self.calls += 1
+        prompt_type = detect_prompt_type(messages)
+        if prompt_type == "planning":
+            content = json.dumps({
+                "plan_type": "multi_step" if self.plan_steps > 1 else "single_agent",
+                "reason": "null llm plan",
+                "steps": [
+                    {"step_id": step + 1, "agent": PLAN_AGENTS[step % len(PLAN_AGENTS)], "purpose": "benchmark",
+                     "parameters": {"context_from_previous": step > 0}}
+                    for step in range(self.plan_steps)
+                ],
+                "expected_outcome": "benchmark"
+            })
+        elif prompt_type == "intent_batch":
+            content = batch_intent_content(messages, CANNED_RESPONSES["intent"])
+        else:
+            content = CANNED_RESPONSES[prompt_type]
+        usage = SimpleNamespace(prompt_tokens=100, completion_tokens=20, total_tokens=120, prompt_tokens_details=None)
+        return SimpleNamespace(model=model, usage=usage,
+                               choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def install_null_llm() -> NullCompletions:
+    """Route every LLMClient to the null client, switch off rate limiting and hedging, and relax the turn deadline"""
+    import agents.base as base
+    from config import config, Config
+
+    completions = NullCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    base.LLMClient.client = property(lambda self: client)
+    base.rate_limiter = None
+    config.HEDGE_ENABLED = False
+    # Deadline checks still run, but long plans must not be trimmed by the per-step reserve
+    Config.TURN_DEADLINE = 3600.0  # read by Config.settings()
+    return completions
+
+
+def grow_order_store(language: str, count: int):
+    """Add synthetic copies of the language's orders until the shared store holds `count` orders"""
+    from agents.order_store import get_order_store
+
+    store = get_order_store(language)
+    templates = list(store.orders[:10])
+    while len(store.orders) < count:
+        order = dict(templates[len(store.orders) % len(templates)])
+        order["order_id"] = f"BENCH{len(store.orders):08d}"
+        store.upsert_order(order)
+
+
+def measure_scenario(language: str, scenario: Dict[str, int], completions: NullCompletions,
+                     turns: int, warmup: int, repeats: int = 1) -> Dict[str, Any]:
+    """Mean/p50/p95 turn time and mean stage timings with a fixed history length (round with the lowest p50)"""
+    rounds = [_measure_round(language, scenario, completions, turns, warmup) for _ in range(max(1, repeats))]
+    return min(rounds, key=lambda result: result["p50_ms"])
+
+
+def _measure_round(language: str, scenario: Dict[str, int], completions: NullCompletions,
+                   turns: int, warmup: int) -> Dict[str, Any]:
+    from simple_chatbot import SimplifiedChatbot
+
+    grow_order_store(language, scenario["orders"])
+    completions.plan_steps = scenario["plan_steps"]
+    chatbot = SimplifiedChatbot(language=language)
+    user_input = BENCHMARK_INPUTS[language]
+    for _ in range(scenario["history"]):
+        chatbot.chat(user_input)
+    history = chatbot.context_manager.conversation_history
+
+    samples, stage_samples = [], {}
+    calls_before = completions.calls
+    for index in range(warmup + turns):
+        started = time.perf_counter()
+        chatbot.chat(user_input)
+        elapsed = (time.perf_counter() - started) * 1000
+        turn = history[-1]
+        del history[scenario["history"]:]  # keep the history length fixed
+        if index < warmup:
+            continue
+        samples.append(elapsed)
+        for stage, value in (turn.timings or {}).items():
+            if isinstance(value, (int, float)):
+                stage_samples.setdefault(stage, []).append(value)
+
+    samples.sort()
+    return {
+        **scenario,
+        "mean_ms": round(statistics.mean(samples), 3),
+        "p50_ms": round(samples[len(samples) // 2], 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 3),
+        "llm_calls_per_turn": round((completions.calls - calls_before) / (warmup + turns), 2),
+        "stages_ms": {stage: round(statistics.mean(values), 3) for stage, values in sorted(stage_samples.items())},
+    }
+
+
+def scenarios() -> List[Tuple[str, Dict[str, int]]]:
+    """(name, scenario) for every sweep point, base scenario first"""
+    result = [("base", dict(BASE_SCENARIO))]
+    for dimension, values in SWEEPS.items():
+        for value in values:
+            scenario = {**BASE_SCENARIO, dimension: value}
+            if scenario != BASE_SCENARIO:
+                result.append((f"{dimension}={value}", scenario))
+    return result
+
+
+def profile_base(language: str, completions: NullCompletions, turns: int, top: int):
+    """cProfile of base-scenario turns, hottest functions by own time"""
+    from simple_chatbot import SimplifiedChatbot
+
+    completions.plan_steps = BASE_SCENARIO["plan_steps"]
+    chatbot = SimplifiedChatbot(language=language)
+    chatbot.chat(BENCHMARK_INPUTS[language])
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for _ in range(turns):
+        chatbot.chat(BENCHMARK_INPUTS[language])
+        del chatbot.context_manager.conversation_history[1:]
+    profiler.disable()
+    print(f"\n🔬 Hottest functions ({turns} base turns, by own time)")
+    pstats.Stats(profiler, stream=sys.stdout).strip_dirs().sort_stats("tottime").print_stats(top)
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SimplifiedChatbot per-turn overhead with a zero-latency LLM")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--turns", type=int, default=50, help="Measured turns per round")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured turns per round")
+    parser.add_argument("--repeats", type=int, default=3, help="Rounds per scenario (the fastest p50 is kept)")
+    parser.add_argument("--with-weave", action="store_true", help="Initialize Weave and trace the agent ops")
+    parser.add_argument("--weave-project", default="retail-chatbot-dev", help="Weave project for --with-weave")
+    parser.add_argument("--profile", type=int, default=0, metavar="N", help="Show the N hottest functions of the base scenario")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="Baseline JSON file")
+    parser.add_argument("--write-baseline", action="store_true", help="Write the current results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p50_ms regression (0.25 = +25%%)")
+    parser.add_argument("--output", default=os.path.join("eval_results", "overhead_benchmark.json"))
+    args = parser.parse_args()
+
+    if not args.with_weave:
+        os.environ["WEAVE_INIT_DISABLED"] = "1"
+    os.chdir(ROOT_DIR)  # data paths are relative to the repository root
+    from config import config
+    if args.language not in config.SUPPORTED_LANGUAGES:
+        parser.error(f"Unsupported language: {args.language}")
+
+    completions = install_null_llm()
+    if args.with_weave:
+        # Ops only trace (and cost what they cost in production) with an initialized client
+        import weave
+        weave.init(args.weave_project)
+    from agents.language_pack import prewarm
+    prewarm([args.language])
+
+    print(f"\n🧮 Per-turn overhead (null LLM, language={args.language}, weave={'on' if args.with_weave else 'off'}, "
+          f"{args.repeats}×{args.turns} turns/scenario)")
+    results = {"language": args.language, "weave": args.with_weave, "scenarios": {}}
+    for name, scenario in scenarios():
+        result = measure_scenario(args.language, scenario, completions, args.turns, args.warmup, args.repeats)
+        results["scenarios"][name] = result
+        top_stages = sorted(((stage, value) for stage, value in result["stages_ms"].items() if stage != "turn_total"),
+                            key=lambda item: item[1], reverse=True)[:3]
+        print(f"   {name:<16} p50={result['p50_ms']:>8.3f} ms  mean={result['mean_ms']:>8.3f} ms  p95={result['p95_ms']:>8.3f} ms  "
+              f"llm calls={result['llm_calls_per_turn']:<4} top stages: "
+              + ", ".join(f"{stage}={value:.2f}" for stage, value in top_stages))
+
+    if args.profile:
+        profile_base(args.language, completions, args.turns, args.profile)
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Results saved to {args.output}")
+
+    if args.write_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"💾 Baseline written to {args.baseline}")
+        return
+
+    baseline = load_baseline(args.baseline).get("scenarios", {})
+    if not baseline:
+        print(f"ℹ️  No baseline at {args.baseline}; run with --write-baseline to record one")
+        return
+    regressed = False
+    print(f"\n⏱️ Median turn vs baseline (tolerance +{args.tolerance:.0%})")
+    for name, result in results["scenarios"].items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        ok = result["p50_ms"] <= reference["p50_ms"] * (1 + args.tolerance)
+        regressed = regressed or not ok
+        change = result["p50_ms"] / reference["p50_ms"] - 1 if reference["p50_ms"] else 0.0
+        print(f"   {'✅' if ok else '❌'} {name:<16} {result['p50_ms']:>8.3f} ms  "
+              f"(baseline {reference['p50_ms']:.3f} ms, {change:+.0%})")
+    if regressed:
+        print("\n❌ Pipeline overhead regressed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
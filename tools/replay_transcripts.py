@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Offline bulk conversation replay over JSONL transcripts
+
+과거 고객 대화 기록(JSONL 한 줄당 대화 하나)을 SimplifiedChatbot으로 재생하여 회귀 검증과 용량 테스트에 사용합니다.
+프로세스 풀의 각 워커는 언어 팩과 에이전트를 미리 준비(prewarm)해 두고, 대화별 응답·지연 시간·토큰 사용량을
+결과 JSONL에 완료 즉시 기록합니다. --shard i/n 은 대화 ID의 해시로 나누므로 여러 머신에 결정적으로 분배됩니다.
+
+입력 형식 (한 줄):
+    {"conversation_id": "c-001", "language": "en", "turns": ["Hello", {"user": "Refund my cream", "bot": "..."}]}
+    {"id": "c-002", "language": "ko", "messages": [{"role": "user", "content": "..."}, {"role": "assistant", "content": "..."}]}
+
+사용 예:
+    python tools/replay_transcripts.py transcripts.jsonl -o eval_results/replay.jsonl --workers 8 --shard 0/4
+    python tools/replay_transcripts.py transcripts.jsonl --embedded-stub --limit 1000
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import time
+import zlib
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+from config import config
+from tools.jsonl_checkpoint import JsonlCheckpoint
+from tools.load_test import percentile
+
+
+def conversation_id(conversation: Dict[str, Any], line_number: int) -> str:
+    for key in ("conversation_id", "id", "request_id"):
+        if conversation.get(key) is not None:
+            return str(conversation[key])
+    return f"line-{line_number}"
+
+
+def normalize_turns(conversation: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """User turns as {"user", "bot" (recorded reply, optional), "order_info" (optional)}"""
+    if "turns" in conversation:
+        return [turn if isinstance(turn, dict) else {"user": str(turn)} for turn in conversation["turns"]]
+    turns = []
+    for message in conversation.get("messages", []):
+        if message.get("role") == "user":
+            turns.append({"user": message.get("content", "")})
+        elif message.get("role") == "assistant" and turns:
+            turns[-1]["bot"] = message.get("content", "")
+    return turns
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """"i/n" → (i, n) with 0 <= i < n"""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Shard must look like i/n, got {value!r}")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"Shard index must be in [0, {count}), got {index}")
+    return index, count
+
+
+def in_shard(conversation_key: str, shard: Tuple[int, int]) -> bool:
+    """Stable across processes and machines (unlike hash())"""
+    index, count = shard
+    return zlib.crc32(conversation_key.encode("utf-8")) % count == index
+
+
+def read_conversations(path: str, shard: Tuple[int, int] = (0, 1), skip_ids=frozenset(),
+                       limit: int = None) -> Iterator[Dict[str, Any]]:
+    """Conversations of this shard, streamed line by line"""
+    yielded = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                conversation = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"⚠️  Warning: Skipping line {line_number}: {e}")
+                continue
+            conversation["_id"] = conversation_id(conversation, line_number)
+            if not in_shard(conversation["_id"], shard) or conversation["_id"] in skip_ids:
+                continue
+            yield conversation
+            yielded += 1
+            if limit is not None and yielded >= limit:
+                return
+
+
+# --- worker process ------------------------------------------------------------
+def init_worker(languages: List[str], base_url: Optional[str], api_key: Optional[str]):
+    """Point the worker at the same endpoint as the parent and warm its language packs and agents"""
+    os.environ.setdefault("WEAVE_INIT_DISABLED", "1")
+    if base_url:
+        config.OPENAI_BASE_URL = base_url
+    if api_key:
+        config.OPENAI_API_KEY = api_key
+    from agents.language_pack import prewarm
+    prewarm(languages)
+
+
+def replay_conversation(conversation: Dict[str, Any]) -> Dict[str, Any]:
+    """Replay one conversation's user turns and collect replies, latencies and usage"""
+    from simple_chatbot import SimplifiedChatbot
+
+    language = conversation.get("language") or config.LANGUAGE
+    record = {"id": conversation["_id"], "language": language, "worker": os.getpid(), "turns": []}
+    started = time.perf_counter()
+    try:
+        settings = config.settings(language, current_date=conversation.get("current_date") or config.CURRENT_DATE,
+                                   turn_deadline=config.EVAL_TURN_DEADLINE)
+        chatbot = SimplifiedChatbot(language=language, settings=settings)
+        for turn in normalize_turns(conversation):
+            turn_started = time.perf_counter()
+            response = chatbot.chat(turn["user"], turn.get("order_info") or conversation.get("order_info"))
+            history = chatbot.context_manager.conversation_history
+            last = history[-1] if history else None
+            record["turns"].append({
+                "user": turn["user"],
+                "response": response,
+                "reference": turn.get("bot"),
+                "intent": last.intent if last else None,
+                "latency_sec": round(time.perf_counter() - turn_started, 4),
+                "timings": last.timings if last else None,
+                "usage": last.usage if last else None,
+                "degraded": last.degraded if last else None,
+            })
+        record["usage"] = chatbot.session_usage.summary()
+        record["status"] = "ok"
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["latency_sec"] = round(time.perf_counter() - started, 4)
+    return record
+
+
+# --- parent process ------------------------------------------------------------
+def summarize(records: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    turn_latencies = sorted(turn["latency_sec"] for record in records for turn in record["turns"])
+    usage = [record.get("usage") or {} for record in records]
+    return {
+        "conversations": len(records),
+        "errors": sum(1 for record in records if record["status"] != "ok"),
+        "turns": len(turn_latencies),
+        "turns_per_sec": round(len(turn_latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        "turn_latency_sec": {
+            "p50": percentile(turn_latencies, 0.5),
+            "p95": percentile(turn_latencies, 0.95),
+            "p99": percentile(turn_latencies, 0.99),
+        },
+        "total_tokens": sum(entry.get("total_tokens", 0) for entry in usage),
+        "cost_usd": round(sum(entry.get("cost_usd", 0.0) for entry in usage), 6),
+    }
+
+
+def run_replay(input_path: str, output_path: str, workers: int, shard: Tuple[int, int] = (0, 1),
+               languages: List[str] = None, resume: bool = False, limit: int = None) -> Dict[str, Any]:
+    """Replay this shard's conversations in a process pool, appending each result as it finishes"""
+    checkpoint = JsonlCheckpoint(output_path)
+    skip_ids = frozenset()
+    if resume:
+        skip_ids = frozenset(checkpoint.completed_ids())
+        print(f"⏩ Resuming {output_path}: {len(skip_ids)} conversations already done")
+    else:
+        checkpoint.reset()
+
+    conversations = read_conversations(input_path, shard, skip_ids, limit)
+    max_in_flight = workers * 4  # bounded read-ahead keeps memory flat for large transcript files
+    records = []
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(languages or list(config.SUPPORTED_LANGUAGES),
+                                       config.OPENAI_BASE_URL, config.OPENAI_API_KEY)) as pool:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < max_in_flight:
+                conversation = next(conversations, None)
+                if conversation is None:
+                    exhausted = True
+                else:
+                    pending.add(pool.submit(replay_conversation, conversation))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                record = future.result()
+                checkpoint.append(record)
+                records.append({"status": record["status"], "usage": record.get("usage"),
+                                "turns": [{"latency_sec": turn["latency_sec"]} for turn in record["turns"]]})
+                if len(records) % 100 == 0:
+                    print(f"   🔁 {len(records)} conversations replayed ({time.perf_counter() - started:.1f}s)")
+    return summarize(records, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay JSONL conversation transcripts through SimplifiedChatbot")
+    parser.add_argument("input", help="Transcript JSONL (one conversation per line)")
+    parser.add_argument("-o", "--output", default=None,
+                        help=f"Results JSONL (default: {config.EVAL_RESULTS_DIR}/replay_<input>[_shard-i-of-n].jsonl)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Worker processes")
+    parser.add_argument("--shard", type=parse_shard, default=(0, 1), help="Replay only shard i of n (0-based), e.g. 2/8")
+    parser.add_argument("--languages", default=",".join(config.SUPPORTED_LANGUAGES), help="Languages to pre-warm per worker")
+    parser.add_argument("--limit", type=int, default=None, help="Replay at most this many conversations of the shard")
+    parser.add_argument("--resume", action="store_true", help="Skip conversations already completed in the output file")
+    parser.add_argument("--embedded-stub", action="store_true", help="Start tools/stub_server.py in-process")
+    parser.add_argument("--stub-config", default=None, help="Stub server JSON config (with --embedded-stub)")
+    args = parser.parse_args()
+
+    os.environ.setdefault("WEAVE_INIT_DISABLED", "1")
+    index, count = args.shard
+    output = args.output
+    if output is None:
+        name = os.path.splitext(os.path.basename(args.input))[0]
+        suffix = f"_shard-{index}-of-{count}" if count > 1 else ""
+        output = os.path.join(config.EVAL_RESULTS_DIR, f"replay_{name}{suffix}.jsonl")
+
+    server = None
+    if args.embedded_stub:
+        from tools.stub_server import make_server, load_stub_config
+        server = make_server(port=0, stub_config=load_stub_config(args.stub_config))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address[:2]
+        config.OPENAI_BASE_URL = f"http://{host}:{port}/v1"
+        config.OPENAI_API_KEY = config.OPENAI_API_KEY or "stub"
+        print(f"🧪 Embedded stub server at {config.OPENAI_BASE_URL}")
+
+    languages = [lang.strip() for lang in args.languages.split(",") if lang.strip() in config.SUPPORTED_LANGUAGES]
+    print(f"🔁 Replaying {args.input} (shard {index}/{count}) with {args.workers} workers → {output}")
+    if args.workers > 1 and config.RATE_LIMIT_BACKEND == "local":
+        print("⚠️  Warning: RATE_LIMIT_BACKEND=local limits each worker separately; "
+              "use sqlite:///.cache/rate_limits.db to share the limits")
+    summary = run_replay(args.input, output, args.workers, args.shard, languages, args.resume, args.limit)
+    print(f"📊 Replay summary: {json.dumps(summary, ensure_ascii=False, indent=2)}")
+    print(f"💾 Results: {output}")
+    if server is not None:
+        print(f"   Stub counters: {server.state.counters}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Local Redis-protocol (RESP2) stub server for the session store
+
+Redis 없이 RespSessionStore를 개발/테스트할 수 있도록 세션 저장소가 사용하는 명령만 구현한 메모리 서버입니다.
+만료(EX/EXPIRE)는 키에 접근할 때 확인합니다. 운영 환경에서는 실제 Redis를 사용하세요.
+
+지원 명령: PING, AUTH, SELECT, SET [EX|PX] [NX], GET, DEL, EXISTS, EXPIRE, RPUSH, LRANGE, LLEN, FLUSHALL
+
+사용 예:
+    python tools/resp_stub_server.py --port 6390
+    python chat_server.py --session-store redis://127.0.0.1:6390/0
+"""
+import time
+import argparse
+import threading
+import socketserver
+from typing import Dict, List, Any, Optional
+
+
+class RespStubState:
+    """Keyspace shared by all connections (values are bytes or lists of bytes)"""
+
+    def __init__(self):
+        self.data: Dict[bytes, Any] = {}
+        self.expires: Dict[bytes, float] = {}
+        self.lock = threading.Lock()
+
+    def _alive(self, key: bytes) -> bool:
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def execute(self, args: List[bytes]):
+        """Run one command; returns a reply value or raises ValueError for error replies"""
+        command = args[0].upper().decode("ascii", "replace")
+        handler = getattr(self, f"cmd_{command.lower()}", None)
+        if handler is None:
+            raise ValueError(f"ERR unknown command '{command}'")
+        with self.lock:
+            return handler(*args[1:])
+
+    def cmd_ping(self, *args):
+        return args[0] if args else "PONG"
+
+    def cmd_auth(self, *args):
+        return "OK"
+
+    def cmd_select(self, db):
+        return "OK"
+
+    def cmd_set(self, key, value, *options):
+        options = [option.upper() for option in options]
+        if b"NX" in options and self._alive(key):
+            return None
+        self.data[key] = value
+        self.expires.pop(key, None)
+        for unit, scale in ((b"EX", 1.0), (b"PX", 0.001)):
+            if unit in options:
+                self.expires[key] = time.monotonic() + int(options[options.index(unit) + 1]) * scale
+        return "OK"
+
+    def cmd_get(self, key):
+        if not self._alive(key):
+            return None
+        value = self.data[key]
+        if isinstance(value, list):
+            raise ValueError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def cmd_del(self, *keys):
+        deleted = 0
+        for key in keys:
+            if self._alive(key):
+                del self.data[key]
+                self.expires.pop(key, None)
+                deleted += 1
+        return deleted
+
+    def cmd_exists(self, *keys):
+        return sum(1 for key in keys if self._alive(key))
+
+    def cmd_expire(self, key, seconds):
+        if not self._alive(key):
+            return 0
+        self.expires[key] = time.monotonic() + int(seconds)
+        return 1
+
+    def _list(self, key) -> Optional[list]:
+        if not self._alive(key):
+            return None
+        value = self.data[key]
+        if not isinstance(value, list):
+            raise ValueError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def cmd_rpush(self, key, *values):
+        items = self._list(key)
+        if items is None:
+            items = self.data[key] = []
+        items.extend(values)
+        return len(items)
+
+    def cmd_lrange(self, key, start, stop):
+        items = self._list(key) or []
+        start, stop = int(start), int(stop)
+        length = len(items)
+        start = max(start + length, 0) if start < 0 else start
+        stop = stop + length if stop < 0 else min(stop, length - 1)
+        return items[start:stop + 1] if start <= stop else []
+
+    def cmd_llen(self, key):
+        items = self._list(key)
+        return len(items) if items is not None else 0
+
+    def cmd_flushall(self, *args):
+        self.data.clear()
+        self.expires.clear()
+        return "OK"
+
+
+def encode_reply(value) -> bytes:
+    if isinstance(value, str):
+        return b"+" + value.encode("utf-8") + b"\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(encode_reply(item) for item in value)
+    raise TypeError(f"Cannot encode {type(value)}")
+
+
+class RespRequestHandler(socketserver.StreamRequestHandler):
+    """Reads RESP arrays of bulk strings (and inline commands) until the client disconnects"""
+
+    state: RespStubState = None  # bound by make_server()
+
+    def _read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()  # inline command, e.g. `PING` via telnet
+        args = []
+        for _ in range(int(line[1:-2])):
+            header = self.rfile.readline()
+            length = int(header[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        while True:
+            try:
+                args = self._read_command()
+            except (ConnectionError, ValueError):
+                return
+            if args is None:
+                return
+            if not args:
+                continue
+            try:
+                reply = encode_reply(self.state.execute(args))
+            except (ValueError, TypeError) as e:
+                reply = b"-" + str(e).encode("utf-8") + b"\r\n"
+            self.wfile.write(reply)
+
+
+class RespStubServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def make_server(host: str = "127.0.0.1", port: int = 6390) -> RespStubServer:
+    """Create (but do not start) a RESP stub server; port 0 picks a free port"""
+    state = RespStubState()
+    handler = type("BoundRespRequestHandler", (RespRequestHandler,), {"state": state})
+    server = RespStubServer((host, port), handler)
+    server.state = state
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Redis-protocol stub server for session stores")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"🧪 RESP stub server listening on redis://{host}:{port}/0")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 RESP stub server stopped.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Order data serialization benchmark
+
+주문 데이터 인코딩(agents/serialization.py)별 프롬프트 토큰 수와
+evaluate_refund.json 기준 환불 판단 정확도를 비교합니다.
+토큰 수는 tiktoken이 설치되어 있으면 모델 토크나이저로, 없으면 근사치(약 4글자/토큰)로 계산합니다.
+
+사용 예:
+    python tools/serialization_benchmark.py                       # token counts only
+    python tools/serialization_benchmark.py --accuracy --languages en --limit 20
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Any
+
+from config import config, settings_scope
+from agents.serialization import SERIALIZERS, serialize_records
+
+
+def get_token_counter(model: str) -> Callable[[str], int]:
+    """tiktoken counter for the model, or a ~4 chars/token estimate without tiktoken"""
+    try:
+        import tiktoken
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text))
+    except ImportError:
+        print("⚠️  tiktoken not installed; using approximate token counts")
+        from tools.stub_server import estimate_tokens
+        return estimate_tokens
+
+
+def load_payloads(language: str) -> Dict[str, List[List[Dict[str, Any]]]]:
+    """Order lists exactly as OrderAgent embeds them (20 history orders, single eval orders)"""
+    from agents.base import LLMClient
+    from agents.order_agent import OrderAgent
+    from evaluate_chatbot import load_evaluation_dataset
+
+    agent = OrderAgent(LLMClient(model=config.ORDER_AGENT_MODEL, agent_name="order_agent"), language)
+    return {
+        "purchase_history": [agent.order_store.enriched(limit=20)],
+        "eval_order_info": [[agent._cal_days_since_delivery(example["order_info"])]
+                            for example in load_evaluation_dataset(language)]
+    }
+
+
+def measure_tokens(languages: List[str], encodings: List[str], count_tokens: Callable[[str], int]) -> Dict[str, Any]:
+    """Mean payload tokens per language, payload kind and encoding"""
+    results = {}
+    for language in languages:
+        results[language] = {}
+        for payload_name, payloads in load_payloads(language).items():
+            results[language][payload_name] = {
+                encoding: round(sum(count_tokens(serialize_records(orders, encoding)) for orders in payloads) / len(payloads), 1)
+                for encoding in encodings
+            }
+    return results
+
+
+def measure_accuracy(language: str, encoding: str, limit: int = None) -> Dict[str, Any]:
+    """Run the refund evaluation cases through the chatbot with one encoding"""
+    from evaluate_chatbot import RefundChatbotModel, load_evaluation_dataset, refund_accuracy_evaluation
+
+    settings = config.settings(language, order_data_format=encoding)
+    examples = load_evaluation_dataset(language)[:limit]
+    model = RefundChatbotModel(language=language)
+
+    def run_case(example: Dict[str, Any]) -> Dict[str, Any]:
+        with settings_scope(settings):
+            output = model.predict(example["user_query"], example["order_info"], language)
+            score = refund_accuracy_evaluation(example["target"], output)
+        order_usage = (output.get("usage") or {}).get("by_agent", {}).get("order_agent", {})
+        return {"accuracy": float(score.get("accuracy", 0.0)), "order_prompt_tokens": order_usage.get("prompt_tokens", 0)}
+
+    with ThreadPoolExecutor(max_workers=config.EVAL_CONCURRENCY) as pool:
+        case_results = list(pool.map(run_case, examples))
+
+    count = len(case_results) or 1
+    return {
+        "cases": len(case_results),
+        "refund_accuracy": round(sum(r["accuracy"] for r in case_results) / count, 4),
+        "order_agent_prompt_tokens": round(sum(r["order_prompt_tokens"] for r in case_results) / count, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Token count and accuracy per order data encoding")
+    parser.add_argument("--languages", default="ko,en,jp", help="Comma-separated languages")
+    parser.add_argument("--encodings", default=",".join(SERIALIZERS), help="Comma-separated encodings")
+    parser.add_argument("--accuracy", action="store_true", help="Also run refund cases through the chatbot (LLM calls)")
+    parser.add_argument("--limit", type=int, default=None, help="Max evaluation cases per language (with --accuracy)")
+    parser.add_argument("--output", default=os.path.join(config.EVAL_RESULTS_DIR, "serialization_benchmark.json"))
+    args = parser.parse_args()
+
+    os.environ.setdefault("WEAVE_INIT_DISABLED", "1")
+    languages = [lang.strip() for lang in args.languages.split(",") if lang.strip() in config.SUPPORTED_LANGUAGES]
+    encodings = [name.strip() for name in args.encodings.split(",") if name.strip() in SERIALIZERS]
+
+    count_tokens = get_token_counter(config.ORDER_AGENT_MODEL)
+    results = {"tokens": measure_tokens(languages, encodings, count_tokens), "accuracy": {}}
+
+    print("\n📏 Mean payload tokens per encoding")
+    for language, payloads in results["tokens"].items():
+        for payload_name, by_encoding in payloads.items():
+            baseline = by_encoding.get("json_pretty") or max(by_encoding.values())
+            cells = "  ".join(f"{encoding}={tokens:.0f} ({tokens / baseline:.0%})" for encoding, tokens in by_encoding.items())
+            print(f"   [{language}] {payload_name:<16} {cells}")
+
+    if args.accuracy:
+        print("\n🎯 Refund accuracy per encoding")
+        for language in languages:
+            results["accuracy"][language] = {}
+            for encoding in encodings:
+                result = measure_accuracy(language, encoding, args.limit)
+                results["accuracy"][language][encoding] = result
+                print(f"   [{language}] {encoding:<12} accuracy={result['refund_accuracy']:.3f} "
+                      f"order_agent prompt tokens={result['order_agent_prompt_tokens']:.0f} (n={result['cases']})")
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,460 @@
+"""
+Pluggable session stores for conversation history
+
+대화 턴을 프로세스 메모리 밖(SQLite, Redis 프로토콜 서버)에 저장하여 어느 워커든 세션을 이어받을 수 있게 합니다.
+턴은 추가 전용(append-only) 델타로 한 건씩 기록하고, 읽을 때는 최근 N개 턴만 불러옵니다.
+각 턴은 압축 JSON(큰 턴은 zlib 압축)으로 인코딩됩니다.
+
+URL 형식 (SESSION_STORE_URL):
+    memory                         프로세스 내 메모리 (기본값)
+    sqlite:///sessions.db          SQLite 파일 (WAL 모드, 절대 경로는 sqlite:////var/lib/sessions.db)
+    redis://host:6379/0            Redis 또는 RESP 호환 서버 (로컬 대체 서버: tools/resp_stub_server.py)
+"""
+import abc
+import json
+import time
+import uuid
+import zlib
+import socket
+import sqlite3
+import threading
+from urllib.parse import urlparse
+from typing import Dict, List, Any, Optional
+
+
+COMPRESS_THRESHOLD = 512  # bytes; larger turns are zlib-compressed
+_RAW, _ZLIB = b"j", b"z"
+
+
+def encode_turn(turn: Dict[str, Any]) -> bytes:
+    """Compact JSON, zlib-compressed above COMPRESS_THRESHOLD (1-byte format prefix)"""
+    raw = json.dumps(turn, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+    if len(raw) > COMPRESS_THRESHOLD:
+        return _ZLIB + zlib.compress(raw, 6)
+    return _RAW + raw
+
+
+def decode_turn(payload: bytes) -> Dict[str, Any]:
+    prefix, body = payload[:1], payload[1:]
+    if prefix == _ZLIB:
+        body = zlib.decompress(body)
+    return json.loads(body.decode("utf-8"))
+
+
+class SessionStore(abc.ABC):
+    """Session metadata plus an append-only list of encoded turns per session"""
+
+    @abc.abstractmethod
+    def create(self, session_id: str, meta: Dict[str, Any]):
+        """Create (or reset) a session with its metadata"""
+
+    @abc.abstractmethod
+    def get_meta(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Session metadata, or None for unknown sessions"""
+
+    @abc.abstractmethod
+    def append_turn(self, session_id: str, turn: Dict[str, Any]) -> int:
+        """Append one turn; returns the session's turn count"""
+
+    @abc.abstractmethod
+    def load_turns(self, session_id: str, last_n: int) -> List[Dict[str, Any]]:
+        """Most recent `last_n` turns, oldest first"""
+
+    @abc.abstractmethod
+    def turn_count(self, session_id: str) -> int:
+        """Number of turns appended to the session"""
+
+    @abc.abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """Remove a session; False if it did not exist"""
+
+    @abc.abstractmethod
+    def acquire_lease(self, session_id: str, ttl: float) -> Optional[str]:
+        """Claim the session for one turn across workers; a lease token, or None while another lease is live"""
+
+    @abc.abstractmethod
+    def release_lease(self, session_id: str, token: str):
+        """Give up a lease (no-op once it expired or was taken over)"""
+
+    def evict_expired(self) -> int:
+        """Drop sessions idle longer than the TTL (stores with native expiry return 0)"""
+        return 0
+
+
+class MemorySessionStore(SessionStore):
+    """Process-local store (single worker, lost on restart)"""
+
+    def __init__(self, ttl: float = None):
+        self.ttl = ttl
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._leases: Dict[str, tuple] = {}  # session_id -> (token, expires_at)
+        self._lock = threading.Lock()
+
+    def create(self, session_id: str, meta: Dict[str, Any]):
+        with self._lock:
+            self._sessions[session_id] = {"meta": dict(meta), "turns": [], "updated_at": time.monotonic()}
+
+    def get_meta(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            return dict(entry["meta"]) if entry else None
+
+    def append_turn(self, session_id: str, turn: Dict[str, Any]) -> int:
+        payload = encode_turn(turn)
+        with self._lock:
+            entry = self._sessions.setdefault(session_id, {"meta": {}, "turns": [], "updated_at": 0.0})
+            entry["turns"].append(payload)
+            entry["updated_at"] = time.monotonic()
+            return len(entry["turns"])
+
+    def load_turns(self, session_id: str, last_n: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            payloads = list(entry["turns"][-last_n:]) if entry and last_n > 0 else []
+        return [decode_turn(payload) for payload in payloads]
+
+    def turn_count(self, session_id: str) -> int:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            return len(entry["turns"]) if entry else 0
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def acquire_lease(self, session_id: str, ttl: float) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            lease = self._leases.get(session_id)
+            if lease is not None and lease[1] > now:
+                return None
+            token = uuid.uuid4().hex
+            self._leases[session_id] = (token, now + ttl)
+            return token
+
+    def release_lease(self, session_id: str, token: str):
+        with self._lock:
+            lease = self._leases.get(session_id)
+            if lease is not None and lease[0] == token:
+                del self._leases[session_id]
+
+    def evict_expired(self) -> int:
+        if not self.ttl:
+            return 0
+        cutoff = time.monotonic() - self.ttl
+        with self._lock:
+            expired = [sid for sid, entry in self._sessions.items() if entry["updated_at"] < cutoff]
+            for session_id in expired:
+                del self._sessions[session_id]
+        return len(expired)
+
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite file shared by the workers on one host (WAL mode, one connection per thread)"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sessions (
+        session_id TEXT PRIMARY KEY,
+        meta TEXT NOT NULL,
+        turn_count INTEGER NOT NULL DEFAULT 0,
+        updated_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS turns (
+        session_id TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        payload BLOB NOT NULL,
+        PRIMARY KEY (session_id, seq)
+    );
+    CREATE TABLE IF NOT EXISTS leases (
+        session_id TEXT PRIMARY KEY,
+        token TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    """
+
+    def __init__(self, path: str, ttl: float = None):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._conn().executescript(self.SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, session_id: str, meta: Dict[str, Any]):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO sessions (session_id, meta, turn_count, updated_at) VALUES (?, ?, 0, ?)",
+            (session_id, json.dumps(meta, ensure_ascii=False), time.time())
+        )
+
+    def get_meta(self, session_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT meta FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def append_turn(self, session_id: str, turn: Dict[str, Any]) -> int:
+        payload = encode_turn(turn)
+        conn = self._conn()
+        # BEGIN IMMEDIATE serializes writers across processes so seq numbers never collide
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO sessions (session_id, meta, turn_count, updated_at) VALUES (?, '{}', 0, ?) "
+                "ON CONFLICT(session_id) DO NOTHING", (session_id, time.time())
+            )
+            conn.execute("UPDATE sessions SET turn_count = turn_count + 1, updated_at = ? WHERE session_id = ?",
+                         (time.time(), session_id))
+            count = conn.execute("SELECT turn_count FROM sessions WHERE session_id = ?", (session_id,)).fetchone()[0]
+            conn.execute("INSERT INTO turns (session_id, seq, payload) VALUES (?, ?, ?)", (session_id, count, payload))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return count
+
+    def load_turns(self, session_id: str, last_n: int) -> List[Dict[str, Any]]:
+        if last_n <= 0:
+            return []
+        rows = self._conn().execute(
+            "SELECT payload FROM turns WHERE session_id = ? ORDER BY seq DESC LIMIT ?", (session_id, last_n)
+        ).fetchall()
+        return [decode_turn(row[0]) for row in reversed(rows)]
+
+    def turn_count(self, session_id: str) -> int:
+        row = self._conn().execute("SELECT turn_count FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return row[0] if row else 0
+
+    def delete(self, session_id: str) -> bool:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM leases WHERE session_id = ?", (session_id,))
+            deleted = conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return deleted > 0
+
+    def evict_expired(self) -> int:
+        if not self.ttl:
+            return 0
+        conn = self._conn()
+        now = time.time()
+        cutoff = now - self.ttl
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM turns WHERE session_id IN (SELECT session_id FROM sessions WHERE updated_at < ?)", (cutoff,))
+            evicted = conn.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,)).rowcount
+            conn.execute("DELETE FROM leases WHERE expires_at < ?", (now,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return evicted
+
+    def acquire_lease(self, session_id: str, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        now = time.time()
+        # Takes over only a missing or expired lease (a worker that died mid-turn)
+        claimed = self._conn().execute(
+            "INSERT INTO leases (session_id, token, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET token = excluded.token, expires_at = excluded.expires_at "
+            "WHERE leases.expires_at <= ?", (session_id, token, now + ttl, now)
+        ).rowcount
+        return token if claimed else None
+
+    def release_lease(self, session_id: str, token: str):
+        self._conn().execute("DELETE FROM leases WHERE session_id = ? AND token = ?", (session_id, token))
+
+
+class RespError(Exception):
+    """Error reply from a RESP server"""
+
+
+class RespConnection:
+    """Minimal blocking RESP2 client connection (no redis-py dependency)"""
+
+    def __init__(self, host: str, port: int, db: int = 0, password: str = None, timeout: float = 5.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.file = self.sock.makefile("rb")
+        if password:
+            self.execute("AUTH", password)
+        if db:
+            self.execute("SELECT", db)
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
+
+    def _read(self):
+        """One complete reply; error replies are returned as RespError so the stream stays in sync"""
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("RESP connection closed")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode("utf-8")
+        if kind == b"-":
+            return RespError(rest.decode("utf-8"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self.file.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(rest)
+            return None if count < 0 else [self._read() for _ in range(count)]
+        raise ConnectionError(f"Unexpected RESP reply: {line!r}")  # stream out of sync; the connection is dropped
+
+    def execute(self, *args):
+        self.sock.sendall(self._encode(args))
+        reply = self._read()
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+    def pipeline(self, *commands):
+        """Send several commands in one write and read all replies (raises the first error reply after reading them all)"""
+        self.sock.sendall(b"".join(self._encode(command) for command in commands))
+        replies = [self._read() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class RespSessionStore(SessionStore):
+    """Redis (or any RESP-compatible server): session:{id}:meta string + session:{id}:turns list"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379, db: int = 0, password: str = None,
+                 ttl: float = None, prefix: str = "session"):
+        self.address = (host, port, db, password)
+        self.ttl = int(ttl) if ttl else None
+        self.prefix = prefix
+        self._local = threading.local()
+
+    @classmethod
+    def from_url(cls, url: str, ttl: float = None) -> "RespSessionStore":
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip("/") or 0)
+        return cls(parsed.hostname or "127.0.0.1", parsed.port or 6379, db, parsed.password, ttl)
+
+    def _conn(self) -> RespConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = RespConnection(*self.address)
+        return conn
+
+    def _drop_conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+        self._local.conn = None
+
+    def _call(self, method: str, *args):
+        """Run a connection method; a connection left mid-reply is closed, never reused"""
+        for attempt in range(2):
+            try:
+                return getattr(self._conn(), method)(*args)
+            except RespError:
+                raise  # complete error reply; the connection is still in sync
+            except (ConnectionError, OSError):
+                self._drop_conn()
+                if attempt:
+                    raise
+                # One reconnect for dropped connections (server restart, idle timeout)
+            except BaseException:
+                self._drop_conn()
+                raise
+
+    def _execute(self, *args):
+        return self._call("execute", *args)
+
+    def _pipeline(self, *commands):
+        return self._call("pipeline", *commands)
+
+    def _keys(self, session_id: str):
+        return f"{self.prefix}:{session_id}:meta", f"{self.prefix}:{session_id}:turns"
+
+    def _lease_key(self, session_id: str) -> str:
+        return f"{self.prefix}:{session_id}:lease"
+
+    def create(self, session_id: str, meta: Dict[str, Any]):
+        meta_key, turns_key = self._keys(session_id)
+        encoded = json.dumps(meta, ensure_ascii=False)
+        commands = [("DEL", turns_key), ("SET", meta_key, encoded, "EX", self.ttl) if self.ttl else ("SET", meta_key, encoded)]
+        self._pipeline(*commands)
+
+    def get_meta(self, session_id: str) -> Optional[Dict[str, Any]]:
+        raw = self._execute("GET", self._keys(session_id)[0])
+        return json.loads(raw.decode("utf-8")) if raw is not None else None
+
+    def append_turn(self, session_id: str, turn: Dict[str, Any]) -> int:
+        meta_key, turns_key = self._keys(session_id)
+        commands = [("RPUSH", turns_key, encode_turn(turn))]
+        if self.ttl:
+            commands += [("EXPIRE", turns_key, self.ttl), ("EXPIRE", meta_key, self.ttl)]
+        return self._pipeline(*commands)[0]
+
+    def load_turns(self, session_id: str, last_n: int) -> List[Dict[str, Any]]:
+        if last_n <= 0:
+            return []
+        payloads = self._execute("LRANGE", self._keys(session_id)[1], -last_n, -1) or []
+        return [decode_turn(payload) for payload in payloads]
+
+    def turn_count(self, session_id: str) -> int:
+        return self._execute("LLEN", self._keys(session_id)[1])
+
+    def delete(self, session_id: str) -> bool:
+        return self._execute("DEL", *self._keys(session_id)) > 0
+
+    def acquire_lease(self, session_id: str, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        claimed = self._execute("SET", self._lease_key(session_id), token, "NX", "PX", max(int(ttl * 1000), 1))
+        return token if claimed is not None else None
+
+    def release_lease(self, session_id: str, token: str):
+        # GET then DEL is not atomic: a lease that expires in between may be dropped for its next holder.
+        # The window is one round trip after a turn outlived the whole lease TTL.
+        key = self._lease_key(session_id)
+        current = self._execute("GET", key)
+        if current is not None and current.decode("utf-8") == token:
+            self._execute("DEL", key)
+
+
+def make_session_store(url: str = None, ttl: float = None) -> SessionStore:
+    """Session store from a URL (default: config.SESSION_STORE_URL)"""
+    from config import config
+
+    url = url or config.SESSION_STORE_URL
+    ttl = config.SERVER_SESSION_TTL if ttl is None else ttl
+    if url == "memory":
+        return MemorySessionStore(ttl)
+    if url.startswith("sqlite:"):
+        # sqlite:///relative.db, sqlite:////absolute.db (SQLAlchemy style) or sqlite:path
+        path = url[len("sqlite:///"):] if url.startswith("sqlite:///") else url[len("sqlite:"):]
+        return SQLiteSessionStore(path, ttl)
+    if url.startswith(("redis://", "resp://")):
+        return RespSessionStore.from_url(url, ttl)
+    raise ValueError(f"Unsupported session store URL: {url}")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the chatbot entry points
+
+새 인터프리터에서 simple_chatbot 임포트 시간, SimplifiedChatbot 생성 시간,
+첫 사용 시 로드되는 언어별 리소스(프롬프트, 주문 데이터, 환불 판단 뷰) 준비 시간을 측정하고
+예산(budget) 파일과 비교합니다. `python -X importtime` 결과에서 임포트 비용이 큰 모듈도 보여줍니다.
+
+사용 예:
+    python tools/startup_benchmark.py                   # measure and check against the budget
+    python tools/startup_benchmark.py --importtime 15   # also list the 15 slowest imports
+    python tools/startup_benchmark.py --write-budget    # record current numbers (+ headroom) as the budget
+"""
+import sys
+import os
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+import json
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List, Any
+
+
+DEFAULT_BUDGET_PATH = os.path.join(ROOT_DIR, "tools", "startup_budget.json")
+
+# Used when no budget file exists yet (milliseconds)
+DEFAULT_BUDGET_MS = {
+    "import_ms": 1500.0,
+    "construct_ms": 100.0,
+    "first_use_ms": 500.0
+}
+
+# Runs in a fresh interpreter and prints one JSON line
+HARNESS = """
+import json, sys, time
+started = time.perf_counter()
+import simple_chatbot
+imported = time.perf_counter()
+chatbot = simple_chatbot.SimplifiedChatbot(language=sys.argv[1])
+constructed = time.perf_counter()
+chatbot.intent_agent.prompt_manager.get_intent_prompt()
+chatbot.agents['refund_agent'].prompt_manager.get_refund_agent_prompt()
+chatbot.agents['order_agent'].order_store.enriched(limit=20)
+chatbot.agents['refund_agent'].refund_view.refresh()
+first_use = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "construct_ms": (constructed - imported) * 1000,
+    "first_use_ms": (first_use - constructed) * 1000,
+    "weave_imported": "weave" in sys.modules,
+    "openai_imported": "openai" in sys.modules
+}))
+"""
+
+
+def _env(with_weave: bool) -> Dict[str, str]:
+    env = dict(os.environ)
+    if not with_weave:
+        env["WEAVE_INIT_DISABLED"] = "1"
+    return env
+
+
+def measure_once(language: str, with_weave: bool = False) -> Dict[str, Any]:
+    """One cold start in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-c", HARNESS, language],
+        cwd=ROOT_DIR, env=_env(with_weave), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"startup harness failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def importtime_report(module: str = "simple_chatbot", top: int = 15, with_weave: bool = False) -> List[Dict[str, Any]]:
+    """Slowest imports by cumulative time from `python -X importtime`"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR, env=_env(with_weave), capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        rows.append({"module": name.strip(), "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    return sorted(rows, key=lambda row: row["cumulative_ms"], reverse=True)[:top]
+
+
+def load_budget(path: str) -> Dict[str, float]:
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return {**DEFAULT_BUDGET_MS, **json.load(f)}
+    return dict(DEFAULT_BUDGET_MS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chatbot import/construction cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--language", default="ko")
+    parser.add_argument("--with-weave", action="store_true", help="Measure with Weave tracing enabled")
+    parser.add_argument("--importtime", type=int, default=0, metavar="N", help="Show the N slowest imports")
+    parser.add_argument("--budget", default=DEFAULT_BUDGET_PATH, help="Budget JSON file (milliseconds)")
+    parser.add_argument("--write-budget", action="store_true", help="Write current medians plus headroom as the budget")
+    parser.add_argument("--headroom", type=float, default=0.5, help="Budget headroom for --write-budget (0.5 = +50%%)")
+    args = parser.parse_args()
+
+    samples = [measure_once(args.language, args.with_weave) for _ in range(args.runs)]
+    medians = {key: round(statistics.median(sample[key] for sample in samples), 1) for key in DEFAULT_BUDGET_MS}
+
+    print(f"\n🚀 Cold start ({args.runs} runs, language={args.language}, weave={'on' if args.with_weave else 'off'})")
+    print(f"   weave imported: {samples[-1]['weave_imported']} | openai imported: {samples[-1]['openai_imported']}")
+
+    if args.importtime:
+        print("\n🐢 Slowest imports (cumulative)")
+        for row in importtime_report(top=args.importtime, with_weave=args.with_weave):
+            print(f"   {row['cumulative_ms']:>9.1f} ms  (self {row['self_ms']:>7.1f} ms)  {row['module']}")
+
+    if args.write_budget:
+        budget = {key: round(value * (1 + args.headroom), 1) for key, value in medians.items()}
+        with open(args.budget, "w", encoding="utf-8") as f:
+            json.dump(budget, f, indent=2)
+        print(f"\n💾 Budget written to {args.budget}: {budget}")
+        return
+
+    budget = load_budget(args.budget)
+    over_budget = False
+    print("\n⏱️ Median vs budget")
+    for key, value in medians.items():
+        ok = value <= budget[key]
+        over_budget = over_budget or not ok
+        print(f"   {'✅' if ok else '❌'} {key:<13} {value:>8.1f} ms  (budget {budget[key]:.1f} ms)")
+    if over_budget:
+        print("\n❌ Cold-start budget exceeded")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI-compatible stub server for load testing
+
+chat-completions 프로토콜을 흉내 내는 로컬 HTTP 서버입니다.
+모델별 지연 분포, 토큰 생성 속도, 429/5xx 오류 주입, 에이전트 프롬프트 유형별 고정 응답을 지원합니다.
+평가용 배치 API(/v1/files, /v1/batches)도 흉내 내며, 배치는 백그라운드에서 지연 없이 처리됩니다.
+
+사용 예:
+    python tools/stub_server.py --port 8089 --config stub_config.json
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=stub python simple_chatbot.py
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import math
+import re
+import time
+import uuid
+import random
+import argparse
+import threading
+from email import policy
+from email.parser import BytesParser
+from typing import Dict, List, Any, Optional
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+# Default behaviour; any key can be overridden by the --config JSON file
+DEFAULT_STUB_CONFIG = {
+    "models": {
+        # median/sigma describe a log-normal time-to-first-token in milliseconds
+        "gpt-4o": {"latency_ms": {"median": 700, "sigma": 0.5}, "tokens_per_sec": 80},
+        "gpt-4o-mini": {"latency_ms": {"median": 350, "sigma": 0.4}, "tokens_per_sec": 150},
+        "default": {"latency_ms": {"median": 400, "sigma": 0.4}, "tokens_per_sec": 120}
+    },
+    "errors": {
+        "rate_429": 0.0,
+        "rate_5xx": 0.0,
+        "retry_after_sec": 1,
+        "limit_requests": 500,   # x-ratelimit-limit-* headers sent with a 429
+        "limit_tokens": 200000
+    },
+    "time_scale": 1.0,  # Multiply all simulated delays (0 = no sleeping)
+    "responses": {}     # prompt_type → canned content override
+}
+
+
+# Canned responses per agent prompt type
+CANNED_RESPONSES = {
+    "intent": json.dumps({
+        "intent": "refund_inquiry",
+        "confidence": 0.92,
+        "entities": {
+            "order_id": None,
+            "product_name": None,
+            "time_reference": None,
+            "quantity": None,
+            "refund_reason": None,
+            "refund_reference": False,
+            "selection_type": None
+        }
+    }, ensure_ascii=False),
+    "planning": json.dumps({
+        "plan_type": "multi_step",
+        "reason": "stub plan",
+        "steps": [
+            {"step_id": 1, "agent": "order_agent", "purpose": "lookup", "parameters": {}},
+            {"step_id": 2, "agent": "refund_agent", "purpose": "refund check",
+             "parameters": {"context_from_previous": True}}
+        ],
+        "expected_outcome": "refund guidance"
+    }, ensure_ascii=False),
+    "refund": json.dumps({
+        "refund_possible": True,
+        "refund_fee": 2000,
+        "total_refund_amount": 18000,
+        "reason": "Within 7 days after delivery (stub)",
+        "user_response": "A refund is possible (stub).",
+        "policy_applied": ["7-day refund window"]
+    }, ensure_ascii=False),
+    "score": json.dumps({"score": 0.8, "reason": "stub judge"}),
+    "accuracy": json.dumps({"accuracy": 1.0, "reason": "stub judge"}),
+    "order": "Here are your recent orders (stub): ORD20250819000 Toothbrush, ORD20250819001 Microsoft Mouse.",
+    "general": "Hello! How can I help you today? (stub)"
+}
+
+
+def detect_prompt_type(messages: List[Dict[str, Any]]) -> str:
+    """Guess which agent/scorer produced the request from its output-format markers"""
+    text = "\n".join(str(message.get("content", "")) for message in messages)
+    if '"plan_type"' in text:
+        return "planning"
+    if '"intent"' in text and '"entities"' in text:
+        return "intent_batch" if '"results"' in text else "intent"
+    if '"accuracy"' in text:
+        return "accuracy"
+    if '"score"' in text:
+        return "score"
+    if any(marker in text for marker in ("## Order Data", "## 주문 데이터", "## 注文データ")):
+        return "order"
+    if '"refund_possible"' in text:
+        return "refund"
+    return "general"
+
+
+def batch_intent_content(messages: List[Dict[str, Any]], item_content: str) -> str:
+    """{"results": [...]} for a numbered multi-item intent prompt (agents/intent_agent.py)
+
+    Each entry is the single-item answer with its item's index and the first ORD number of that
+    item's input as order_id. Entries come back in reverse order, so callers must match them by index.
+    """
+    prompt = str(messages[-1].get("content", "")) if messages else ""
+    results = []
+    for number, section in re.findall(r"^### (\d+)\n(.*?)(?=^### \d+\n|\Z)", prompt, re.M | re.S):
+        entry = json.loads(item_content)
+        entry["index"] = int(number)
+        order_ids = re.findall(r"ORD\d+", section.strip().splitlines()[-1])
+        entry.setdefault("entities", {})["order_id"] = order_ids[0] if order_ids else None
+        results.append(entry)
+    return json.dumps({"results": results[::-1]}, ensure_ascii=False)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 chars per token, at least 1)"""
+    return max(1, len(text) // 4)
+
+
+class StubState:
+    """Shared configuration and counters for all handler threads"""
+
+    def __init__(self, stub_config: Dict[str, Any], seed: Optional[int] = None):
+        self.config = stub_config
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters = {"requests": 0, "injected_429": 0, "injected_5xx": 0, "batches": 0}
+        self.files: Dict[str, Dict[str, Any]] = {}  # file id → {"meta": file object, "content": bytes}
+        self.batches: Dict[str, Dict[str, Any]] = {}  # batch id → batch object
+
+    def model_profile(self, model: str) -> Dict[str, Any]:
+        models = self.config["models"]
+        return models.get(model, models.get("default", DEFAULT_STUB_CONFIG["models"]["default"]))
+
+    def sample_latency(self, model: str, completion_tokens: int) -> float:
+        """Time-to-first-token (log-normal) plus generation time at the model's token rate"""
+        profile = self.model_profile(model)
+        latency = profile.get("latency_ms", {})
+        median = float(latency.get("median", 400))
+        sigma = float(latency.get("sigma", 0.4))
+        with self.lock:
+            ttft = self.random.lognormvariate(math.log(max(median, 1.0)), sigma) / 1000.0
+        tokens_per_sec = float(profile.get("tokens_per_sec", 100))
+        generation = completion_tokens / tokens_per_sec if tokens_per_sec > 0 else 0.0
+        return (ttft + generation) * float(self.config.get("time_scale", 1.0))
+
+    def inject_error(self) -> Optional[int]:
+        errors = self.config.get("errors", {})
+        with self.lock:
+            self.counters["requests"] += 1
+            roll = self.random.random()
+            if roll < float(errors.get("rate_429", 0.0)):
+                self.counters["injected_429"] += 1
+                return 429
+            if roll < float(errors.get("rate_429", 0.0)) + float(errors.get("rate_5xx", 0.0)):
+                self.counters["injected_5xx"] += 1
+                return self.random.choice([500, 502, 503])
+        return None
+
+    def canned_content(self, prompt_type: str) -> str:
+        return self.config.get("responses", {}).get(prompt_type, CANNED_RESPONSES[prompt_type])
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """Minimal chat-completions and batch endpoints"""
+
+    server_version = "RetailStubOpenAI/1.0"
+    state: StubState = None  # set by make_server()
+
+    def log_message(self, format, *args):
+        # Keep load tests quiet; counters are exposed on /stats
+        pass
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Dict[str, str] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length", "0"))
+        raw = self.rfile.read(length) if length else b"{}"
+        return json.loads(raw.decode("utf-8") or "{}")
+
+    def do_GET(self):
+        path = self.path.rstrip("/")
+        if path.endswith("/models"):
+            models = [name for name in self.state.config["models"] if name != "default"]
+            self._send_json(200, {"object": "list", "data": [{"id": name, "object": "model"} for name in models]})
+        elif path.endswith("/stats"):
+            self._send_json(200, dict(self.state.counters))
+        elif "/files/" in path and path.endswith("/content"):
+            stored = self.state.files.get(path.split("/")[-2])
+            if stored is None:
+                self._send_not_found()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/jsonl")
+            self.send_header("Content-Length", str(len(stored["content"])))
+            self.end_headers()
+            self.wfile.write(stored["content"])
+        elif "/batches/" in path:
+            batch = self.state.batches.get(path.split("/")[-1])
+            if batch is None:
+                self._send_not_found()
+                return
+            self._send_json(200, batch)
+        else:
+            self._send_not_found()
+
+    def _send_not_found(self):
+        self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        path = self.path.rstrip("/")
+        if path.endswith("/files"):
+            self._upload_file()
+            return
+        if path.endswith("/batches"):
+            self._create_batch()
+            return
+        if "/batches/" in path and path.endswith("/cancel"):
+            batch = self.state.batches.get(path.split("/")[-2])
+            if batch is None:
+                self._send_not_found()
+                return
+            with self.state.lock:
+                if batch["status"] not in ("completed", "failed", "expired"):
+                    batch["status"] = "cancelled"
+            self._send_json(200, batch)
+            return
+        if not path.endswith("/chat/completions"):
+            self._send_not_found()
+            return
+        try:
+            request = self._read_json()
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+            return
+
+        error_status = self.state.inject_error()
+        if error_status == 429:
+            errors = self.state.config.get("errors", {})
+            self._send_json(429, {"error": {"message": "Rate limit reached (stub)", "type": "rate_limit_error"}},
+                            headers={"Retry-After": str(errors.get("retry_after_sec", 1)),
+                                     "x-ratelimit-limit-requests": str(errors.get("limit_requests", 500)),
+                                     "x-ratelimit-limit-tokens": str(errors.get("limit_tokens", 200000))})
+            return
+        if error_status is not None:
+            self._send_json(error_status, {"error": {"message": "Upstream error (stub)", "type": "server_error"}})
+            return
+
+        self._send_json(200, build_completion(self.state, request))
+
+    # --- batch API ---------------------------------------------------------
+    def _upload_file(self):
+        """multipart/form-data upload with `purpose` and `file` fields (as sent by the OpenAI SDK)"""
+        length = int(self.headers.get("Content-Length", "0"))
+        body = self.rfile.read(length) if length else b""
+        header = f"Content-Type: {self.headers.get('Content-Type', '')}\r\n\r\n".encode("utf-8")
+        message = BytesParser(policy=policy.HTTP).parsebytes(header + body)
+        fields = {}
+        if message.is_multipart():
+            for part in message.iter_parts():
+                fields[part.get_param("name", header="content-disposition")] = (
+                    part.get_filename(), part.get_payload(decode=True) or b"")
+        if "file" not in fields:
+            self._send_json(400, {"error": {"message": "Missing file field", "type": "invalid_request_error"}})
+            return
+        filename, content = fields["file"]
+        purpose = fields.get("purpose", (None, b"batch"))[1].decode("utf-8")
+        meta = store_file(self.state, content, filename or "upload.jsonl", purpose)
+        self._send_json(200, meta)
+
+    def _create_batch(self):
+        try:
+            request = self._read_json()
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+            return
+        if request.get("input_file_id") not in self.state.files:
+            self._send_json(400, {"error": {"message": "Unknown input_file_id", "type": "invalid_request_error"}})
+            return
+        batch = {
+            "id": f"batch_stub_{uuid.uuid4().hex[:12]}",
+            "object": "batch",
+            "endpoint": request.get("endpoint", "/v1/chat/completions"),
+            "input_file_id": request["input_file_id"],
+            "completion_window": request.get("completion_window", "24h"),
+            "status": "validating",
+            "output_file_id": None,
+            "error_file_id": None,
+            "created_at": int(time.time()),
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+            "metadata": request.get("metadata"),
+        }
+        with self.state.lock:
+            self.state.batches[batch["id"]] = batch
+            self.state.counters["batches"] += 1
+        threading.Thread(target=run_batch, args=(self.state, batch), daemon=True).start()
+        self._send_json(200, batch)
+
+
+def store_file(state: StubState, content: bytes, filename: str, purpose: str) -> Dict[str, Any]:
+    """Keep an uploaded (or generated) file in memory and return its file object"""
+    meta = {
+        "id": f"file-stub-{uuid.uuid4().hex[:12]}",
+        "object": "file",
+        "bytes": len(content),
+        "created_at": int(time.time()),
+        "filename": filename,
+        "purpose": purpose,
+    }
+    with state.lock:
+        state.files[meta["id"]] = {"meta": meta, "content": content}
+    return meta
+
+
+def run_batch(state: StubState, batch: Dict[str, Any]):
+    """Answer every line of the batch input without simulated latency; injected errors go to the error file"""
+    batch["status"] = "in_progress"
+    outputs, errors = [], []
+    for line in state.files[batch["input_file_id"]]["content"].decode("utf-8").splitlines():
+        if not line.strip():
+            continue
+        if batch["status"] == "cancelled":
+            break
+        entry = json.loads(line)
+        request_id = f"req_stub_{uuid.uuid4().hex[:12]}"
+        error_status = state.inject_error()
+        if error_status is not None:
+            errors.append({"id": request_id, "custom_id": entry.get("custom_id"), "response": {
+                "status_code": error_status, "request_id": request_id,
+                "body": {"error": {"message": "Upstream error (stub)", "type": "server_error"}}}, "error": None})
+            continue
+        outputs.append({"id": request_id, "custom_id": entry.get("custom_id"), "response": {
+            "status_code": 200, "request_id": request_id,
+            "body": build_completion(state, entry.get("body", {}), simulate_latency=False)}, "error": None})
+
+    def jsonl(records: List[Dict[str, Any]]) -> bytes:
+        return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode("utf-8")
+
+    batch["output_file_id"] = store_file(state, jsonl(outputs), f"{batch['id']}_output.jsonl", "batch_output")["id"]
+    if errors:
+        batch["error_file_id"] = store_file(state, jsonl(errors), f"{batch['id']}_error.jsonl", "batch_output")["id"]
+    batch["request_counts"] = {"total": len(outputs) + len(errors), "completed": len(outputs), "failed": len(errors)}
+    with state.lock:
+        if batch["status"] != "cancelled":
+            batch["status"] = "completed"
+        batch["completed_at"] = int(time.time())
+
+
+def build_completion(state: StubState, request: Dict[str, Any], simulate_latency: bool = True) -> Dict[str, Any]:
+    """Build a chat.completion payload, sleeping for the simulated latency"""
+    model = request.get("model", "gpt-4o-mini")
+    messages = request.get("messages", [])
+    prompt_type = detect_prompt_type(messages)
+    if prompt_type == "intent_batch":
+        content = batch_intent_content(messages, state.canned_content("intent"))
+    else:
+        content = state.canned_content(prompt_type)
+
+    prompt_tokens = sum(estimate_tokens(str(message.get("content", ""))) for message in messages)
+    completion_tokens = estimate_tokens(content)
+    delay = state.sample_latency(model, completion_tokens) if simulate_latency else 0.0
+    if delay > 0:
+        time.sleep(delay)
+
+    return {
+        "id": f"chatcmpl-stub-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
+
+
+def load_stub_config(path: str = None) -> Dict[str, Any]:
+    """Merge an optional JSON config file over the defaults"""
+    stub_config = json.loads(json.dumps(DEFAULT_STUB_CONFIG))
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            overrides = json.load(f)
+        for key, value in overrides.items():
+            if isinstance(value, dict) and isinstance(stub_config.get(key), dict):
+                stub_config[key].update(value)
+            else:
+                stub_config[key] = value
+    return stub_config
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8089, stub_config: Dict[str, Any] = None,
+                seed: Optional[int] = None) -> ThreadingHTTPServer:
+    """Create (but do not start) a stub server; port 0 picks a free port"""
+    state = StubState(stub_config or load_stub_config(), seed=seed)
+    handler = type("BoundStubRequestHandler", (StubRequestHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.state = state
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--config", default=None, help="JSON file overriding DEFAULT_STUB_CONFIG")
+    parser.add_argument("--rate-429", type=float, default=None, help="Fraction of requests answered with 429")
+    parser.add_argument("--rate-5xx", type=float, default=None, help="Fraction of requests answered with 5xx")
+    parser.add_argument("--time-scale", type=float, default=None, help="Scale all simulated latencies")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    stub_config = load_stub_config(args.config)
+    if args.rate_429 is not None:
+        stub_config["errors"]["rate_429"] = args.rate_429
+    if args.rate_5xx is not None:
+        stub_config["errors"]["rate_5xx"] = args.rate_5xx
+    if args.time_scale is not None:
+        stub_config["time_scale"] = args.time_scale
+
+    server = make_server(args.host, args.port, stub_config, seed=args.seed)
+    host, port = server.server_address[:2]
+    print(f"🧪 Stub OpenAI server listening on http://{host}:{port}/v1")
+    print(f"   export OPENAI_BASE_URL=http://{host}:{port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stub server stopped.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()